@@ -5,11 +5,31 @@
 
 ## PACKAGES
 import sys, os
+import itertools
 from simbin.python.conH.update import update_simulation_results
 from simbin.python.conH.anal import ground_state_analysis
-from simbin.python.conH.anal import ground_state_magnetic_distribution
+from simbin.python.conH.anal import ground_state_magnetic_distribution, ground_state_magnetic_distributions
+from simbin.python.conH.anal import calculate_phase_diagrams
+from simbin.python.conH.anal import calculate_response_functions
 from simbin.python.fig.highlight_plot import gen_highlight_plot
 from simbin.python.fig.distribution_plot import gen_dist_plot
+from simbin.python.fig.contour_plot import gen_contour_plot
+from simbin.python.conH.store import load_campaign_status, load_campaign_store
+from simbin.python.conH.crawl import crawl_campaign
+from simbin.python.conH.watch import watch_campaign
+from simbin.python.conH.pack import pack_simulation, unpack_simulation
+from simbin.python.conH.series import summarize_simulation_series
+from simbin.python.conH.traj import convert_simulation_trajectories
+from simbin.python.conH.crawl import get_anneal_index
+from simbin.python.conH.cluster import cluster_ground_states
+from simbin.python.conH.chain import chain_ground_states
+from simbin.python.conH.corr import correlate_ground_states
+from simbin.python.conH.sk import structure_ground_states
+from simbin.python.conH.dynamics import dynamics_ground_states
+from simbin.python.conH.state import analyze_saved_states
+from simbin.python.conH.registry import simparm_registry
+from simbin.python.conH.stats import replicate_confidence, series_confidence
+from simbin.python.conH.wham import reweight_simulations
 import numpy as np
 import pandas as pd
 
@@ -18,6 +38,15 @@ import pandas as pd
 verbose = True
 # file containing simulation parameters
 simparm_file = './conH/squ2c32/conH_squ2c32.csv'
+# root of the campaign directory tree
+campaign_dir = './conH/squ2c32/'
+# directory containing the campaign store
+store_dir = './conH/squ2c32/summary/campaign/'
+# number of squares in each simulation of the campaign (32 x 32)
+n_squares = 1024
+# default number of processes used to compile simulation results during
+# an update (None compiles the simulations serially)
+default_workers = None
 
 ## FUNCTIONS
 # method that loads the simulation parameters associated with a bath of jobs
@@ -70,96 +99,263 @@ class conH_simparm(object):
 update = 'update' in sys.argv
 # if analysis key word is located in script arguments
 anal = 'anal' in sys.argv
+# if watch key word is located in script arguments, the campaign is watched
+# and each anneal iteration is ingested as soon as it has been written
+watch = 'watch' in sys.argv
+# if pack key word is located in script arguments, the finished anneal
+# iterations of each simulation are packed into one archive
+pack = 'pack' in sys.argv
+# if unpack key word is located in script arguments, the archive of each
+# simulation is unpacked into the anneal directory
+unpack = 'unpack' in sys.argv
+# if series key word is located in script arguments, the report and order
+# parameter time series of each anneal iteration are reduced
+series = 'series' in sys.argv
+# if convert key word is located in script arguments, the xyz movies of each
+# simulation are converted to binary trajectories (compressed if the
+# compress key word is also located in the script arguments)
+convert = 'convert' in sys.argv
+compress = 'compress' in sys.argv
+# if clusters key word is located in script arguments, the cluster size
+# distribution and percolation of the ground state of each simulation are
+# analyzed from its square trajectory
+clusters = 'clusters' in sys.argv
+# if chains key word is located in script arguments, the chain topology
+# (head-to-tail, anti-parallel, double-stranded) of the ground state of each
+# simulation is analyzed from its square trajectory
+chains = 'chains' in sys.argv
+# if corr key word is located in script arguments, the pair and orientational
+# correlation functions of the ground state of each simulation are accumulated
+corr = 'corr' in sys.argv
+# if sk key word is located in script arguments, the structure factor of the
+# ground state of each simulation is calculated and plotted
+sk = 'sk' in sys.argv
+# if dynamics key word is located in script arguments, the mean squared
+# displacement and rotational autocorrelation of the ground state of each
+# simulation are calculated
+dynamics = 'dynamics' in sys.argv
+# if states key word is located in script arguments, the order parameters of
+# the most recent saved configuration of each simulation are recomputed
+states = 'states' in sys.argv
+# if inflect key word is located in script arguments, the transition temperature
+# of each order parameter of each simulation is located, and the annealing
+# phase diagrams are calculated
+inflect = 'inflect' in sys.argv
+# if response key word is located in script arguments, the heat capacity and
+# magnetic susceptibility of each simulation are calculated from the fluctuations
+# of each anneal iteration, and the temperature of their peaks is located
+response = 'response' in sys.argv
+# if wham key word is located in script arguments, the samples of adjacent anneal
+# iterations of each simulation are reweighted to estimate its properties at
+# the temperature of each anneal iteration, which are validated against the
+# samples of the anneal iteration
+wham = 'wham' in sys.argv
+# if ground key word is located in script arguments, the ground state phase
+# diagrams (DH, AH, AD) are calculated from the annealed anneal iterations
+ground = 'ground' in sys.argv
+# if ci key word is located in script arguments, the replicates of each state
+# point are averaged with bootstrap confidence intervals, as are the time
+# series of each anneal iteration (with block bootstrap confidence intervals)
+ci = 'ci' in sys.argv
 # if distributions key word is located in script arguments
 test_dist = 'test_dist' in sys.argv
+# if rebuild key word is located in script arguments, summaries are rebuilt
+# from every anneal file rather than only new or modified anneal files
+rebuild = 'rebuild' in sys.argv
+# number of processes used to compile simulation results (e.g. workers=8)
+workers = default_workers
+for arg in sys.argv:
+	if arg.startswith('workers='):
+		workers = int(arg.replace('workers=', ''))
 
 ## SCRIPT
-# load the job parameters
-job_parms = load_conH_parms(simparm_file) # load simulation parameters from file
-
-# perform update and analysis
-if update:
-	update_simulation_results(job_parms, savedir = './conH/squ2c32/summary/', verbose = True)
-
-if anal:
-	## BRAIN STORMING
-	# e.g. load ground state properties (ignore simulation data above certain temp, avg replicates)
-	## TODO :: transition inflection point calculations to CHTC
-	# e.g. parse transition temperatures (calculate if the files do not exist)
-
-	# load simulation parameteres
-	# job_parms = load_conH_parms(simparm_file)
-
-	# # load ground state
-	# ground_state_analysis(job_parms, max_temp = 0.6, xa = 0.5)
-
-	# load summary file as df
-	df = pd.read_csv('./conH/squ2c32/summary/status.csv')
-
-	# loop through all items in list
-	# normalize the number of clusters as the average cluster size
-	# for index, row in df.iterrows():
-	# 	df.at[index, 'nclust'] = math.log10(df.at[index, 'nclust'])
-		# df.at[index, 'nclust'] = 1024 / df.at[index, 'nclust']
-		# print(df.at[index, 'nclust'])
-	# exit()
-
-
-	for i in [0.5, 1.0]:
-		# get masked df
-		mask = (df['XA'] == i) & (df['temp'] < 0.6)
-
-		# generate file names
-		save_mag_file = "gs_mag_xa{:03d}".format(int(i * 100))
-		save_clust_file = "gs_clust_xa{:03d}".format(int(i  * 100))
-
-
-		# plot the ground state average cluster size of system against
-		# the external field strength for different densities
-		gen_highlight_plot(
-			df = df[mask],
-			# file = TH_dir + 'anal/testH_anal.csv',
-			y_col = 'nclust',
-			x_col = 'H',
-			iso_col = 'ETA',
-			save = './conH/squ2c32/summary/' + save_clust_file,
-			# iso_vals = [float("{:.2f}".format(x)) for x in np.linspace(0.2, 1.0, 1 * 8 + 1, endpoint = True)],
-			iso_vals = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
-			# y_major_ticks = [0., 0.2, 0.4, 0.6, 0.8, 1.0],
-			# y_minor_ticks = [0.1, 0.3, 0.5, 0.7, 0.9],
-			max_y = 300,
-			min_y = 1,
-			highlight = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
-			highlight_colormap = 'flare',
-			highlight_label = '$\phi$ = {:.2f}',
-			# highlight_label_order = 'max_value',
-			X_label = 'External Field Strength ($H^{*}_{set}$)',
-			Y_label = 'Number of Clusters')
-
-		# plot the ground state magnetism against the system 
-		# against the external field strength for different densities
-		gen_highlight_plot(
-			df = df[mask],
-			# file = TH_dir + 'anal/testH_anal.csv',
-			y_col = 'mag',
-			x_col = 'H',
-			iso_col = 'ETA',
-			save = './conH/squ2c32/summary/' + save_mag_file,
-			# iso_vals = [float("{:.2f}".format(x)) for x in np.linspace(0.2, 1.0, 1 * 8 + 1, endpoint = True)],
-			iso_vals = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
-			y_major_ticks = [0., 0.2, 0.4, 0.6, 0.8, 1.0],
-			y_minor_ticks = [0.1, 0.3, 0.5, 0.7, 0.9],
-			highlight = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
-			highlight_colormap = 'flare',
-			highlight_label = '$\phi$ = {:.2f}',
-			# highlight_label_order = 'max_value',
-			X_label = 'External Field Strength ($H^{*}_{set}$)',
-			Y_label = 'System Magnetism ($M$)')
-
-
-if test_dist:
-	# get ground state distributions
-	for x in [0.5, 1.0]:
-		for h in [0.0, 0.2, 0.4]:
-			for d in [0.15, 0.30, 0.45]:
-				ground_state_magnetic_distribution(job_parms, XA = x, H = h, ETA = d, save_dir = './conH/squ2c32/summary/')
\ No newline at end of file
+if __name__ == '__main__':
+	# load the job parameters
+	job_parms = load_conH_parms(simparm_file) # load simulation parameters from file
+	job_registry = simparm_registry(job_parms) # index simulation parameters by state point
+	# pack or unpack the anneal iterations of each simulation
+	if pack:
+		for p in job_parms:
+			pack_simulation(p, verbose = True)
+	if unpack:
+		for p in job_parms:
+			unpack_simulation(p, verbose = True)
+	if convert:
+		for p in job_parms:
+			convert_simulation_trajectories(p, compress = compress, verbose = True)
+
+	# index the campaign directory tree once, if it is used by the update, the
+	# time series or the saved states. otherwise, the simulations that are
+	# analyzed are scanned directly (the watcher crawls the tree itself)
+	campaign_index = None
+	if update or series or states:
+		campaign_index = crawl_campaign(campaign_dir, verbose = True)
+
+	# perform update and analysis
+	if update:
+		update_simulation_results(job_parms, savedir = './conH/squ2c32/summary/', verbose = True, workers = workers, incremental = not rebuild, store = store_dir, index = campaign_index)
+
+	if series:
+		for p in job_parms:
+			ann = get_anneal_index(campaign_index, p.path, p.XA, p.H, p.ETA, p.RP)
+			for kind in ['report', 'op']:
+				summarize_simulation_series(p, kind = kind, incremental = not rebuild, anneal_index = ann)
+
+	if watch:
+		watch_campaign(job_parms, campaign_dir, savedir = './conH/squ2c32/summary/', store = store_dir, workers = workers, verbose = True)
+
+	if clusters:
+		df_clust = cluster_ground_states(job_parms, n_squares, workers = workers, verbose = True)
+		df_clust.to_csv('./conH/squ2c32/summary/gs_clusters.csv', index = False)
+
+	if chains:
+		df_chain = chain_ground_states(job_parms, n_squares, workers = workers, verbose = True)
+		df_chain.to_csv('./conH/squ2c32/summary/gs_chains.csv', index = False)
+
+	if corr:
+		df_corr = correlate_ground_states(job_parms, n_squares, workers = workers, verbose = True)
+		df_corr.to_csv('./conH/squ2c32/summary/gs_gr.csv', index = False)
+
+	if sk:
+		df_sk = structure_ground_states(job_parms, n_squares, workers = workers, verbose = True)
+		df_sk.to_csv('./conH/squ2c32/summary/gs_sk.csv', index = False)
+		for p in job_parms:
+			sk_file = p.path + "/anal/" + p.jobid + p.simid + "_sk.npz"
+			if os.path.exists(sk_file):
+				gen_contour_plot(file = sk_file,
+					save = './conH/squ2c32/summary/' + p.simid + '_GSsk.png',
+					title = "Ground State Structure Factor",
+					subtitle = '$x_{{a}}$ = {:.2f}, $H^{{*}}$ = {:.2f}, $\phi$ = {:.2f}'.format(p.XA, p.H, p.ETA),
+					X_label = '$k_{x}$',
+					Y_label = '$k_{y}$',
+					Z_label = '$S(k)$',
+					min_x = -2. * np.pi,
+					max_x = 2. * np.pi,
+					min_y = -2. * np.pi,
+					max_y = 2. * np.pi,
+					log_scale = True)
+
+	if dynamics:
+		df_dyn = dynamics_ground_states(job_parms, n_squares, workers = workers, verbose = True)
+		df_dyn.to_csv('./conH/squ2c32/summary/gs_dyn.csv', index = False)
+
+	if states:
+		indices = [get_anneal_index(campaign_index, p.path, p.XA, p.H, p.ETA, p.RP) for p in job_parms]
+		df_state = analyze_saved_states(job_parms, workers = workers, indices = indices, verbose = True)
+		df_state.to_csv('./conH/squ2c32/summary/gs_states.csv', index = False)
+
+	if inflect:
+		# load every anneal iteration of every simulation from the campaign store
+		df = load_campaign_store(store_dir)
+		calculate_phase_diagrams(campaign_dir, df, GSPD = False, AnPD = True, workers = workers)
+
+	if response:
+		# load every anneal iteration of every simulation from the campaign store
+		df = load_campaign_store(store_dir)
+		calculate_response_functions(campaign_dir, df, n_squares)
+
+	if wham:
+		# load the temperature of every anneal iteration from the campaign store
+		df = load_campaign_store(store_dir, columns = ['XA', 'H', 'ETA', 'RP', 'id', 'temp'])
+		df_wham = reweight_simulations(job_parms, df, n_squares, workers = workers, verbose = True)
+		df_wham.to_csv('./conH/squ2c32/summary/wham.csv', index = False)
+
+	if ground:
+		# load every anneal iteration of every simulation from the campaign store
+		df = load_campaign_store(store_dir)
+		calculate_phase_diagrams(campaign_dir, df, GSPD = True, AnPD = False)
+
+	if ci:
+		# average the replicates of each anneal iteration, and of the most recent anneal iteration
+		df = load_campaign_store(store_dir)
+		replicate_confidence(df, keys = ['XA', 'H', 'ETA', 'id']).to_csv('./conH/squ2c32/summary/ci.csv', index = False)
+		df = load_campaign_status(store_dir)
+		replicate_confidence(df.drop(columns = ['id'])).to_csv('./conH/squ2c32/summary/gs_ci.csv', index = False)
+		# average the downsampled time series of each anneal iteration (see 'series')
+		for p in job_parms:
+			for kind in ['report', 'op']:
+				trace_file = p.path + "/anal/" + p.jobid + p.simid + "_" + kind + "_trace.csv"
+				if os.path.exists(trace_file):
+					series_confidence(pd.read_csv(trace_file)).to_csv(p.path + "/anal/" + p.jobid + p.simid + "_" + kind + "_ci.csv", index = False)
+
+	if anal:
+		## BRAIN STORMING
+		# e.g. load ground state properties (see 'ground')
+		# e.g. parse transition temperatures (see 'inflect')
+
+		# # load ground state
+		# ground_state_analysis(load_campaign_store(store_dir), max_temp = 0.6, xa = 0.5)
+
+		# load the most recent anneal iteration of each simulation from the campaign store
+		df = load_campaign_status(store_dir, columns = ['XA', 'H', 'ETA', 'temp', 'nclust', 'mag'])
+
+		# loop through all items in list
+		# normalize the number of clusters as the average cluster size
+		# for index, row in df.iterrows():
+		# 	df.at[index, 'nclust'] = math.log10(df.at[index, 'nclust'])
+			# df.at[index, 'nclust'] = 1024 / df.at[index, 'nclust']
+			# print(df.at[index, 'nclust'])
+		# exit()
+
+
+		for i in [0.5, 1.0]:
+			# get masked df, average the replicates of each state point
+			mask = (df['XA'] == i) & (df['temp'] < 0.6)
+			df_ci = replicate_confidence(df[mask], ['nclust', 'mag'])
+
+			# generate file names
+			save_mag_file = "gs_mag_xa{:03d}".format(int(i * 100))
+			save_clust_file = "gs_clust_xa{:03d}".format(int(i  * 100))
+
+
+			# plot the ground state average cluster size of system against
+			# the external field strength for different densities
+			gen_highlight_plot(
+				df = df_ci,
+				# file = TH_dir + 'anal/testH_anal.csv',
+				y_col = 'nclust',
+				y_lo_col = 'nclust_lo',
+				y_hi_col = 'nclust_hi',
+				x_col = 'H',
+				iso_col = 'ETA',
+				save = './conH/squ2c32/summary/' + save_clust_file,
+				# iso_vals = [float("{:.2f}".format(x)) for x in np.linspace(0.2, 1.0, 1 * 8 + 1, endpoint = True)],
+				iso_vals = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
+				# y_major_ticks = [0., 0.2, 0.4, 0.6, 0.8, 1.0],
+				# y_minor_ticks = [0.1, 0.3, 0.5, 0.7, 0.9],
+				max_y = 300,
+				min_y = 1,
+				highlight = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
+				highlight_colormap = 'flare',
+				highlight_label = '$\phi$ = {:.2f}',
+				# highlight_label_order = 'max_value',
+				X_label = 'External Field Strength ($H^{*}_{set}$)',
+				Y_label = 'Number of Clusters')
+
+			# plot the ground state magnetism against the system 
+			# against the external field strength for different densities
+			gen_highlight_plot(
+				df = df_ci,
+				# file = TH_dir + 'anal/testH_anal.csv',
+				y_col = 'mag',
+				y_lo_col = 'mag_lo',
+				y_hi_col = 'mag_hi',
+				x_col = 'H',
+				iso_col = 'ETA',
+				save = './conH/squ2c32/summary/' + save_mag_file,
+				# iso_vals = [float("{:.2f}".format(x)) for x in np.linspace(0.2, 1.0, 1 * 8 + 1, endpoint = True)],
+				iso_vals = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
+				y_major_ticks = [0., 0.2, 0.4, 0.6, 0.8, 1.0],
+				y_minor_ticks = [0.1, 0.3, 0.5, 0.7, 0.9],
+				highlight = [0.05, 0.15, 0.30, 0.50, 0.55, 0.60],
+				highlight_colormap = 'flare',
+				highlight_label = '$\phi$ = {:.2f}',
+				# highlight_label_order = 'max_value',
+				X_label = 'External Field Strength ($H^{*}_{set}$)',
+				Y_label = 'System Magnetism ($M$)')
+
+
+	if test_dist:
+		# get ground state distributions
+		points = list(itertools.product([0.5, 1.0], [0.0, 0.2, 0.4], [0.15, 0.30, 0.45]))
+		ground_state_magnetic_distributions(job_registry, points, save_dir = './conH/squ2c32/summary/', store_dir = store_dir, index = campaign_index, workers = workers)
\ No newline at end of file
@@ -90,7 +90,21 @@ shift $((OPTIND-1))
 
 
 ## FUNCTIONS
-# none
+# writes the anneal iterations that have been packed into the archive of
+# each simulation below a directory (see pack.py) to an exclude file, so
+# that rsync does not download the iteration directories again after they
+# have been removed by packing
+# $1 :: directory that the remote directory is synced to
+# $2 :: exclude file
+pack_excludes () {
+    : > "$2"
+    find "$1" -name anneal.zip | while read -r zip; do
+        sim="${zip#"$1"}"
+        sim="${sim#/}"
+        sim="${sim%anneal.zip}"
+        python3 -c "import sys, zipfile; print('\n'.join(sorted(set(n.split('/')[0] for n in zipfile.ZipFile(sys.argv[1]).namelist()))))" "$zip" | sed "s|^|/${sim}anneal/|; s|$|/|" >> "$2"
+    done
+}
 
 
 ## SCRIPT
@@ -99,7 +113,11 @@ shift $((OPTIND-1))
 if [[ $ALL_BOOL -eq 1 ]]; then 
     # sync everything in the specified location (LOC) with the local directory (LOGIN)
 
-    rsync -Pavz $LOGIN:$LOC ../
+    # iterations that have been packed locally are not downloaded again
+    EXCLUDE=$(mktemp)
+    pack_excludes ../ "$EXCLUDE"
+    rsync -Pavz --exclude-from="$EXCLUDE" $LOGIN:$LOC ../
+    rm -f "$EXCLUDE"
 
 elif [[ $BIN_BOOL -eq 1 ]]; then 
 
@@ -111,7 +129,10 @@ elif [[ $JOB_BOOL -eq 1 ]]; then
     # sync the simulation files corresponding to the specified job id (JOB) 
     # located in the specified location (LOC) on the specified execute node (LOGIN)
     # with the local simulations corresponding to the job id (JOB)
-    rsync -Pavz "${LOGIN}:${LOC}${JOB}/" "./${JOB}/"
+    EXCLUDE=$(mktemp)
+    pack_excludes "./${JOB}/" "$EXCLUDE"
+    rsync -Pavz --exclude-from="$EXCLUDE" "${LOGIN}:${LOC}${JOB}/" "./${JOB}/"
+    rm -f "$EXCLUDE"
 
     # echo "TODO upload simupdate program"   
     # ./simbin/java/SimUpdate.sh ${JOB} true
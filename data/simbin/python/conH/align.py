@@ -0,0 +1,82 @@
+# filename :: align.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: recomputes the alignment distribution of the squares of a conH
+#			 simulation from its trajectory with any binning or weighting
+#			 (see accumulate_alignment_distribution in polsqu2x2_mod.f90)
+
+
+import sys, os
+import pandas as pd
+import numpy as np
+from simbin.python.conH.traj import get_orientation
+
+## PARAMETERS
+# default binning of the alignment distribution (see polsqu2x2_mod.f90)
+align_bins = 200
+min_align_bin = -np.pi
+max_align_bin = np.pi
+# number of frames that are read from a trajectory at once
+align_batch = 64
+
+
+## FUNCTIONS
+# returns the alignment of each square with the field (y-axis), between -pi
+# and pi. the dipole of a square points from its second circle to its first
+# circle if the square has A chirality, and the reverse if the square has B
+# chirality, so that the alignment is chirality-aware
+#
+# phi :: orientation of each square relative to the x-axis (see get_orientation)
+# chai :: chirality of each square (1 for A, 2 for B)
+def get_alignment (phi, chai):
+	theta = phi - np.pi / 2. + np.where(chai == 2, np.pi, 0.)
+	return np.mod(theta + np.pi, 2. * np.pi) - np.pi
+
+# returns the bin edges of the alignment distribution
+#
+# bins :: number of bins between min_align_bin and max_align_bin, or an array of bin edges
+def get_align_edges (bins = align_bins):
+	if np.ndim(bins) == 0:
+		return np.linspace(min_align_bin, max_align_bin, int(bins) + 1)
+	return np.asarray(bins, dtype = float)
+
+# converts a histogram of alignments to a distribution, in the same format
+# as the distribution file written by the fortran module (no, theta, align).
+# the histogram is normalized so that the area of the distribution is one
+def get_align_distribution (hist, edges):
+	width = np.diff(edges)
+	area = (hist * width).sum()
+	align = hist / area if area > 0. else np.zeros(len(hist))
+	return pd.DataFrame({'no': np.arange(1, len(hist) + 1),
+		'theta': (edges[:-1] + edges[1:]) / 2.,
+		'align': align})
+
+# returns the alignment distribution of the squares in the frames of a
+# trajectory. frames are read in batches, and the alignment of every square
+# in every frame of each batch is histogrammed at once
+#
+# traj :: square trajectory (see traj.py)
+# frames :: slice, list or array of frames. if None, all frames are used
+# bins :: number of bins, or an array of bin edges
+# chai :: if 1 or 2, only the squares with that chirality are counted
+# weights :: function that returns the weight of each square in a batch of
+#			 frames, from the fields of the batch (see squ_fields in traj.py).
+#			 if None, each square in each frame is counted once
+def alignment_distribution (traj, frames = None, bins = align_bins, chai = None, weights = None, batch = align_batch):
+	edges = get_align_edges(bins)
+	ids = np.arange(len(traj))
+	if frames is not None:
+		ids = ids[frames]
+	hist = np.zeros(len(edges) - 1)
+	for k in range(0, len(ids), batch):
+		fr = traj[ids[k:k + batch]]
+		c = fr['chai'].astype(int)
+		theta = get_alignment(get_orientation(fr['quat']), c)
+		w = None if weights is None else np.broadcast_to(weights(fr), theta.shape)
+		if chai is not None:
+			mask = (c == chai)
+			theta = theta[mask]
+			w = None if w is None else w[mask]
+		h, _ = np.histogram(theta, bins = edges, weights = w)
+		hist += h
+	return get_align_distribution(hist, edges)
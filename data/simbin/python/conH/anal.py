@@ -9,8 +9,21 @@ import sys, os
 import pandas as pd
 import numpy as np
 import glob
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 from simbin.python.fig.distribution_plot import gen_dist_plot
+from simbin.python.fig.contour_plot import gen_contour_plot
+from simbin.python.conH.store import load_campaign_store
+from simbin.python.conH.crawl import get_anneal_index, get_index_key
+from simbin.python.conH.registry import simparm_registry
+from simbin.python.conH.pack import open_anneal_file, anneal_file_exists
+from simbin.python.conH.traj import load_trajectory, bin_suffix
+from simbin.python.conH.align import alignment_distribution
+from simbin.python.conH.inflect import find_transitions
+from simbin.python.conH.response import response_props, calc_response, find_response_peaks, average_response_peaks
+from simbin.python.conH.ground import get_ground_states, average_ground_states, classify_ground_states, get_ground_state_maps
+from simbin.python.conH.ground import gs_diagrams, gs_phases, gs_labels, sim_keys
 
 
 ## PARAMETERS
@@ -27,110 +40,335 @@ max_anneal_temp = 0.05
 # and the headers for the order parameter values / fluctuations 
 # during the simulation
 
+# annealing phase diagrams, each with the simulation parameter that
+# varies along the diagram and the simulation parameters held constant
+anneal_diagrams = {'DT': ('ETA', ['XA', 'H']), 'HT': ('H', ['XA', 'ETA']), 'AT': ('XA', ['H', 'ETA'])}
+
 
 ## FUNCTIONS
-# calculates ground state phase diagrams
-def calc_ground_state (sim_df):
+# calculates ground state phase diagrams. the ground state of each simulation
+# is averaged over its anneal iterations below max_temp, the replicates of
+# each set of simulation parameters are averaged, and the phase of each set is
+# classified by the order parameters that pass min_val (see ground.py)
+#
+# plot :: if true, the map of each order parameter of each phase diagram is plotted
+# incremental :: if true, the phase diagrams are only calculated again once the
+#				 ground state of a simulation has changed
+# returns the averaged and classified ground state of each set of simulation parameters
+def calc_ground_state (anal_dir, sim_df, max_temp = max_anneal_temp, min_val = min_op_val, plot = True, incremental = True):
 
 	# create directory which contains ground state phase diagrams
 	gs_path = anal_dir + "summary/GSPD/"
 	if not os.path.exists(gs_path):
-		os.mkdir(gs_path)
+		os.makedirs(gs_path)
 
+	# collect the ground state of each simulation. the phase diagrams are
+	# cached, until the anneal iterations in the ground state change
+	df_gs = get_ground_states(sim_df, max_temp)
+	gs_file = gs_path + "ground_states.csv"
+	pd_file = gs_path + "GSPD.csv"
+	if incremental and os.path.exists(gs_file) and os.path.exists(pd_file):
+		prev = pd.read_csv(gs_file, float_precision = 'round_trip')
+		cols = sim_keys + ['n', 'max_id']
+		if set(cols) <= set(prev.columns) and prev.shape == df_gs.shape and np.array_equal(prev[cols].to_numpy(dtype = float), df_gs[cols].to_numpy(dtype = float)):
+			return pd.read_csv(pd_file)
+	df_gs.to_csv(gs_file, index = False)
 
-	## DH :: ground-state density-field (@ constant chirality fraction)
-	gs_path = anal_dir + "summary/GSPD/DH/"
-	if not os.path.exists(gs_path):
-		os.mkdir(gs_path)
+	# average the replicates, classify the phase of each ground state
+	df_avg = classify_ground_states(average_ground_states(df_gs), min_val)
+	df_avg.to_csv(pd_file, index = False)
+	phases = [p for p in gs_phases if p in df_avg.columns]
 
-	# calculate 
-
-	# AH :: ground-state chirality-field (@ constant density)
-	# AD :: ground-state chirality-density (@ constant field)
+	## DH :: ground-state density-field (@ constant chirality fraction)
+	## AH :: ground-state chirality-field (@ constant density)
+	## AD :: ground-state chirality-density (@ constant field)
+	for name, (x_col, y_col, const_col) in gs_diagrams.items():
+		path = gs_path + name + "/"
+		if not os.path.exists(path):
+			os.mkdir(path)
+		df_avg[[const_col, x_col, y_col, 'n'] + phases + ['phase']].sort_values([const_col, x_col, y_col]).to_csv(path + name + ".csv", index = False)
+		if not plot:
+			continue
+		for prop in phases:
+			for c, m in get_ground_state_maps(df_avg, name, prop).items():
+				# contours require at least two points along each axis
+				if m.shape[0] < 2 or m.shape[1] < 2:
+					continue
+				gen_contour_plot(x = m.index.to_numpy(dtype = float),
+					y = m.columns.to_numpy(dtype = float),
+					z = m.to_numpy(dtype = float),
+					save = path + name + "_{:s}{:03d}_{:s}.png".format(gs_labels[const_col][1], int(round(c * 100)), prop),
+					title = "Ground State Phase Diagram ({:s})".format(name),
+					subtitle = '{:s} = {:.2f}'.format(gs_labels[const_col][0], c),
+					X_label = gs_labels[x_col][0],
+					Y_label = gs_labels[y_col][0],
+					Z_label = prop,
+					min_z = 0.,
+					max_z = 1.,
+					levels = 11)
+	return df_avg
 
 # calculates inflection points for all simulations and their order parameters
-def calc_inflect (sim_df):
-	pass
+#
+# sim_df :: data frame containing every anneal iteration of every simulation
+#			(e.g. loaded from the campaign store)
+# props :: list of order parameters (see inflect.py)
+# workers :: number of processes used to locate the inflection points
+# returns the transition temperature of each order parameter of each simulation
+def calc_inflect (sim_df, props = None, workers = None, incremental = True, verbose = False):
+	return find_transitions(sim_df, props = props, workers = workers, incremental = incremental, verbose = verbose)
 
-	# DT :: density-temperature (@ constant chirality fraction, constant density)
-	# HT :: field-temperature (@ constant chirality fraction, constant density)
-	# AT :: chirality-temperature (@ constant field strength, constant density)
+# averages the transition temperatures of the replicates of each set of simulation
+# parameters. the uncertainty combines the uncertainty of each replicate with
+# the spread between replicates
+def average_replicates (df_inf):
+	rows = []
+	for key, g in df_inf.groupby(['XA', 'H', 'ETA', 'prop'], sort = True):
+		n = len(g.index)
+		var = g['temp'].var(ddof = 1) if n > 1 else 0.
+		rows.append({'XA': key[0], 'H': key[1], 'ETA': key[2], 'prop': key[3],
+			'temp': g['temp'].mean(),
+			'temp_err': np.sqrt((g['temp_err'] ** 2).sum() / n ** 2 + var / n),
+			'n': n})
+	return pd.DataFrame(rows, columns = ['XA', 'H', 'ETA', 'prop', 'temp', 'temp_err', 'n'])
 
 # main method that calculates all phase diagrams
-def calculate_phase_diagrams(anal_dir, sim_df, GSPD = True, AnPD = True):
-	pass
-
-	# empty dataframe which will contain a list of simulations
-	# which either failed in calculating inflection points
-	# or have not yet reached a temperature which enables them
-	# to be considered for temperature calculation
+def calculate_phase_diagrams(anal_dir, sim_df, GSPD = True, AnPD = True, workers = None):
 
 	if GSPD:
 		## calculate ground state phase diagrams
 		calc_ground_state(anal_dir, sim_df)
 
 	if AnPD:
-		pass
 		## calculate inflection points for all simulations
+		df_inf = calc_inflect(sim_df, workers = workers, verbose = True)
+
+		# empty dataframe which will contain a list of simulations
+		# which either failed in calculating inflection points,
+		# have not yet reached a temperature which enables them
+		# to be considered for temperature calculation, or whose
+		# order parameter does not change significantly (see inflect.py)
+		pd_path = anal_dir + "summary/AnPD/"
+		if not os.path.exists(pd_path):
+			os.makedirs(pd_path)
+		failed = df_inf['temp'].isna()
+		df_inf[failed].to_csv(pd_path + "failed.csv", index = False)
+		df_inf[~failed].to_csv(pd_path + "inflect.csv", index = False)
+
 		## calculate annealing phase diagrams
+		df_pd = average_replicates(df_inf[~failed])
+		for name, (x_col, const_cols) in anneal_diagrams.items():
+			path = pd_path + name + "/"
+			if not os.path.exists(path):
+				os.mkdir(path)
+			df_pd[const_cols + [x_col, 'prop', 'temp', 'temp_err', 'n']].sort_values(const_cols + ['prop', x_col]).to_csv(path + name + ".csv", index = False)
+		return df_pd
+
+# calculates the relative response functions (heat capacity, magnetic
+# susceptibility) of every anneal iteration of every simulation from their
+# fluctuations, and the temperature at which each response function peaks
+# (see response.py)
+#
+# n_squares :: number of squares in each simulation
+# bandwidth :: if not None, the response curves are smoothed before the peaks are located
+def calculate_response_functions(anal_dir, sim_df, n_squares, bandwidth = None):
+
+	pd_path = anal_dir + "summary/AnPD/"
+	if not os.path.exists(pd_path):
+		os.makedirs(pd_path)
+
+	# calculate the response functions of every anneal iteration
+	df_res = calc_response(sim_df, n_squares)
+	props = [p for p in response_props if p in df_res.columns]
+	parm_cols = [c for c in ['jobid', 'simid', 'XA', 'H', 'ETA', 'RP'] if c in df_res.columns]
+	df_res[parm_cols + ['id', 'set', 'temp'] + props].sort_values(['XA', 'H', 'ETA', 'RP', 'id']).to_csv(pd_path + "response.csv", index = False)
+
+	# locate the peak of each response function, average the replicates
+	df_peak = find_response_peaks(df_res, props = props, bandwidth = bandwidth)
+	df_peak.drop(columns = ['path'], errors = 'ignore').to_csv(pd_path + "response_peaks.csv", index = False)
+	df_pd = average_response_peaks(df_peak)
+	for name, (x_col, const_cols) in anneal_diagrams.items():
+		path = pd_path + name + "/"
+		if not os.path.exists(path):
+			os.mkdir(path)
+		df_pd[const_cols + [x_col, 'prop', 'temp', 'temp_err', 'n']].sort_values(const_cols + ['prop', x_col]).to_csv(path + name + "_response.csv", index = False)
+	return df_pd
 
 # collect ground state for certain simulation conditions
 # returns data frame containing simulation properties at conditions
-def ground_state_analysis(simparm_df, max_temp = None, xa = None):
-	print(simparm_df)
-	exit()
+#
+# sim_df :: data frame containing every anneal iteration of every simulation
+#			(e.g. loaded from the campaign store)
+# xa :: if not None, only the simulations with this chirality fraction are returned
+def ground_state_analysis(sim_df, max_temp = None, xa = None):
+	if max_temp is None:
+		max_temp = max_anneal_temp
 	# use simulation parameters to grab ground state
+	df_gs = average_ground_states(get_ground_states(sim_df, max_temp))
 	if xa is not None:
-		pass
 		# remove simulation parameters from data frame
 		# that do not correspond to constant xa
+		df_gs = df_gs[np.isclose(df_gs['XA'], xa)]
+	return df_gs.reset_index(drop = True)
+
+# returns the anneal iteration of a simulation whose ground state distribution
+# is plotted, or an error message if the simulation does not have one
+#
+# df :: data frame containing the anneal iterations (id, temp) of the simulation
+# anneal :: anneal iterations of the simulation (see crawl.py), used to find the
+#			most recent anneal iteration that has written a distribution file
+def get_distribution_anneal_id (p, df, bins = None, anneal = None):
+	if bins is not None:
+		# only consider anneal iterations that have a square trajectory
+		movie = p.jobid + p.simid + "_squmov"
+		ids = [i for i in df['id'] if any(anneal_file_exists(p.path + "/anneal/{:03d}/".format(int(i)) + movie + x) for x in [bin_suffix, ".xyz"])]
+		if len(ids) == 0:
+			return None, "Unable to find TRAJECTORY ({:s}).".format(p.path + "/anneal/")
+		return "{:03d}".format(int(max(ids))), None
+	elif anneal is not None:
+		# only consider anneal iterations that have a distribution file
+		dist_name = p.jobid + p.simid + "_aligndist.csv"
+		ids = [i for i in df['id'] if dist_name in anneal.get(int(i), {})]
+		if len(ids) == 0:
+			return None, "Unable to find DISTRIBUTION FILE ({:s}).".format(p.path + "/anneal/")
+		return "{:03d}".format(int(max(ids))), None
+	return "{:03d}".format(int(df['id'].max())), None
 
-def ground_state_magnetic_distribution (simparm, XA, H, ETA, RP = 0, show = True, save_dir = None, expectation = False):
+# loads (or recomputes) and plots the ground state distribution of one simulation.
+# returns an error message, or None if the distribution was plotted
+def distribution_worker (parm_dict, df, save_dir = "", expectation = False, bins = None, chai = None, n_frames = None, anneal = None):
+	p = SimpleNamespace(**parm_dict)
+	ann_id, err = get_distribution_anneal_id(p, df, bins, anneal)
+	if err is not None:
+		return err
+	# create the distirbution file
+	dist_file = p.path + "/anneal/" + ann_id + "/" + p.jobid + p.simid + "_aligndist.csv"
+	# determine the relevant quantities from the file name, labels, etc.
+	temp = df.loc[df['id'] == int(ann_id), 'temp'].iloc[0]
+	X = p.H / temp
+	if bins is not None:
+		# recompute the distribution from the trajectory of the anneal iteration
+		try:
+			traj = load_trajectory(p, ann_id, kind = 'squ')
+		except FileNotFoundError:
+			return "Unable to open TRAJECTORY ({:s}).".format(p.path + "/anneal/" + ann_id + "/")
+		frames = None if n_frames is None else slice(-n_frames, None)
+		df_dist = alignment_distribution(traj, frames = frames, bins = bins, chai = chai)
+	else:
+		# load the distribution from either the packed or the unpacked anneal layout
+		try:
+			with open_anneal_file(dist_file) as f:
+				df_dist = pd.read_csv(f)
+		except FileNotFoundError:
+			return "Unable to open DISTRIBUTION FILE ({:s}).".format(dist_file)
+	# create the distribution plot, save
+	gen_dist_plot (df = df_dist,
+		x_col = 'theta',
+		y_col = 'align',
+		# circular_bool = True,
+		# figure settings
+		save = save_dir + p.simid + '_GSaligndist' + ('' if bins is None else '_traj' + ('' if chai is None else ['', 'A', 'B'][chai])) + '.png',
+		title = "Ground State Angular Distribution",
+		subtitle = '$x_{{a}}$ = {:.2f}, $H^{{*}}$ = {:.2f}, $\phi$ = {:.2f}, $T^{{*}}$ = {:.2f}'.format(p.XA, p.H, p.ETA, temp),
+		Y_label = 'Normalized Probability',
+		X_label = '$\\theta$',
+		min_y = 0.,
+		max_y = 1.0,
+		min_x = -np.pi,
+		max_x = np.pi,
+		bar_color = '#AFE1AF',
+		bar_label = 'Simulation Distribution',
+		# axis ticks and labels
+		x_major_ticks = [float("{:.2f}".format(x)) for x in np.linspace(-np.pi, np.pi, 5, endpoint = True)],
+		x_minor_ticks = [float("{:.2f}".format(x)) for x in np.linspace(-np.pi * 3 / 4, np.pi * 3 / 4, 4, endpoint = True)],
+		x_major_ticks_labels = ['-$\pi$', '-$\pi$ / 2', '0', '$\pi$ / 2', '$\pi$'],
+		y_major_ticks = [float("{:.2f}".format(x)) for x in np.linspace(0., 1., 6, endpoint = True)],
+		y_minor_ticks = [float("{:.2f}".format(x)) for x in np.linspace(0.1, 0.9, 5, endpoint = True)],
+		# add von mises expectation plots
+		plot_expectation = expectation,
+		X = X,
+		expectation_label = '$f (\\theta, X)$')
+	return None
+
+# plots the ground state magnetic distribution of many state points at once.
+# the anneal iterations of every simulation are read once (from the campaign
+# store, or from the summary file of each simulation), and the distributions
+# are plotted across a pool of processes
+#
+# simparm :: list (or registry, see registry.py) of simulation parameters
+# points :: list of state points (XA, H, ETA) or (XA, H, ETA, RP), RP is 0 if omitted
+# store_dir :: directory of the campaign store. if None, the anneal
+#			   iterations are loaded from the simulation summary file
+# index :: index of the campaign tree (see crawl.py), used to find the most
+#		   recent anneal iteration that has written a distribution file
+# bins :: if not None, the distribution is recomputed from the square trajectory
+#		  of the anneal iteration with this number of bins (or these bin edges)
+#		  rather than loaded from the distribution file (see align.py)
+# chai :: if 1 or 2, the recomputed distribution only counts the squares with that chirality
+# n_frames :: number of frames at the end of the trajectory used to recompute the distribution
+# workers :: number of processes. if None (or less than two), the distributions are plotted serially
+# returns the number of distributions that were plotted
+def ground_state_magnetic_distributions (simparm, points, save_dir = None, expectation = False, store_dir = None, index = None, bins = None, chai = None, n_frames = None, workers = None):
 
 	if save_dir is None:
 		save_dir = ""
+	if not isinstance(simparm, simparm_registry):
+		simparm = simparm_registry(simparm)
+
+	# get the simulation parameters that match each state point
+	parms = []
+	for pt in points:
+		p = simparm.get(*pt)
+		if p is None:
+			print("Unable to find SIMULATION ({:s}).".format(str(tuple(pt))))
+			continue
+		if p not in parms:
+			parms.append(p)
+	if len(parms) == 0:
+		return 0
 
-	# get the simulation parameters that match the constraints passed to the method
-	for p in simparm:
-		if p.XA == XA and p.H == H and p.ETA == ETA and p.RP == RP:
-			# for the simulation that meets the constrains
-			# load the analysis file
+	# load the anneal iterations of every simulation at once
+	dfs = {}
+	if store_dir is not None:
+		df = load_campaign_store(store_dir, columns = ['XA', 'H', 'ETA', 'RP', 'id', 'temp'],
+			XA = sorted(set(p.XA for p in parms)), H = sorted(set(p.H for p in parms)),
+			ETA = sorted(set(p.ETA for p in parms)), RP = sorted(set(p.RP for p in parms)))
+		groups = {get_index_key(*key): g for key, g in df.groupby(['XA', 'H', 'ETA', 'RP'])}
+		for p in parms:
+			key = get_index_key(p.XA, p.H, p.ETA, p.RP)
+			if key in groups:
+				dfs[key] = groups[key][['id', 'temp']]
+	else:
+		for p in parms:
 			anal_file = p.path + "/anal/" + p.jobid + p.simid + "_sum.csv"
-			df = pd.read_csv(anal_file)
-			# get the integer corresponding to the lowest temperature
-			ann_id = "{:03d}".format(df['id'].max())
-			# create the distirbution file
-			dist_file = p.path + "/anneal/" + ann_id + "/" + p.jobid + p.simid + "_aligndist.csv"
-			# determine the relevant quantities from the file name, labels, etc.
-			temp = df.iloc[int(ann_id)]['temp']
-			X = H / temp
-			# create the distribution plot, save
-			gen_dist_plot (file = dist_file,
-				x_col = 'theta',
-				y_col = 'align',
-				# circular_bool = True,
-				# figure settings
-				save = save_dir + p.simid + '_GSaligndist.png',
-				title = "Ground State Angular Distribution",
-				subtitle = '$x_{{a}}$ = {:.2f}, $H^{{*}}$ = {:.2f}, $\phi$ = {:.2f}, $T^{{*}}$ = {:.2f}'.format(XA, H, ETA, temp),
-				Y_label = 'Normalized Probability',
-				X_label = '$\\theta$',
-				min_y = 0.,
-				max_y = 1.0,
-				min_x = -np.pi,
-				max_x = np.pi,
-				bar_color = '#AFE1AF',
-				bar_label = 'Simulation Distribution',
-				# axis ticks and labels
-				x_major_ticks = [float("{:.2f}".format(x)) for x in np.linspace(-np.pi, np.pi, 5, endpoint = True)],
-				x_minor_ticks = [float("{:.2f}".format(x)) for x in np.linspace(-np.pi * 3 / 4, np.pi * 3 / 4, 4, endpoint = True)],
-				x_major_ticks_labels = ['-$\pi$', '-$\pi$ / 2', '0', '$\pi$ / 2', '$\pi$'],
-				y_major_ticks = [float("{:.2f}".format(x)) for x in np.linspace(0., 1., 6, endpoint = True)],
-				y_minor_ticks = [float("{:.2f}".format(x)) for x in np.linspace(0.1, 0.9, 5, endpoint = True)],
-				# add von mises expectation plots
-				plot_expectation = expectation,
-				X = X,
-				expectation_label = '$f (\\theta, X)$')
+			try:
+				dfs[get_index_key(p.XA, p.H, p.ETA, p.RP)] = pd.read_csv(anal_file)
+			except FileNotFoundError:
+				print("Unable to open SUMMARY FILE ({:s}).".format(anal_file))
+
+	# plot the distribution of each simulation
+	jobs = []
+	for p in parms:
+		key = get_index_key(p.XA, p.H, p.ETA, p.RP)
+		if key not in dfs or len(dfs[key].index) == 0:
+			continue
+		anneal = get_anneal_index(index, p.path, p.XA, p.H, p.ETA, p.RP) if index is not None and bins is None else None
+		jobs.append((dict(p.info()), dfs[key], save_dir, expectation, bins, chai, n_frames, anneal))
+	if workers is None or workers < 2:
+		errs = [distribution_worker(*j) for j in jobs]
+	else:
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = [pool.submit(distribution_worker, *j) for j in jobs]
+			errs = [f.result() for f in futures]
+	for err in errs:
+		if err is not None:
+			print(err)
+	return sum(1 for err in errs if err is None)
+
+# plots the ground state magnetic distribution of one state point
+# (see ground_state_magnetic_distributions)
+def ground_state_magnetic_distribution (simparm, XA, H, ETA, RP = 0, show = True, save_dir = None, expectation = False, store_dir = None, index = None, bins = None, chai = None, n_frames = None):
+	return ground_state_magnetic_distributions(simparm, [(XA, H, ETA, RP)], save_dir = save_dir, expectation = expectation, store_dir = store_dir, index = index, bins = bins, chai = chai, n_frames = n_frames)
 
 
 ## ARGUMENTS
@@ -0,0 +1,175 @@
+# filename :: chain.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: reconstructs the dipole bond network of each frame of a conH
+#			 trajectory, classifies the assembly of each square (see
+#			 determine_assembly in polsqu2x2_mod.f90) and the chains it forms
+
+
+import sys, os
+import pandas as pd
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from simbin.python.conH.traj import open_trajectory, get_orientation
+from simbin.python.conH.cluster import find_pairs, get_ground_state_batches, run_cluster_batches, cluster_batch, ground_state_frames
+
+## PARAMETERS
+# assembly order parameters of each square, named as in the anneal file
+assembly_props = ['poly', 'polys', 'polyo', 'ht', 'anti', 'ds']
+# strand type of each chain, from the least to the most ordered. a chain takes
+# the type of the most ordered assembly of any of its squares
+chain_types = ['mono', 'poly', 'ht', 'anti', 'ds']
+
+
+## FUNCTIONS
+# classifies the assembly of each square from the pairs of oppositely charged
+# circles (see find_pairs). the partners of the first and second charged circle
+# of each square are compared, as in determine_assembly:
+#	poly :: either charged circle has a partner (polys, polyo :: a partner of
+#			the same or the opposite chirality)
+#	anti :: both charged circles share a partner square (anti-parallel)
+#	ht :: both charged circles have partners, and the first circle has a partner
+#		  square that the second circle does not have (head-to-tail)
+#	ds :: both charged circles have at least two partners (double-stranded)
+# returns a dictionary of boolean arrays, one value for each square
+def classify_assembly (pairs, chai):
+	n = len(chai)
+	# each pair is a partner of both of its circles
+	sq = np.concatenate((pairs[:, 0], pairs[:, 2]))
+	m = np.concatenate((pairs[:, 1], pairs[:, 3]))
+	partner = np.concatenate((pairs[:, 2], pairs[:, 0]))
+	i = (m == 0)
+	j = (m == 1)
+	n_i = np.bincount(sq[i], minlength = n)
+	n_j = np.bincount(sq[j], minlength = n)
+	same = (chai[partner] == chai[sq])
+	# compare the partner squares of each charged circle
+	key_i = sq[i] * n + partner[i]
+	key_j = sq[j] * n + partner[j]
+	shared = np.isin(key_i, key_j)
+	anti = np.bincount(sq[i][shared], minlength = n) > 0
+	ht = (np.bincount(sq[i][~shared], minlength = n) > 0) & (n_j >= 1)
+	return {'poly': (n_i + n_j) >= 1,
+		'polys': np.bincount(sq[same], minlength = n) > 0,
+		'polyo': np.bincount(sq[~same], minlength = n) > 0,
+		'ht': ht,
+		'anti': anti,
+		'ds': (n_i >= 2) & (n_j >= 2)}
+
+# groups the squares of a frame into chains of bonded squares. returns the
+# chain of each square, the length of each chain and the strand type of each
+# chain (position in chain_types)
+def find_chains (pairs, assembly):
+	n = len(assembly['poly'])
+	graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 2])), shape = (n, n))
+	n_chains, labels = connected_components(graph, directed = False)
+	length = np.bincount(labels, minlength = n_chains)
+	# the strand type of each square, the chain takes the highest
+	rank = np.zeros(n, dtype = int)
+	for t in range(2, len(chain_types)):
+		rank[assembly[chain_types[t]]] = t
+	rank[(rank == 0) & assembly['poly']] = 1
+	strand = np.zeros(n_chains, dtype = int)
+	np.maximum.at(strand, labels, rank)
+	return labels, length, strand
+
+# analyze the assembly of one frame of the square trajectory. returns the
+# fraction of squares with each assembly, the number and average length of
+# the chains, and the number of chains of each strand type and length
+def chain_frame (pos, phi, chai, region):
+	n = len(pos)
+	pairs = find_pairs(pos, phi, chai, region)
+	assembly = classify_assembly(pairs, chai)
+	labels, length, strand = find_chains(pairs, assembly)
+	res = {p: assembly[p].mean() if n > 0 else 0. for p in assembly_props}
+	res['nchain'] = len(length)
+	res['chain_length'] = length.mean() if len(length) > 0 else 0.
+	res['max_length'] = int(length.max()) if len(length) > 0 else 0
+	for t in range(len(chain_types)):
+		res['n_' + chain_types[t]] = int((strand == t).sum())
+	hist = np.zeros((len(chain_types), n + 1), dtype = int)
+	np.add.at(hist, (strand, length), 1)
+	return res, hist
+
+# analyze the assembly of a batch of frames of a square trajectory. returns the
+# results of each frame and the number of chains of each strand type and length
+def chain_frames (file, region, frames):
+	traj = open_trajectory(file, kind = 'squ')
+	rows = []
+	hist = None
+	for i in frames:
+		fr = traj[int(i)]
+		res, h = chain_frame(fr['pos'], get_orientation(fr['quat']), fr['chai'].astype(int), region)
+		hist = h if hist is None else hist + h
+		rows.append({'frame': int(i)} | res)
+	return rows, hist
+
+# returns the chain length distribution of each strand type from the number of
+# chains of each strand type and length. the number distribution is the
+# fraction of chains, the weight distribution is the fraction of squares
+def get_chain_distribution (hist):
+	length = np.arange(hist.shape[1])
+	total = hist.sum()
+	weight = (hist * length[None, :]).sum()
+	t, l = np.nonzero(hist)
+	return pd.DataFrame({'type': [chain_types[k] for k in t],
+		'length': l,
+		'count': hist[t, l],
+		'number': hist[t, l] / total if total > 0 else 0.,
+		'weight': hist[t, l] * l / weight if weight > 0 else 0.})
+
+# merge the results of several batches of frames
+def merge_chain_results (results):
+	rows = []
+	hist = None
+	for r, h in results:
+		rows += r
+		if h is not None:
+			hist = h if hist is None else hist + h
+	if hist is None:
+		hist = np.zeros((len(chain_types), 1), dtype = int)
+	return pd.DataFrame(rows), get_chain_distribution(hist)
+
+# analyze the assembly of the frames of a square trajectory, in batches of
+# frames across a pool of processes. returns the results of each frame and
+# the chain length distribution of each strand type
+#
+# frames :: slice, list or array of frames to analyze. if None, all frames are analyzed
+# workers :: number of processes. if None (or less than two), frames are analyzed serially
+def analyze_chains (file, region, frames = None, workers = None, batch = cluster_batch):
+	ids = np.arange(len(open_trajectory(file, kind = 'squ')))
+	if frames is not None:
+		ids = ids[frames]
+	jobs = [(file, region, ids[k:k + batch]) for k in range(0, len(ids), batch)]
+	return merge_chain_results(run_cluster_batches(jobs, workers, func = chain_frames))
+
+# analyze the assembly of the ground state trajectory of each simulation. the
+# batches of every simulation are spread across one pool of processes. the
+# results of each frame (<jobid><simid>_chains.csv) and the chain length
+# distribution (<jobid><simid>_chaindist.csv) are written to the analysis
+# directory of each simulation. returns the average of each simulation
+#
+# n_frames :: number of frames at the end of each trajectory that are analyzed. if None, the whole trajectory is analyzed
+# workers :: number of processes that batches of frames are spread across
+def chain_ground_states (simparms, n_squares, n_frames = ground_state_frames, workers = None, batch = cluster_batch, verbose = False):
+
+	# analyze every batch of every simulation at once
+	jobs, owner, found = get_ground_state_batches(simparms, n_squares, n_frames, batch)
+	results = run_cluster_batches(jobs, workers, func = chain_frames)
+
+	# write the results of each simulation
+	rows = []
+	for k in found:
+		p = simparms[k]
+		df, df_dist = merge_chain_results([results[j] for j in range(len(jobs)) if owner[j] == k])
+		anal_dir = p.path + "/anal/"
+		if not os.path.exists(anal_dir):
+			os.mkdir(anal_dir)
+		df.to_csv(anal_dir + p.jobid + p.simid + "_chains.csv", index = False)
+		df_dist.to_csv(anal_dir + p.jobid + p.simid + "_chaindist.csv", index = False)
+		rows.append(dict(p.info()) | {'id': found[k], 'frames': len(df.index)}
+			| {c: df[c].mean() for c in assembly_props + ['nchain', 'chain_length']})
+		if verbose:
+			print("Analyzed chains of {:d} frames ({:s}).".format(len(df.index), p.path))
+	return pd.DataFrame(rows)
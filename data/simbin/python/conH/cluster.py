@@ -0,0 +1,294 @@
+# filename :: cluster.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: cluster and percolation analysis of conH trajectory frames
+#			 (see determine_percolation, clusteranal in polsqu2x2_mod.f90)
+
+
+import sys, os
+import pandas as pd
+import numpy as np
+from scipy.spatial import cKDTree
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simbin.python.conH.traj import open_trajectory, load_trajectory, get_orientation
+from simbin.python.conH.crawl import scan_anneal_dir
+from simbin.python.conH.geom import circle_radius, mer, get_region
+
+## PARAMETERS
+# distance within which oppositely polarized circles are bonded (sigma3)
+cluster_dist = 1.4
+# tolerance used to determine if a cluster spans the simulation box
+perc_tol = 0.001
+# number of frames that are analyzed by each worker at once
+cluster_batch = 16
+# number of frames at the end of the ground state trajectory that are analyzed
+ground_state_frames = 100
+
+
+## FUNCTIONS
+# returns the position of each circle of each square, as an (n, 4, 2) array.
+# circles are placed counter-clockwise around the center of each square,
+# starting from the first circle at pi / 4 from the square orientation
+def get_circle_positions (pos, phi, region):
+	ang = phi[:, None] + np.pi / 4. + np.arange(mer)[None, :] * np.pi / 2.
+	circ = pos[:, None, :] + circle_radius * np.stack((np.cos(ang), np.sin(ang)), axis = 2)
+	circ = np.mod(circ, region)
+	# np.mod can return the region length for values that are slightly negative
+	circ[circ >= region] = 0.
+	return circ
+
+# returns the polarity of each circle of each square, as an (n, 4) array
+# (see set_polarity in polsqu2x2_mod.f90)
+def get_circle_polarity (chai):
+	pol = np.zeros((len(chai), mer), dtype = int)
+	pol[:, 0] = np.where(chai == 1, 1, np.where(chai == 2, -1, 0))
+	pol[:, 1] = -pol[:, 0]
+	return pol
+
+# returns the pairs of oppositely polarized circles of different squares that
+# are within the cluster distance, as the square and circle of each side of
+# each pair (see set_orderlist in polsqu2x2_mod.f90)
+def find_pairs (pos, phi, chai, region, cutoff = cluster_dist):
+	circ = get_circle_positions(pos, phi, region)
+	pol = get_circle_polarity(chai)
+	# only the charged circles can bond
+	sq, m = np.nonzero(pol != 0)
+	if len(sq) < 2:
+		return np.empty((0, 4), dtype = int)
+	tree = cKDTree(circ[sq, m], boxsize = region)
+	pairs = tree.query_pairs(cutoff, output_type = 'ndarray')
+	a = pairs[:, 0]
+	b = pairs[:, 1]
+	keep = (pol[sq[a], m[a]] * pol[sq[b], m[b]] == -1) & (sq[a] != sq[b])
+	return np.column_stack((sq[a[keep]], m[a[keep]], sq[b[keep]], m[b[keep]]))
+
+# returns the pairs of squares that are bonded, and the minimum image vector
+# between the centers of each pair. squares are bonded if oppositely polarized
+# circles of each square are within the cluster distance
+def find_bonds (pos, phi, chai, region, cutoff = cluster_dist):
+	pairs = find_pairs(pos, phi, chai, region, cutoff)
+	bonds = pairs[:, [0, 2]]
+	dr = pos[bonds[:, 1]] - pos[bonds[:, 0]]
+	dr -= region * np.round(dr / region)
+	return bonds, dr
+
+# groups squares into clusters using a union-find that tracks the position of
+# each square relative to the root of its cluster. if a bond connects two
+# squares of the same cluster whose relative positions differ by the length of
+# the box, the cluster wraps around the periodic boundaries and is percolated.
+# returns the cluster of each square and whether each cluster percolates in x, y
+def union_clusters (n, bonds, dr, region, tol = perc_tol):
+	parent = list(range(n))
+	size = [1] * n
+	offx = [0.] * n # position relative to the parent of each square
+	offy = [0.] * n
+	perc = {}
+
+	def find (x):
+		path = []
+		while parent[x] != x:
+			path.append(x)
+			x = parent[x]
+		# compress the path, accumulating the offset of each square to the root
+		for y in reversed(path):
+			p = parent[y]
+			if p != x:
+				offx[y] += offx[p]
+				offy[y] += offy[p]
+				parent[y] = x
+		return x
+
+	for k in range(len(bonds)):
+		a = int(bonds[k, 0])
+		b = int(bonds[k, 1])
+		ra = find(a)
+		rb = find(b)
+		ax = offx[a] if a != ra else 0.
+		ay = offy[a] if a != ra else 0.
+		bx = offx[b] if b != rb else 0.
+		by = offy[b] if b != rb else 0.
+		# position of b relative to the root of a
+		px = ax + dr[k, 0]
+		py = ay + dr[k, 1]
+		if ra == rb:
+			# compare the spanning vector with the one that has been stored
+			px -= bx
+			py -= by
+			if abs(px) >= region - tol or abs(py) >= region - tol:
+				p = perc.get(ra, [False, False])
+				perc[ra] = [p[0] or abs(px) >= region - tol, p[1] or abs(py) >= region - tol]
+			continue
+		# position of the root of b relative to the root of a. the
+		# smaller cluster is attached to the larger cluster
+		dx = px - bx
+		dy = py - by
+		if size[ra] < size[rb]:
+			ra, rb = rb, ra
+			dx, dy = -dx, -dy
+		parent[rb] = ra
+		offx[rb] = dx
+		offy[rb] = dy
+		size[ra] += size[rb]
+		p = perc.pop(rb, None)
+		if p is not None:
+			q = perc.get(ra, [False, False])
+			perc[ra] = [p[0] or q[0], p[1] or q[1]]
+
+	labels = np.array([find(x) for x in range(n)], dtype = int)
+	perc = {r: perc[find(r)] for r in perc}
+	return labels, perc
+
+# analyze the clusters of one frame of the square trajectory. returns a
+# dictionary containing the number of clusters, the size (number of squares)
+# of each cluster, the fraction of squares in the largest cluster, and
+# whether any cluster spans the simulation box
+def cluster_frame (pos, phi, chai, region):
+	n = len(pos)
+	bonds, dr = find_bonds(pos, phi, chai, region)
+	labels, perc = union_clusters(n, bonds, dr, region)
+	roots, sizes = np.unique(labels, return_counts = True)
+	perc_x = any(p[0] for p in perc.values())
+	perc_y = any(p[1] for p in perc.values())
+	# size of the largest cluster that percolates
+	perc_size = max([sizes[np.searchsorted(roots, r)] for r in perc if perc[r][0] or perc[r][1]], default = 0)
+	return {'nclust': len(roots),
+		'largest': int(sizes.max()) if n > 0 else 0,
+		'largest_frac': sizes.max() / n if n > 0 else 0.,
+		'nbonds': len(bonds),
+		'perc_x': int(perc_x),
+		'perc_y': int(perc_y),
+		'percy': int(perc_x or perc_y),
+		'perc_size': int(perc_size),
+		'sizes': np.sort(sizes)[::-1]}
+
+# analyze the clusters of a batch of frames of a square trajectory. returns the
+# results of each frame and the number of clusters of each size in the batch
+def cluster_frames (file, region, frames):
+	traj = open_trajectory(file, kind = 'squ')
+	rows = []
+	hist = None
+	for i in frames:
+		fr = traj[int(i)]
+		res = cluster_frame(fr['pos'], get_orientation(fr['quat']), fr['chai'].astype(int), region)
+		counts = np.bincount(res.pop('sizes'), minlength = len(fr['pos']) + 1)
+		hist = counts if hist is None else hist + counts
+		rows.append({'frame': int(i)} | res)
+	return rows, hist
+
+# returns the cluster size distribution from the number of clusters of each
+# size. the number distribution is the fraction of clusters of each size, the
+# weight distribution is the fraction of squares in clusters of each size
+def get_size_distribution (hist):
+	size = np.arange(len(hist))
+	mask = hist > 0
+	return pd.DataFrame({'size': size[mask],
+		'count': hist[mask],
+		'number': hist[mask] / hist.sum(),
+		'weight': (size * hist)[mask] / (size * hist).sum()})
+
+# analyze the clusters of the frames of a square trajectory, in batches of
+# frames across a pool of processes. returns the results of each frame and
+# the cluster size distribution of all frames
+#
+# frames :: slice, list or array of frames to analyze. if None, all frames are analyzed
+# workers :: number of processes. if None (or less than two), frames are analyzed serially
+def analyze_clusters (file, region, frames = None, workers = None, batch = cluster_batch):
+	n_frames = len(open_trajectory(file, kind = 'squ'))
+	ids = np.arange(n_frames)
+	if frames is not None:
+		ids = ids[frames]
+	batches = [ids[k:k + batch] for k in range(0, len(ids), batch)]
+	results = run_cluster_batches([(file, region, b) for b in batches], workers)
+	return merge_cluster_results(results)
+
+# analyze a list of (file, region, frames) batches, either serially or over a
+# pool of processes. returns the results of each batch in the same order
+#
+# func :: function that analyzes one batch (e.g. cluster_frames)
+def run_cluster_batches (jobs, workers = None, func = cluster_frames):
+	results = [None for _ in range(len(jobs))]
+	if workers is None or workers < 2:
+		for k in range(len(jobs)):
+			results[k] = func(*jobs[k])
+	else:
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = {pool.submit(func, *jobs[k]): k for k in range(len(jobs))}
+			for f in as_completed(futures):
+				results[futures[f]] = f.result()
+	return results
+
+# merge the results of several batches of frames
+def merge_cluster_results (results):
+	rows = []
+	hist = None
+	for r, h in results:
+		rows += r
+		if h is not None:
+			hist = h if hist is None else hist + h
+	df = pd.DataFrame(rows)
+	if hist is None:
+		return df, get_size_distribution(np.zeros(1, dtype = int))
+	return df, get_size_distribution(hist)
+
+# find the ground state trajectory (the most recent anneal iteration that has
+# a square trajectory) of each simulation, and split the last frames of each
+# trajectory into batches. returns the list of (file, region, frames) batches,
+# the simulation that owns each batch and the anneal iteration of each simulation
+#
+# n_frames :: number of frames at the end of each trajectory. if None, all frames are used
+def get_ground_state_batches (simparms, n_squares, n_frames = ground_state_frames, batch = cluster_batch):
+	jobs = []
+	owner = []
+	found = {}
+	for k in range(len(simparms)):
+		p = simparms[k]
+		for i in sorted(scan_anneal_dir(p.path), reverse = True):
+			try:
+				traj = load_trajectory(p, i, kind = 'squ')
+			except FileNotFoundError:
+				continue
+			if len(traj) == 0:
+				continue
+			region = get_region(n_squares, p.ETA)
+			ids = np.arange(len(traj))
+			if n_frames is not None:
+				ids = ids[-n_frames:]
+			for b in range(0, len(ids), batch):
+				jobs.append((traj.file, region, ids[b:b + batch]))
+				owner.append(k)
+			found[k] = i
+			break
+		if k not in found:
+			print("Unable to find TRAJECTORY ({:s}).".format(p.path + "/anneal/"))
+	return jobs, owner, found
+
+# analyze the clusters of the ground state (the last frames of the most recent
+# anneal iteration that has a square trajectory) of each simulation. the
+# results of each frame (<jobid><simid>_clusters.csv) and the cluster size
+# distribution (<jobid><simid>_clustdist.csv) are written to the analysis
+# directory of each simulation. returns the average of each simulation
+#
+# n_frames :: number of frames at the end of each trajectory that are analyzed
+# workers :: number of processes that batches of frames are spread across
+def cluster_ground_states (simparms, n_squares, n_frames = ground_state_frames, workers = None, batch = cluster_batch, verbose = False):
+
+	# analyze every batch of every simulation at once
+	jobs, owner, found = get_ground_state_batches(simparms, n_squares, n_frames, batch)
+	results = run_cluster_batches(jobs, workers)
+
+	# write the results of each simulation
+	rows = []
+	for k in found:
+		p = simparms[k]
+		df, df_dist = merge_cluster_results([results[j] for j in range(len(jobs)) if owner[j] == k])
+		anal_dir = p.path + "/anal/"
+		if not os.path.exists(anal_dir):
+			os.mkdir(anal_dir)
+		df.to_csv(anal_dir + p.jobid + p.simid + "_clusters.csv", index = False)
+		df_dist.to_csv(anal_dir + p.jobid + p.simid + "_clustdist.csv", index = False)
+		rows.append(dict(p.info()) | {'id': found[k], 'frames': len(df.index),
+			'nclust': df['nclust'].mean(), 'largest_frac': df['largest_frac'].mean(),
+			'percy': df['percy'].mean()})
+		if verbose:
+			print("Analyzed clusters of {:d} frames ({:s}).".format(len(df.index), p.path))
+	return pd.DataFrame(rows)
@@ -0,0 +1,155 @@
+# filename :: corr.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: accumulates the pair correlation function g(r) and the orientational
+#			 correlation <cos(theta_i - theta_j)>(r) of the squares in the frames
+#			 of a conH trajectory, resolved by the chirality of each pair
+
+
+import sys, os
+from functools import partial
+import pandas as pd
+import numpy as np
+from scipy.spatial import cKDTree
+from simbin.python.conH.traj import open_trajectory, get_orientation
+from simbin.python.conH.align import get_alignment
+from simbin.python.conH.cluster import get_ground_state_batches, run_cluster_batches, cluster_batch, ground_state_frames
+
+## PARAMETERS
+# width of each bin of the correlation functions
+corr_dr = 0.05
+# maximum distance of the correlation functions (limited to half of the box)
+corr_max = 10.
+# pairs of chiralities that the correlation functions are resolved by
+corr_pairs = ['AA', 'AB', 'BB']
+
+
+## CLASS
+# accumulates the number of pairs and the sum of the orientational correlation
+# of each pair in each distance bin, for each pair of chiralities. the memory
+# used does not depend on the number of frames
+class correlation_accumulator(object):
+	""" initialization for correlation_accumulator object. """
+	def __init__(self, region, r_max = corr_max, dr = corr_dr):
+		self.region = region # length of the simulation box
+		self.r_max = min(r_max, region / 2.)
+		self.edges = np.arange(0., self.r_max + dr / 2., dr)
+		nbin = len(self.edges) - 1
+		self.frames = 0 # number of frames accumulated
+		self.n = np.zeros(2) # total number of A and B squares over all frames
+		self.npair = np.zeros(3) # total number of distinct A-A, A-B and B-B pairs over all frames
+		self.count = np.zeros((3, nbin)) # number of pairs in each bin
+		self.cos = np.zeros((3, nbin)) # sum of cos(theta_i - theta_j) in each bin
+
+	""" method that adds one frame to the accumulator. """
+	def add(self, pos, theta, chai):
+		n_a = (chai == 1).sum()
+		n_b = (chai == 2).sum()
+		self.frames += 1
+		self.n += [n_a, n_b]
+		self.npair += [n_a * (n_a - 1) / 2., n_a * n_b, n_b * (n_b - 1) / 2.]
+		if len(pos) < 2:
+			return
+		# find every pair within the maximum distance, with periodic boundaries
+		tree = cKDTree(np.mod(pos, self.region), boxsize = self.region)
+		pairs = tree.query_pairs(self.r_max, output_type = 'ndarray')
+		dr = pos[pairs[:, 1]] - pos[pairs[:, 0]]
+		dr -= self.region * np.round(dr / self.region)
+		r = np.sqrt((dr ** 2).sum(axis = 1))
+		b = np.searchsorted(self.edges, r, side = 'right') - 1
+		keep = (b >= 0) & (b < self.count.shape[1])
+		# pair type 0 (A-A), 1 (A-B) or 2 (B-B)
+		t = (chai[pairs[:, 0]] == 2).astype(int) + (chai[pairs[:, 1]] == 2).astype(int)
+		c = np.cos(theta[pairs[:, 0]] - theta[pairs[:, 1]])
+		np.add.at(self.count, (t[keep], b[keep]), 1.)
+		np.add.at(self.cos, (t[keep], b[keep]), c[keep])
+
+	""" method that adds the contents of another accumulator. """
+	def merge(self, other):
+		if other is None:
+			return self
+		self.frames += other.frames
+		self.n += other.n
+		self.npair += other.npair
+		self.count += other.count
+		self.cos += other.cos
+		return self
+
+	""" method that returns the correlation functions as a data frame. """
+	def to_dataframe(self):
+		r = (self.edges[:-1] + self.edges[1:]) / 2.
+		# area of each shell, and the pair density of an ideal gas
+		shell = np.pi * (self.edges[1:] ** 2 - self.edges[:-1] ** 2)
+		area = self.region ** 2
+		df = pd.DataFrame({'r': r})
+		def ratio(num, den):
+			return np.divide(num, den, out = np.full(len(r), np.nan), where = den > 0)
+		df['g'] = ratio(self.count.sum(axis = 0), self.npair.sum() * shell / area)
+		df['corr'] = ratio(self.cos.sum(axis = 0), self.count.sum(axis = 0))
+		for k in range(len(corr_pairs)):
+			df['g_' + corr_pairs[k]] = ratio(self.count[k], self.npair[k] * shell / area)
+			df['corr_' + corr_pairs[k]] = ratio(self.cos[k], self.count[k])
+		return df
+
+
+## FUNCTIONS
+# accumulates the correlation functions of a batch of frames of a square
+# trajectory. the orientation of each square is its chirality-aware dipole
+# (see get_alignment), so that head-to-tail order is positively correlated
+def correlate_frames (file, region, frames, r_max = corr_max, dr = corr_dr):
+	traj = open_trajectory(file, kind = 'squ')
+	acc = correlation_accumulator(region, r_max, dr)
+	for i in frames:
+		fr = traj[int(i)]
+		chai = fr['chai'].astype(int)
+		acc.add(fr['pos'], get_alignment(get_orientation(fr['quat']), chai), chai)
+	return acc
+
+# returns the correlation functions of the frames of a square trajectory,
+# accumulated in batches of frames across a pool of processes
+#
+# frames :: slice, list or array of frames. if None, all frames are used
+# workers :: number of processes. if None (or less than two), frames are analyzed serially
+def analyze_correlations (file, region, frames = None, r_max = corr_max, dr = corr_dr, workers = None, batch = cluster_batch):
+	ids = np.arange(len(open_trajectory(file, kind = 'squ')))
+	if frames is not None:
+		ids = ids[frames]
+	jobs = [(file, region, ids[k:k + batch]) for k in range(0, len(ids), batch)]
+	acc = correlation_accumulator(region, r_max, dr)
+	for a in run_cluster_batches(jobs, workers, func = partial(correlate_frames, r_max = r_max, dr = dr)):
+		acc.merge(a)
+	return acc.to_dataframe()
+
+# accumulates the correlation functions of the ground state trajectory of each
+# simulation. the batches of every simulation are spread across one pool of
+# processes. the correlation functions of each simulation (<jobid><simid>_gr.csv)
+# are written to its analysis directory. returns the correlation functions of
+# every simulation, with the parameters of each simulation
+#
+# n_frames :: number of frames at the end of each trajectory that are used. if None, the whole trajectory is used
+# workers :: number of processes that batches of frames are spread across
+def correlate_ground_states (simparms, n_squares, n_frames = ground_state_frames, r_max = corr_max, dr = corr_dr, workers = None, batch = cluster_batch, verbose = False):
+
+	# accumulate every batch of every simulation at once
+	jobs, owner, found = get_ground_state_batches(simparms, n_squares, n_frames, batch)
+	results = run_cluster_batches(jobs, workers, func = partial(correlate_frames, r_max = r_max, dr = dr))
+
+	# write the results of each simulation
+	dfs = []
+	for k in found:
+		p = simparms[k]
+		acc = None
+		for j in range(len(jobs)):
+			if owner[j] == k:
+				acc = results[j] if acc is None else acc.merge(results[j])
+		df = acc.to_dataframe()
+		anal_dir = p.path + "/anal/"
+		if not os.path.exists(anal_dir):
+			os.mkdir(anal_dir)
+		df.to_csv(anal_dir + p.jobid + p.simid + "_gr.csv", index = False)
+		dfs.append(df.assign(XA = p.XA, H = p.H, ETA = p.ETA, RP = p.RP, id = found[k]))
+		if verbose:
+			print("Correlated {:d} frames ({:s}).".format(acc.frames, p.path))
+	if len(dfs) == 0:
+		return pd.DataFrame()
+	return pd.concat(dfs, ignore_index = True)
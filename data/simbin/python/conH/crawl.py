@@ -0,0 +1,122 @@
+# filename :: crawl.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: walks the directory tree of a conH campaign once, and builds
+#			 an in-memory index of every simulation and anneal iteration
+
+
+import sys, os
+import numpy as np
+from simbin.python.conH.pack import scan_pack
+
+## PARAMETERS
+# prefix of each parameter sub-directory in the campaign tree, in the same
+# order as the directories are nested (see conH_simparam.sh)
+crawl_levels = [('XA', 'a'), ('H', 'h'), ('ETA', 'e'), ('RP', 'r')]
+# divisor used to convert each sub-directory name to the parameter value
+crawl_scale = {'XA': 100, 'H': 100, 'ETA': 100, 'RP': 1}
+# suffixes of the files in each anneal iteration directory that are indexed
+# (anneal, distribution, report and order parameter files)
+crawl_suffixes = ('.csv',)
+
+
+## FUNCTIONS
+# returns the key used to index a simulation by its parameters
+def get_index_key (XA, H, ETA, RP):
+	return (round(float(XA), 2), round(float(H), 2), round(float(ETA), 2), int(RP))
+
+# returns the parameter value of a sub-directory, or None if the name of the
+# sub-directory does not match the naming convention
+def parse_dir_value (name, prefix, scale):
+	s = name[len(prefix):]
+	if not name.startswith(prefix) or not s.isdigit():
+		return None
+	return float(s) / scale if scale != 1 else int(s)
+
+# returns the sub-directories of a directory, as (name, path) pairs
+def scan_subdirs (dir_path):
+	subdirs = []
+	try:
+		with os.scandir(dir_path) as it:
+			for entry in it:
+				if entry.is_dir():
+					subdirs.append((entry.name, entry.path))
+	except OSError:
+		pass
+	return subdirs
+
+# scans the anneal directory of one simulation. returns a dictionary that
+# maps each anneal iteration number to a dictionary containing the size and
+# modification time of each indexed file in the anneal iteration directory.
+# anneal iterations that have been packed are read from the archive index
+def scan_anneal_dir (sim_path):
+	anneal = {}
+	for name, path in scan_subdirs(os.path.join(sim_path, "anneal")):
+		if len(name) != 3 or not name.isdigit():
+			continue
+		files = {}
+		try:
+			with os.scandir(path) as it:
+				for entry in it:
+					if entry.name.endswith(crawl_suffixes) and entry.is_file():
+						st = entry.stat()
+						files[entry.name] = (st.st_size, st.st_mtime_ns)
+		except OSError:
+			continue
+		anneal[int(name)] = files
+	# files in the unpacked layout take precedence over packed files
+	for i, files in scan_pack(sim_path, crawl_suffixes).items():
+		anneal[i] = files | anneal.get(i, {})
+	return anneal
+
+# walks the campaign tree once (e.g. ./conH/squ2c32/a050/h00/e15/r00/anneal/000/)
+# and returns a dictionary that maps the parameters of each simulation
+# (see get_index_key) to its path and anneal iterations (see scan_anneal_dir)
+def crawl_campaign (campaign_dir, verbose = False):
+	index = {}
+	# list of (parameter values, path) at the current level of the tree
+	level = [((), campaign_dir)]
+	for parm, prefix in crawl_levels:
+		next_level = []
+		for vals, path in level:
+			for name, sub_path in scan_subdirs(path):
+				v = parse_dir_value(name, prefix, crawl_scale[parm])
+				if v is not None:
+					next_level.append((vals + (v,), sub_path))
+		level = next_level
+	for vals, path in level:
+		index[get_index_key(*vals)] = {'path': path, 'anneal': scan_anneal_dir(path)}
+
+	# inform user
+	if verbose:
+		n_anneal = sum(len(v['anneal']) for v in index.values())
+		print("Indexed {:d} simulations and {:d} anneal iterations ({:s}).".format(len(index), n_anneal, campaign_dir))
+	return index
+
+# returns the directory that contains every simulation path, which is the
+# root of the campaign tree that should be crawled
+def get_campaign_dir (paths):
+	# each simulation path is nested below the campaign directory
+	# by one directory for each simulation parameter
+	roots = []
+	for p in paths:
+		p = os.path.normpath(p)
+		for _ in range(len(crawl_levels)):
+			p = os.path.dirname(p)
+		roots.append(p)
+	return os.path.commonpath(roots)
+
+# returns the anneal iterations of a simulation from the campaign index. if
+# the simulation is not in the index (or the index is None), the anneal
+# directory of the simulation is scanned directly
+def get_anneal_index (index, path, XA, H, ETA, RP):
+	if index is not None:
+		entry = index.get(get_index_key(XA, H, ETA, RP))
+		if entry is not None and os.path.normpath(entry['path']) == os.path.normpath(path):
+			return entry['anneal']
+	return scan_anneal_dir(path)
+
+# returns the sorted values of a simulation parameter in the campaign index
+def get_index_params (index, parm):
+	k = [p for p, _ in crawl_levels].index(parm)
+	return np.sort(np.array(list(set(key[k] for key in index)), dtype = float))
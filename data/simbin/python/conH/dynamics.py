@@ -0,0 +1,147 @@
+# filename :: dynamics.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: calculates the mean squared displacement and the rotational
+#			 autocorrelation of the squares of a conH trajectory over all time
+#			 origins, using fast fourier transforms
+
+
+import sys, os
+import tempfile
+import pandas as pd
+import numpy as np
+from simbin.python.conH.traj import open_trajectory, get_orientation
+from simbin.python.conH.align import get_alignment
+from simbin.python.conH.cluster import get_ground_state_batches, run_cluster_batches
+
+## PARAMETERS
+# simulation time between the frames of the square movie (squmovfreq in polsqu2x2_mod.f90)
+movie_interval = 200.
+# number of frames that are read from a trajectory at once
+dynamics_batch = 64
+# number of squares whose correlations are transformed at once
+dynamics_chunk = 128
+# maximum size (bytes) of the unwrapped trajectory kept in memory. larger
+# trajectories are written to a temporary file and memory mapped
+dynamics_memory = 1 << 30
+# columns of the unwrapped trajectory: x, y, dipole orientation, square orientation
+dynamics_cols = 4
+
+
+## FUNCTIONS
+# returns the sum over all time origins of x(t0) * x(t0 + m) for each lag m,
+# for each column of x (time along the first axis)
+def autocorrelation_sum (x):
+	n = len(x)
+	size = 2 * n
+	fx = np.fft.rfft(x, n = size, axis = 0)
+	return np.fft.irfft(fx * np.conj(fx), n = size, axis = 0)[:n]
+
+# returns the mean squared displacement of each column of x (time along the
+# first axis) averaged over all time origins, for each lag (Kneller et al.)
+def msd_fft (x):
+	d = x ** 2
+	s2 = autocorrelation_sum(x)
+	# sum over time origins of x(t0)^2 + x(t0 + m)^2, which drops the first and
+	# last m squared values for each lag m
+	s1 = np.empty(x.shape)
+	s1[:] = 2. * d.sum(axis = 0)
+	s1[1:] -= np.cumsum(d, axis = 0)[:-1] + np.cumsum(d[::-1], axis = 0)[:-1]
+	return s1 - 2. * s2
+
+# unwraps the position and orientation of each square across the frames of a
+# trajectory, which are read in batches. positions are unwrapped through the
+# periodic boundaries with the minimum image convention, orientations are
+# unwrapped through -pi and pi. returns a (frames, n, 4) array
+def unwrap_trajectory (traj, region, frames = None, batch = dynamics_batch):
+	ids = np.arange(len(traj))
+	if frames is not None:
+		ids = ids[frames]
+	n = int(traj.n[ids[0]]) if len(ids) > 0 else 0
+	shape = (len(ids), n, dynamics_cols)
+	if np.prod(shape) * 8 > dynamics_memory:
+		out = np.memmap(tempfile.TemporaryFile(), dtype = float, mode = 'w+', shape = shape)
+	else:
+		out = np.empty(shape)
+	prev = None
+	for k in range(0, len(ids), batch):
+		fr = traj[ids[k:k + batch]]
+		phi = get_orientation(fr['quat'])
+		val = np.concatenate((fr['pos'], get_alignment(phi, fr['chai'].astype(int))[..., None], phi[..., None]), axis = 2)
+		if prev is not None:
+			val = np.concatenate((prev[None], val))
+		# displacement between consecutive frames
+		dv = np.diff(val, axis = 0)
+		dv[..., 0:2] -= region * np.round(dv[..., 0:2] / region)
+		dv[..., 2:4] -= 2. * np.pi * np.round(dv[..., 2:4] / (2. * np.pi))
+		if prev is None:
+			out[0] = val[0]
+			out[1:len(val)] = out[0] + np.cumsum(dv, axis = 0)
+		else:
+			out[k:k + len(dv)] = out[k - 1] + np.cumsum(dv, axis = 0)
+		prev = val[-1]
+	return out
+
+# returns the dynamics of the squares in the frames of a square trajectory,
+# averaged over all time origins and all squares, as a data frame:
+#	msd :: mean squared displacement (msd_x, msd_y perpendicular and parallel to the field)
+#	c1 :: autocorrelation of the dipole of each square, <cos(theta(t0 + t) - theta(t0))>
+#	c4 :: autocorrelation of the shape of each square, <cos(4 (phi(t0 + t) - phi(t0)))>
+# the squares are transformed in chunks, so that the fourier transforms only
+# hold the time series of a few squares at once
+#
+# frames :: slice, list or array of consecutive frames. if None, all frames are used
+# interval :: simulation time between frames
+def dynamics_frames (file, region, frames = None, interval = movie_interval, chunk = dynamics_chunk):
+	traj = open_trajectory(file, kind = 'squ')
+	x = unwrap_trajectory(traj, region, frames)
+	n_frames, n, _ = x.shape
+	msd = np.zeros((n_frames, 2))
+	c1 = np.zeros(n_frames)
+	c4 = np.zeros(n_frames)
+	for k in range(0, n, chunk):
+		xk = np.array(x[:, k:k + chunk])
+		msd += msd_fft(xk[..., 0:2]).sum(axis = 1)
+		theta = xk[..., 2]
+		c1 += (autocorrelation_sum(np.cos(theta)) + autocorrelation_sum(np.sin(theta))).sum(axis = 1)
+		phi = 4. * xk[..., 3]
+		c4 += (autocorrelation_sum(np.cos(phi)) + autocorrelation_sum(np.sin(phi))).sum(axis = 1)
+	# normalize by the number of time origins and squares
+	norm = (n_frames - np.arange(n_frames)) * max(n, 1)
+	return pd.DataFrame({'lag': np.arange(n_frames),
+		'time': np.arange(n_frames) * interval,
+		'msd': msd.sum(axis = 1) / norm,
+		'msd_x': msd[:, 0] / norm,
+		'msd_y': msd[:, 1] / norm,
+		'c1': c1 / norm,
+		'c4': c4 / norm})
+
+# calculates the dynamics of the ground state trajectory of each simulation.
+# each trajectory is analyzed as a whole, the simulations are spread across a
+# pool of processes. the dynamics of each simulation (<jobid><simid>_dyn.csv)
+# are written to its analysis directory. returns the dynamics of every
+# simulation, with the parameters of each simulation
+#
+# n_frames :: number of frames at the end of each trajectory. if None, the whole trajectory is used
+# workers :: number of processes that the simulations are spread across
+def dynamics_ground_states (simparms, n_squares, n_frames = None, workers = None, verbose = False):
+
+	# one batch for the whole trajectory of each simulation
+	jobs, owner, found = get_ground_state_batches(simparms, n_squares, n_frames, sys.maxsize)
+	results = run_cluster_batches(jobs, workers, func = dynamics_frames)
+
+	# write the results of each simulation
+	dfs = []
+	for j in range(len(jobs)):
+		p = simparms[owner[j]]
+		df = results[j]
+		anal_dir = p.path + "/anal/"
+		if not os.path.exists(anal_dir):
+			os.mkdir(anal_dir)
+		df.to_csv(anal_dir + p.jobid + p.simid + "_dyn.csv", index = False)
+		dfs.append(df.assign(XA = p.XA, H = p.H, ETA = p.ETA, RP = p.RP, id = found[owner[j]]))
+		if verbose:
+			print("Calculated dynamics of {:d} frames ({:s}).".format(len(df.index), p.path))
+	if len(dfs) == 0:
+		return pd.DataFrame()
+	return pd.concat(dfs, ignore_index = True)
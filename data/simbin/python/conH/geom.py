@@ -0,0 +1,26 @@
+# filename :: geom.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: geometry of the 2x2 squares and of the simulation box of the
+#			 conH simulations (see polsqu2x2_mod.f90)
+
+
+import sys, os
+import numpy as np
+
+## PARAMETERS
+# area excluded by one 2x2 square (see polsqu2x2_mod.f90)
+excluded_area = 1. + (3. / 4.) * np.pi
+# distance from the center of a square to each of its circles
+circle_radius = np.sqrt(2.) / 2.
+# number of circles in each square
+mer = 4
+
+
+## FUNCTIONS
+# returns the length of the simulation box wall (see polsqu2x2_mod.f90)
+#
+# n_squares :: number of squares in the simulation
+# eta :: area fraction of the simulation
+def get_region (n_squares, eta):
+	return np.sqrt(excluded_area * n_squares / eta)
@@ -0,0 +1,99 @@
+# filename :: ground.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: collects the ground state of each conH simulation from its
+#			 annealed anneal iterations, averages the replicates, classifies
+#			 the phase of each set of simulation parameters, and arranges
+#			 the ground states into phase maps
+
+
+import sys, os
+import pandas as pd
+import numpy as np
+
+## PARAMETERS
+# properties averaged over the ground state of each simulation
+gs_props = ['mag', 'nematic', 'poly', 'ht', 'anti', 'ds', 'percy', 'nclust']
+# order parameters (between 0 and 1) used to classify the phase of each ground
+# state, in order of precedence (e.g. double-stranded chains are also
+# anti-parallel and polymerized)
+gs_phases = ['ds', 'anti', 'ht', 'poly', 'percy', 'mag', 'nematic']
+# label of the ground states in which no order parameter passes the threshold
+gs_disordered = 'disordered'
+# ground state phase diagrams, each with the simulation parameters along the
+# x- and y-axis of the diagram, and the simulation parameter held constant
+gs_diagrams = {'DH': ('ETA', 'H', 'XA'), 'AH': ('XA', 'H', 'ETA'), 'AD': ('XA', 'ETA', 'H')}
+# simulation parameters that identify each simulation
+sim_keys = ['XA', 'H', 'ETA', 'RP']
+# label and file name prefix of each simulation parameter
+gs_labels = {'XA': ('$x_{a}$', 'a'), 'H': ('$H^{*}$', 'h'), 'ETA': ('$\\phi$', 'e')}
+
+
+## FUNCTIONS
+# returns the ground state of each simulation, as the average of the order
+# parameters over the anneal iterations of the simulation that have been
+# annealed below a maximum temperature. the magnitude of the magnetization is
+# used, as the direction of the magnetization is arbitrary without a field.
+# simulations that have not been annealed below the temperature are dropped
+#
+# df :: data frame containing every anneal iteration of every simulation
+#		(e.g. loaded from the campaign store)
+# max_temp :: maximum temperature of the anneal iterations in the ground state
+# returns a data frame containing the ground state of each simulation, along
+# with the number of anneal iterations (n), the lowest temperature (temp) and
+# the most recent anneal iteration (max_id) of the simulation
+def get_ground_states (df, max_temp, props = None):
+	if props is None:
+		props = [p for p in gs_props if p in df.columns]
+	df = df[df['temp'] < max_temp]
+	if len(df.index) == 0:
+		return pd.DataFrame(columns = sim_keys + ['n', 'temp', 'max_id'] + props)
+	df = df.assign(mag = df['mag'].abs()) if 'mag' in props else df
+	g = df.groupby(sim_keys, sort = True)
+	df_gs = g[props].mean()
+	df_gs.insert(0, 'max_id', g['id'].max())
+	df_gs.insert(0, 'temp', g['temp'].min())
+	df_gs.insert(0, 'n', g.size())
+	return df_gs.reset_index()
+
+# averages the ground states of the replicates of each set of simulation
+# parameters. the uncertainty of each order parameter (<prop>_err) is the
+# standard error of the replicates
+def average_ground_states (df_gs, props = None):
+	if props is None:
+		props = [p for p in gs_props if p in df_gs.columns]
+	g = df_gs.groupby(sim_keys[:-1], sort = True)
+	df_avg = g[props].mean()
+	n = g.size()
+	err = g[props].std(ddof = 1).div(np.sqrt(n), axis = 0)
+	df_avg = df_avg.join(err.add_suffix('_err'))
+	df_avg.insert(0, 'n', n)
+	return df_avg.reset_index()
+
+# classifies the phase of each ground state, as the order parameter with the
+# highest precedence (see gs_phases) whose value passes a threshold. returns the
+# ground states, with a column for whether each order parameter passes the
+# threshold (<prop>_on) and the phase of each ground state (phase)
+#
+# min_val :: minimum order parameter value for a phase to be assigned
+def classify_ground_states (df_avg, min_val, phases = None):
+	if phases is None:
+		phases = [p for p in gs_phases if p in df_avg.columns]
+	on = df_avg[phases].to_numpy(dtype = float) >= min_val
+	first = np.argmax(on, axis = 1)
+	label = np.where(on.any(axis = 1), np.array(phases, dtype = object)[first], gs_disordered)
+	return df_avg.assign(**{p + '_on': on[:, j] for j, p in enumerate(phases)}, phase = label)
+
+# arranges the ground states into the maps of a phase diagram, one map for
+# each value of the simulation parameter held constant
+#
+# name :: name of the phase diagram (see gs_diagrams)
+# prop :: column containing the values of each map
+# returns a dictionary that contains the map (data frame indexed by the x-axis,
+# with a column for each value along the y-axis) for each constant value
+def get_ground_state_maps (df_avg, name, prop):
+	x_col, y_col, const_col = gs_diagrams[name]
+	maps = {}
+	for c, g in df_avg.groupby(const_col, sort = True):
+		maps[c] = g.pivot(index = x_col, columns = y_col, values = prop)
+	return maps
@@ -0,0 +1,228 @@
+# filename :: inflect.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: locates the transition temperature of each order parameter of
+#			 each conH simulation from its annealing curve, as the inflection
+#			 point of the smoothed curve, with a bootstrap uncertainty
+
+
+import sys, os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+
+## PARAMETERS
+# order parameters whose transition temperatures are located
+inflect_props = ['mag', 'nematic', 'nclust', 'poly', 'ht', 'anti', 'ds', 'percy']
+# width of the gaussian kernel used to smooth each annealing curve. the
+# annealing schedule is geometric (see anneal_frac in polsqu2x2_mod.f90),
+# so the curves are smoothed against the logarithm of the temperature
+inflect_bandwidth = 0.15
+# number of points on which each smoothed curve is evaluated
+inflect_points = 200
+# number of bootstrap resamples used to estimate the uncertainty
+inflect_boot = 100
+# minimum number of anneal iterations required to locate a transition
+inflect_min_points = 5
+# number of simulations whose curves are smoothed at once by each process
+inflect_chunk = 64
+# minimum change of an order parameter across its transition, as a fraction
+# of the largest magnitude of the order parameter. the change across the
+# transition is the slope at the transition times the width of the curve
+inflect_min_change = 0.05
+# minimum number of standard deviations (of the bootstrap resamples) that the
+# slope at the transition must be away from zero
+inflect_min_z = 4.
+# columns of the cached transitions of each simulation (<jobid><simid>_inflect.csv)
+inflect_cols = ['prop', 'temp', 'temp_err', 'slope', 'slope_err', 'n', 'max_id', 'bandwidth']
+
+
+## FUNCTIONS
+# returns the normalized weights of a gaussian kernel (Nadaraya-Watson) that
+# smooths a batch of curves, which are padded with NaN to the same length. the
+# smoothed value of each curve (s) at each point of its grid (k) is the sum
+# of the weights (s, k, p) times the points of the curve (s, p)
+#
+# x :: (s, p) array containing the points of each curve, NaN where padded
+# grid :: (s, k) array containing the points on which each curve is evaluated
+def kernel_weights (x, grid, bandwidth = inflect_bandwidth):
+	w = np.exp(-0.5 * ((grid[:, :, None] - x[:, None, :]) / bandwidth) ** 2)
+	w = np.where(np.isnan(x)[:, None, :], 0., w)
+	den = w.sum(axis = 2, keepdims = True)
+	return np.divide(w, den, out = np.full(w.shape, np.nan), where = den > 0)
+
+# returns the smoothed value of each curve at each point of its grid
+def smooth_curves (x, y, grid, bandwidth = inflect_bandwidth):
+	return np.einsum('skp,sp->sk', kernel_weights(x, grid, bandwidth), np.nan_to_num(y))
+
+# returns the slope of each smoothed curve at each point of its grid
+def curve_slopes (grid, ys):
+	return np.gradient(ys, axis = -1) / np.gradient(grid, axis = -1)
+
+# locates the point of each smoothed curve where the magnitude of the slope is
+# largest, refined between grid points by fitting a parabola to the slope.
+# points within one bandwidth of either end of each curve are ignored, where
+# the smoothed curve is biased. returns the location and the slope of each
+# peak, NaN if the curve does not have a peak
+#
+# min_slope :: minimum magnitude of the slope of each peak, e.g. so that
+#			   curves which are flat do not have a peak
+def locate_peaks (grid, ys, bandwidth = inflect_bandwidth, min_slope = 0.):
+	grid = np.broadcast_to(grid, ys.shape)
+	dy = curve_slopes(grid, ys)
+	edge = (grid < grid[..., :1] + bandwidth) | (grid > grid[..., -1:] - bandwidth)
+	mag = np.where(edge | np.isnan(dy), -np.inf, np.abs(dy))
+	k = np.clip(np.argmax(mag, axis = -1), 1, grid.shape[-1] - 2)
+	take = lambda a, j: np.take_along_axis(a, j[..., None], axis = -1)[..., 0]
+	d0 = take(np.abs(dy), k - 1)
+	d1 = take(np.abs(dy), k)
+	d2 = take(np.abs(dy), k + 1)
+	curv = d0 - 2. * d1 + d2
+	shift = np.divide(0.5 * (d0 - d2), curv, out = np.zeros(curv.shape), where = curv < 0.)
+	shift = np.clip(np.nan_to_num(shift), -1., 1.)
+	step = take(grid, k + 1) - take(grid, k)
+	# the peak must be inside the curve. a peak at the edge means that the
+	# transition has not been reached (e.g. the simulation has not yet been
+	# annealed to a low enough temperature)
+	found = np.isfinite(take(mag, k)) & (take(mag, k) > min_slope) & ~take(edge, k - 1) & ~take(edge, k + 1)
+	return np.where(found, take(grid, k) + shift * step, np.nan), np.where(found, take(dy, k), np.nan)
+
+# locates the transition of a batch of annealing curves. the uncertainty of each
+# transition is the standard deviation of the transitions located from curves
+# whose residuals (from the smoothed curve) have been resampled. a transition
+# is only located where the order parameter changes significantly, i.e. where
+# the change across the transition is a fraction of the order parameter
+# (inflect_min_change) and the slope stands out from the bootstrap noise
+# (inflect_min_z). otherwise (e.g. curves that are flat), the transition is NaN
+#
+# x :: (s, p) array of the logarithm of the temperature of each anneal iteration
+# y :: (s, p) array of the order parameter of each anneal iteration
+# returns the location, uncertainty, slope and uncertainty of the slope of the
+# transition of each curve
+def transition_worker (x, y, bandwidth = inflect_bandwidth, n_points = inflect_points, n_boot = inflect_boot, seed = 0):
+	lo = np.nanmin(x, axis = 1)
+	hi = np.nanmax(x, axis = 1)
+	grid = lo[:, None] + (hi - lo)[:, None] * np.linspace(0., 1., n_points)[None, :]
+	w = kernel_weights(x, grid, bandwidth)
+	y0 = np.nan_to_num(y)
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		min_slope = inflect_min_change * np.nanmax(np.abs(y), axis = 1) / (hi - lo)
+	loc, slope = locate_peaks(grid, np.einsum('skp,sp->sk', w, y0), bandwidth, min_slope)
+	if n_boot < 2:
+		return loc, np.full(len(loc), np.nan), slope, np.full(len(loc), np.nan)
+
+	# resample the residuals of each curve (whose points are packed at the start
+	# of its row), and smooth every resample with the same weights
+	rng = np.random.default_rng(seed)
+	fit = smooth_curves(x, y, np.nan_to_num(x), bandwidth)
+	res = np.where(np.isnan(y), 0., y - fit)
+	n = (~np.isnan(y)).sum(axis = 1)
+	pick = (rng.random((len(x), n_boot, x.shape[1])) * np.maximum(n, 1)[:, None, None]).astype(int)
+	yb = fit[:, None, :] + np.take_along_axis(np.broadcast_to(res[:, None, :], pick.shape), pick, axis = 2)
+	yb = np.where(np.isnan(y)[:, None, :], 0., yb)
+	ysb = np.einsum('skp,sbp->sbk', w, yb)
+	loc_b, _ = locate_peaks(grid[:, None, :], ysb, bandwidth, min_slope[:, None])
+	with np.errstate(invalid = 'ignore'):
+		err = np.nanstd(loc_b, axis = 1) if np.isfinite(loc_b).any() else np.full(len(x), np.nan)
+
+	# the uncertainty of the slope is the standard deviation of the slope of
+	# the resamples, at the grid point nearest to the transition
+	k = np.argmin(np.abs(grid - np.nan_to_num(loc)[:, None]), axis = 1)
+	slope_err = np.take_along_axis(curve_slopes(grid[:, None, :], ysb), k[:, None, None], axis = 2)[:, :, 0].std(axis = 1)
+	bad = ~(np.abs(slope) >= inflect_min_z * slope_err)
+	return np.where(bad, np.nan, loc), np.where(bad, np.nan, err), np.where(bad, np.nan, slope), np.where(np.isnan(loc), np.nan, slope_err)
+
+# returns the annealing curves of a list of simulations as (s, p) arrays, padded
+# with NaN. the points of each curve are ordered by decreasing temperature
+def pack_curves (curves, prop):
+	p = max(len(c.index) for c in curves)
+	x = np.full((len(curves), p), np.nan)
+	y = np.full((len(curves), p), np.nan)
+	for i in range(len(curves)):
+		c = curves[i]
+		x[i, :len(c.index)] = np.log(c['temp'].to_numpy(dtype = float))
+		y[i, :len(c.index)] = c[prop].to_numpy(dtype = float)
+	return x, y
+
+# locates the transition temperature of each order parameter of each
+# simulation, from the annealing curve of each simulation (every anneal
+# iteration, e.g. from the campaign store). the transitions of each simulation
+# are cached in its analysis directory (<jobid><simid>_inflect.csv), and are
+# only located again once the simulation has new anneal iterations
+#
+# df :: data frame containing the simulation parameters (including path) and
+#		the temperature and order parameters of every anneal iteration
+# props :: list of order parameters to locate the transitions of
+# workers :: number of processes that batches of simulations are spread across
+# returns a data frame that contains the transition temperature (temp), its
+# uncertainty (temp_err) and the slope of the order parameter against the
+# logarithm of the temperature at the transition (slope), for each simulation
+# and order parameter
+def find_transitions (df, props = None, bandwidth = inflect_bandwidth, n_boot = inflect_boot, workers = None, incremental = True, verbose = False):
+
+	if props is None:
+		props = [p for p in inflect_props if p in df.columns]
+	parm_cols = [c for c in ['jobid', 'simid', 'path', 'XA', 'H', 'ETA', 'RP'] if c in df.columns]
+
+	# split the campaign into the annealing curve of each simulation, and load
+	# the cached transitions of each simulation whose curve has not changed
+	sims = []
+	curves = []
+	cached = []
+	for key, c in df.groupby(['XA', 'H', 'ETA', 'RP'], sort = True):
+		c = c[np.isfinite(c['temp']) & (c['temp'] > 0.)].sort_values('id')
+		parm = c.iloc[0][parm_cols].to_dict()
+		n = len(c.index)
+		max_id = int(c['id'].max())
+		cache_file = None
+		if 'path' in parm:
+			cache_file = parm['path'] + "/anal/" + parm['jobid'] + parm['simid'] + "_inflect.csv"
+		prev = None
+		if incremental and cache_file is not None and os.path.exists(cache_file):
+			prev = pd.read_csv(cache_file, float_precision = 'round_trip')
+			prev = prev[(prev['n'] == n) & (prev['max_id'] == max_id) & np.isclose(prev['bandwidth'], bandwidth)]
+		if prev is not None and set(inflect_cols) <= set(prev.columns) and set(props) <= set(prev['prop']):
+			cached.append(prev[prev['prop'].isin(props)].assign(**parm))
+			continue
+		sims.append((parm, n, max_id, cache_file))
+		curves.append(c)
+
+	# locate the transitions of each order parameter, in batches of simulations
+	# (sorted by the number of anneal iterations, so that little padding is needed)
+	order = sorted(range(len(curves)), key = lambda i: len(curves[i].index))
+	jobs = []
+	for prop in props:
+		for k in range(0, len(order), inflect_chunk):
+			ids = [i for i in order[k:k + inflect_chunk] if len(curves[i].index) >= inflect_min_points]
+			if len(ids) > 0:
+				jobs.append((prop, ids) + pack_curves([curves[i] for i in ids], prop))
+	if workers is None or workers < 2:
+		results = [transition_worker(j[2], j[3], bandwidth, n_boot = n_boot) for j in jobs]
+	else:
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = [pool.submit(transition_worker, j[2], j[3], bandwidth, inflect_points, n_boot) for j in jobs]
+			results = [f.result() for f in futures]
+
+	# collect the transitions of each simulation, and cache them
+	found = {i: [] for i in range(len(sims))}
+	for j, (loc, err, slope, slope_err) in zip(jobs, results):
+		for k in range(len(j[1])):
+			i = j[1][k]
+			found[i].append({'prop': j[0], 'temp': np.exp(loc[k]), 'temp_err': np.exp(loc[k]) * err[k],
+				'slope': slope[k], 'slope_err': slope_err[k], 'n': sims[i][1], 'max_id': sims[i][2], 'bandwidth': bandwidth})
+	rows = []
+	for i in range(len(sims)):
+		parm, n, max_id, cache_file = sims[i]
+		df_sim = pd.DataFrame(found[i], columns = inflect_cols)
+		if cache_file is not None and len(df_sim.index) > 0:
+			anal_dir = os.path.dirname(cache_file)
+			if not os.path.exists(anal_dir):
+				os.mkdir(anal_dir)
+			df_sim.to_csv(cache_file, index = False)
+		rows.append(df_sim.assign(**parm))
+	if verbose:
+		print("Located transitions of {:d} simulations ({:d} cached).".format(len(sims), len(cached)))
+	if len(rows) + len(cached) == 0:
+		return pd.DataFrame(columns = parm_cols + inflect_cols)
+	df_inf = pd.concat(cached + rows, ignore_index = True)
+	return df_inf[parm_cols + inflect_cols].sort_values(['XA', 'H', 'ETA', 'RP', 'prop'], ignore_index = True)
@@ -0,0 +1,279 @@
+# filename :: pack.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: packs the finished anneal iterations of a conH simulation into
+#			 one indexed archive, and reads files from either the packed or
+#			 the unpacked anneal directory layout
+
+
+import sys, os
+import io
+import shutil
+import zipfile
+import struct
+import threading
+from collections import OrderedDict
+
+## PARAMETERS
+# name of the archive, in each simulation directory, that contains the
+# packed anneal iterations. each file is stored in the archive under the
+# name of its anneal iteration (e.g. 000/conH_squ2c32a050h00e15r00_anneal.csv)
+pack_file = "anneal.zip"
+# compression used to store files in the archive. files are stored without
+# compression by default, so that members can be read without decompressing
+pack_compression = zipfile.ZIP_STORED
+# lock used to read from archives that are shared between threads
+pack_lock = threading.RLock()
+# maximum number of archives that are kept open
+pack_cache_size = 16
+# archives that are open, as archive path -> (size, modification time, archive),
+# in the order that they were last used
+pack_cache = OrderedDict()
+
+
+## FUNCTIONS
+# returns the path to the archive of a simulation
+def get_pack_file (sim_path):
+	return os.path.join(sim_path, pack_file)
+
+# returns the simulation path and the name of the archive member that
+# corresponds to a file in the unpacked anneal directory layout, e.g.
+# ./a050/h00/e15/r00/anneal/000/x_anneal.csv -> (./a050/h00/e15/r00, 000/x_anneal.csv)
+def split_anneal_path (path):
+	path = os.path.normpath(path)
+	sep = os.sep + "anneal" + os.sep
+	if sep not in path:
+		return None, None
+	sim_path, member = path.rsplit(sep, 1)
+	return sim_path, member.replace(os.sep, '/')
+
+# opens an archive. archives are cached by their size and modification time,
+# so that the index of an archive is only read once while it is unchanged. the
+# cached archive is closed once the archive has changed, or once it is the
+# least recently used archive in the cache. must be called with pack_lock held
+def load_pack (zip_path, size, mtime_ns):
+	entry = pack_cache.pop(zip_path, None)
+	if entry is not None:
+		if entry[:2] == (size, mtime_ns):
+			pack_cache[zip_path] = entry
+			return entry[2]
+		entry[2].close()
+	zf = zipfile.ZipFile(zip_path, 'r')
+	pack_cache[zip_path] = (size, mtime_ns, zf)
+	while len(pack_cache) > pack_cache_size:
+		pack_cache.popitem(last = False)[1][2].close()
+	return zf
+
+# closes the cached archive of a simulation, e.g. before the archive is rewritten
+def release_pack (zip_path):
+	with pack_lock:
+		entry = pack_cache.pop(zip_path, None)
+		if entry is not None:
+			entry[2].close()
+
+# returns the open archive of a simulation, or None if it has not been packed
+def get_pack (sim_path):
+	zip_path = get_pack_file(sim_path)
+	try:
+		st = os.stat(zip_path)
+	except OSError:
+		return None
+	with pack_lock:
+		return load_pack(zip_path, st.st_size, st.st_mtime_ns)
+
+# returns the signature (size, modification time) that a packed file had
+# before it was packed. the modification time is stored in the comment of
+# each archive member, the CRC is used for archives written by other tools
+def get_member_signature (info):
+	try:
+		return (info.file_size, int(info.comment.decode()))
+	except ValueError:
+		return (info.file_size, info.CRC)
+
+# returns a dictionary that maps each packed anneal iteration number to a
+# dictionary that contains the signature of each file in the iteration
+def scan_pack (sim_path, suffixes = None):
+	anneal = {}
+	zf = get_pack(sim_path)
+	if zf is None:
+		return anneal
+	for info in zf.infolist():
+		name = info.filename.split('/')
+		if len(name) != 2 or len(name[0]) != 3 or not name[0].isdigit():
+			continue
+		if suffixes is not None and not name[1].endswith(suffixes):
+			continue
+		anneal.setdefault(int(name[0]), {})[name[1]] = get_member_signature(info)
+	return anneal
+
+# opens a file from the anneal directory of a simulation. if the file
+# does not exist in the unpacked layout, it is read from the archive
+#
+# path :: path to the file in the unpacked layout (e.g. anneal/000/x_anneal.csv)
+# returns an open text file, or raises FileNotFoundError
+def open_anneal_file (path):
+	try:
+		return open(path, 'r')
+	except FileNotFoundError:
+		sim_path, member = split_anneal_path(path)
+		if sim_path is None:
+			raise
+		# the archive is read while the lock is held, so that it is not
+		# closed by another thread between opening and reading
+		with pack_lock:
+			zf = get_pack(sim_path)
+			if zf is None:
+				raise
+			try:
+				data = zf.read(member)
+			except KeyError:
+				raise FileNotFoundError(path)
+		return io.StringIO(data.decode())
+
+# returns the location of the data of a member that is stored in an archive
+# without compression, as (archive path, byte offset, size), so that the member
+# can be memory mapped. returns None if the member can not be memory mapped
+def get_member_offset (sim_path, member):
+	zf = get_pack(sim_path)
+	if zf is None:
+		return None
+	try:
+		info = zf.getinfo(member)
+	except KeyError:
+		return None
+	if info.compress_type != zipfile.ZIP_STORED:
+		return None
+	# the data follows the local file header, whose name and extra
+	# fields may differ in length from the central directory
+	with open(zf.filename, 'rb') as f:
+		f.seek(info.header_offset)
+		header = f.read(zipfile.sizeFileHeader)
+	if len(header) != zipfile.sizeFileHeader or header[0:4] != zipfile.stringFileHeader:
+		return None
+	fields = struct.unpack(zipfile.structFileHeader, header)
+	offset = info.header_offset + zipfile.sizeFileHeader + fields[zipfile._FH_FILENAME_LENGTH] + fields[zipfile._FH_EXTRA_FIELD_LENGTH]
+	return zf.filename, offset, info.file_size
+
+# returns true if a file exists in either the packed or unpacked anneal layout
+def anneal_file_exists (path):
+	if os.path.exists(path):
+		return True
+	sim_path, member = split_anneal_path(path)
+	zf = None
+	if sim_path is not None:
+		zf = get_pack(sim_path)
+	if zf is None:
+		return False
+	try:
+		zf.getinfo(member)
+	except KeyError:
+		return False
+	return True
+
+# returns true if the result line of an anneal file has been written
+def anneal_finished (anneal_file):
+	try:
+		with open(anneal_file, 'r') as f:
+			f.readline()
+			return len(f.readline().strip()) > 0
+	except OSError:
+		return False
+
+# pack the finished anneal iterations of a simulation into its archive. an
+# anneal iteration is finished once the result line of its anneal file has
+# been written. the iteration directories are removed once the archive has
+# been written and verified
+#
+# keep :: if true, the iteration directories are not removed
+# returns the number of anneal iterations that were packed
+def pack_simulation (sim_parm, keep = False, compression = pack_compression, verbose = False):
+
+	anneal_dir = os.path.join(sim_parm.path, "anneal")
+	zip_path = get_pack_file(sim_parm.path)
+	anneal_name = sim_parm.jobid + sim_parm.simid + "_anneal.csv"
+
+	# get the anneal iterations that have finished
+	ids = []
+	try:
+		with os.scandir(anneal_dir) as it:
+			for entry in it:
+				if entry.is_dir() and len(entry.name) == 3 and entry.name.isdigit():
+					ids.append(entry.name)
+	except OSError:
+		return 0
+	ids = [i for i in sorted(ids) if anneal_finished(os.path.join(anneal_dir, i, anneal_name))]
+
+	# do not pack iterations that are already in the archive
+	packed = set()
+	if os.path.exists(zip_path):
+		with zipfile.ZipFile(zip_path, 'r') as zf:
+			packed = set(n.split('/')[0] for n in zf.namelist())
+	for i in ids:
+		if i in packed:
+			print("pack_simulation :: anneal iteration {:s} of {:s} is already packed, skipping.".format(i, sim_parm.path))
+	ids = [i for i in ids if i not in packed]
+	if len(ids) == 0:
+		return 0
+
+	# append the files of each iteration to the archive, storing the
+	# modification time of each file so that its signature is preserved
+	release_pack(zip_path)
+	n_files = {}
+	with zipfile.ZipFile(zip_path, 'a', compression = compression) as zf:
+		for i in ids:
+			n_files[i] = 0
+			for root, dirs, files in os.walk(os.path.join(anneal_dir, i)):
+				for name in sorted(files):
+					file = os.path.join(root, name)
+					info = zipfile.ZipInfo.from_file(file, i + '/' + os.path.relpath(file, os.path.join(anneal_dir, i)).replace(os.sep, '/'))
+					info.compress_type = compression
+					info.comment = str(os.stat(file).st_mtime_ns).encode()
+					with open(file, 'rb') as src, zf.open(info, 'w') as dst:
+						shutil.copyfileobj(src, dst)
+					n_files[i] += 1
+
+	# verify the archive before removing the iteration directories
+	with zipfile.ZipFile(zip_path, 'r') as zf:
+		bad = zf.testzip()
+		names = zf.namelist()
+	if bad is not None:
+		print("pack_simulation :: archive ({:s}) is corrupt ({:s}). Directories were not removed.".format(zip_path, bad))
+		return 0
+	if not keep:
+		for i in ids:
+			if sum(1 for n in names if n.startswith(i + '/')) == n_files[i]:
+				shutil.rmtree(os.path.join(anneal_dir, i))
+
+	# inform user
+	if verbose:
+		print("Packed {:d} anneal iterations ({:s}).".format(len(ids), zip_path))
+	return len(ids)
+
+# unpack the archive of a simulation into the anneal directory, restoring the
+# modification time of each file. the archive is removed once it is unpacked
+def unpack_simulation (sim_parm, keep = False, verbose = False):
+
+	zip_path = get_pack_file(sim_parm.path)
+	if not os.path.exists(zip_path):
+		return 0
+	anneal_dir = os.path.join(sim_parm.path, "anneal")
+	ids = set()
+	with zipfile.ZipFile(zip_path, 'r') as zf:
+		for info in zf.infolist():
+			file = os.path.join(anneal_dir, *info.filename.split('/'))
+			if os.path.exists(file):
+				# do not overwrite files in the unpacked layout
+				continue
+			zf.extract(info, anneal_dir)
+			if info.comment:
+				mtime_ns = get_member_signature(info)[1]
+				os.utime(file, ns = (mtime_ns, mtime_ns))
+			ids.add(info.filename.split('/')[0])
+	if not keep:
+		release_pack(zip_path)
+		os.remove(zip_path)
+
+	# inform user
+	if verbose:
+		print("Unpacked {:d} anneal iterations ({:s}).".format(len(ids), zip_path))
+	return len(ids)
@@ -0,0 +1,113 @@
+# filename :: reader.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: reads the small result files written by each simulation (e.g.
+#			 the anneal file of each anneal iteration) concurrently, and
+#			 stacks the results into one array
+
+
+import sys, os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from simbin.python.conH.pack import open_anneal_file
+
+## PARAMETERS
+# maximum number of threads used to read files. reading small files from
+# network storage is bound by the latency of each open, not by bandwidth
+read_workers = 16
+
+
+## FUNCTIONS
+# returns the first two lines (the header and the result line) of a
+# result file, or None if the file does not exist. files in the anneal
+# directory are read from the archive of the simulation if it is packed
+def read_result_lines (file):
+	try:
+		with open_anneal_file(file) as f:
+			return f.readline(), f.readline()
+	except OSError:
+		return None
+
+# returns the columns of a header line
+def parse_header (line):
+	return line.replace(" ", '').replace("\n", '').split(',')
+
+# read a list of result files, each containing a header line and one result
+# line (e.g. <jobid><simid>_anneal.csv), using a bounded pool of threads
+#
+# file_list :: list of paths to the result files
+# head :: list of columns that each file must have. if None, the header of
+#		  the first file that exists is used
+# workers :: maximum number of threads used to read the files
+# fill_nan :: if true, NaN values in the result lines are read as zero
+# text :: if true, the header line and the result line of each file are
+#		  returned as they were written (without the line break), rather
+#		  than parsed into columns and converted to numbers
+# returns the header, an array (or list of lines, see text) that contains the
+# results of each file that was read successfully (one row per file), the
+# position of each row in the file list, and the list of files that are
+# missing or malformed
+def read_result_files (file_list, head = None, workers = read_workers, fill_nan = False, text = False):
+
+	# read the lines of each file concurrently, in the order of the file list
+	file_list = list(file_list)
+	if len(file_list) == 0:
+		if text:
+			return None if head is None else ','.join(head), [], [], []
+		return head, np.empty((0, 0 if head is None else len(head))), [], []
+	if workers is None or workers < 2 or len(file_list) < 2:
+		lines = [read_result_lines(f) for f in file_list]
+	else:
+		with ThreadPoolExecutor(max_workers = min(workers, len(file_list))) as pool:
+			lines = list(pool.map(read_result_lines, file_list))
+
+	# validate the header of each file. each distinct header line is only
+	# parsed once, and compared against the expected columns
+	schema = {}
+	head_line = None if head is None else ','.join(head)
+	rows = []
+	failed = []
+	for i in range(len(file_list)):
+		if lines[i] is None or not lines[i][1].strip():
+			# the file does not exist, or the result line has not been written yet
+			failed.append(file_list[i])
+			continue
+		valid = schema.get(lines[i][0])
+		if valid is None:
+			cols = parse_header(lines[i][0])
+			if head is None:
+				head = cols
+				head_line = lines[i][0].rstrip("\n")
+			valid = (cols == head)
+			schema[lines[i][0]] = valid
+		# check that the number of items in the result line is the same
+		# as the number of items in the results header
+		if not valid or lines[i][1].count(',') != len(head) - 1:
+			failed.append(file_list[i])
+			continue
+		rows.append(i)
+	if head is None:
+		return None, [] if text else np.empty((0, 0)), [], failed
+	if text:
+		return head_line, [lines[i][1].rstrip("\n") for i in rows], rows, failed
+
+	# convert the result lines to an array in one pass. if any line cannot
+	# be converted, convert the lines one at a time to find the malformed files
+	results = [lines[i][1].replace("\n", '') for i in rows]
+	if fill_nan:
+		results = [r.replace("NaN", "0.") for r in results]
+	try:
+		data = np.array(','.join(results).split(','), dtype = float).reshape(len(rows), len(head))
+	except ValueError:
+		data = []
+		ok = []
+		for i, r in zip(rows, results):
+			try:
+				data.append(np.array(r.split(','), dtype = float))
+				ok.append(i)
+			except ValueError:
+				failed.append(file_list[i])
+		rows = ok
+		data = np.array(data, dtype = float).reshape(len(rows), len(head))
+
+	return head, data, rows, failed
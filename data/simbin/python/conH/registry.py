@@ -0,0 +1,70 @@
+# filename :: registry.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: indexes the simulation parameters of a conH campaign by their
+#			 state point (XA, H, ETA, RP), so that simulations can be looked
+#			 up directly, or queried by a range of parameter values
+
+
+import sys, os
+import numpy as np
+from simbin.python.conH.crawl import get_index_key, crawl_levels
+
+## PARAMETERS
+# simulation parameters that identify each simulation, in the same order as
+# the key of each simulation (see get_index_key)
+registry_cols = [p for p, _ in crawl_levels]
+# number of decimals each parameter is rounded to in the key of each simulation
+registry_decimals = [2, 2, 2, 0]
+
+
+## CLASS
+# registry of simulation parameters, keyed on the state point of each simulation.
+# the parameter values are rounded (see crawl.py), so that values which differ
+# by floating point error map to the same simulation
+class simparm_registry(object):
+	""" initialization for simparm_registry object. """
+	def __init__(self, simparms):
+		self.parms = {} # dictionary that maps the key of each simulation to its parameters
+		for p in simparms:
+			key = get_index_key(p.XA, p.H, p.ETA, p.RP)
+			if key in self.parms:
+				print("simparm_registry :: simulation ({:s}) has the same parameters as ({:s}), skipping.".format(p.path, self.parms[key].path))
+				continue
+			self.parms[key] = p
+		self.keys = list(self.parms)
+		self.values = np.array(self.keys, dtype = float).reshape(len(self.keys), len(registry_cols))
+
+	""" returns the number of simulations in the registry. """
+	def __len__(self):
+		return len(self.keys)
+
+	""" iterates over the simulation parameters in the registry. """
+	def __iter__(self):
+		return iter(self.parms.values())
+
+	""" method that returns the simulation parameters of a state point, or None. """
+	def get(self, XA, H, ETA, RP = 0):
+		return self.parms.get(get_index_key(XA, H, ETA, RP))
+
+	""" method that returns the simulation parameters that match a query. each
+	parameter can be a value, a list of values, or a (min, max) range. parameters
+	that are None are not constrained. """
+	def query(self, XA = None, H = None, ETA = None, RP = None):
+		mask = np.ones(len(self.keys), dtype = bool)
+		for j, val in enumerate([XA, H, ETA, RP]):
+			if val is None:
+				continue
+			col = self.values[:, j]
+			if isinstance(val, tuple):
+				lo = -np.inf if val[0] is None else val[0]
+				hi = np.inf if val[1] is None else val[1]
+				tol = 0.5 * 10. ** -registry_decimals[j]
+				mask &= (col >= lo - tol) & (col <= hi + tol)
+			else:
+				mask &= np.isin(col, np.round(np.atleast_1d(val).astype(float), registry_decimals[j]))
+		return [self.parms[self.keys[i]] for i in np.flatnonzero(mask)]
+
+	""" method that returns the sorted values of a simulation parameter. """
+	def params(self, parm):
+		return np.unique(self.values[:, registry_cols.index(parm)])
@@ -0,0 +1,168 @@
+# filename :: response.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: converts the fluctuations reported by each anneal iteration of
+#			 the conH simulations into the heat capacity and the magnetic
+#			 susceptibility, and locates the peak of each response function
+
+
+import sys, os
+import pandas as pd
+import numpy as np
+from simbin.python.conH.geom import mer
+from simbin.python.conH.inflect import smooth_curves
+
+## PARAMETERS
+# response functions, each with the fluctuation column it is calculated from,
+# the power of the temperature it is divided by, and whether the property is
+# reported per circle (energies, see accumulate_potential in polsqu2x2_mod.f90)
+# or per square (magnetization, see calculate_allignment). the fluctuations are
+# those of block averages, so each response function is relative (see calc_response)
+response_props = {
+	'cv_rel': ('te_fluc', 2, True), # relative heat capacity per circle
+	'cv_pot_rel': ('pot_fluc', 2, True), # relative configurational heat capacity per circle
+	'chi_rel': ('mag_fluc', 1, False) # relative magnetic susceptibility per square
+}
+# minimum number of anneal iterations required to locate a peak
+response_min_points = 5
+# columns of the peak of each response function of each simulation. the
+# height of each peak is relative, only the temperature of the peak is physical
+response_cols = ['prop', 'temp', 'height_rel', 'n', 'max_id']
+
+
+## FUNCTIONS
+# returns the response functions of every anneal iteration, from the
+# fluctuations of the energy (E) and magnetization (M) of the anneal iteration:
+#
+#	cv = N sigma_E^2 / T^2		chi = N sigma_M^2 / T
+#
+# where N is the number of circles (energy) or squares (magnetization). the
+# fortran module reports the standard deviation of the block averages of each
+# property during the equilibrium accumulation (equilstd), rather than of the
+# property itself. the response functions are smaller than the thermodynamic
+# response by a factor that depends on the length of the blocks and the
+# correlation time of the property, which is not known, so they are relative
+# (<name>_rel). only the temperature at which each response function peaks is
+# a physical result
+#
+# df :: data frame containing the temperature and fluctuations of every anneal
+#		iteration (e.g. loaded from the campaign store)
+# n_squares :: number of squares in each simulation
+def calc_response (df, n_squares, props = None):
+	if props is None:
+		props = [p for p in response_props if response_props[p][0] in df.columns]
+	temp = df['temp'].to_numpy(dtype = float)
+	res = {}
+	for p in props:
+		col, power, per_circle = response_props[p]
+		n = n_squares * (mer if per_circle else 1)
+		with np.errstate(divide = 'ignore', invalid = 'ignore'):
+			res[p] = np.where(temp > 0., n * df[col].to_numpy(dtype = float) ** 2 / temp ** power, np.nan)
+	return df.assign(**res)
+
+# locates the maximum of a batch of curves, which are padded with NaN to the
+# same length, refined by fitting a parabola through the maximum and the points
+# on either side of it. points within edge of either end of each curve are
+# ignored. returns the location and height of each maximum, NaN if the maximum
+# is at the end of the curve (e.g. the simulation has not yet been annealed
+# through the peak)
+#
+# x :: (s, p) array containing the points of each curve, NaN where padded
+# y :: (s, p) array containing the value of each curve at each point
+def locate_maxima (x, y, edge = 0.):
+	# sort the points of each curve, padded points last
+	order = np.argsort(x, axis = 1)
+	x = np.take_along_axis(x, order, axis = 1)
+	y = np.take_along_axis(y, order, axis = 1)
+	valid = ~np.isnan(x) & ~np.isnan(y)
+	lo = np.nanmin(np.where(valid, x, np.nan), axis = 1)
+	hi = np.nanmax(np.where(valid, x, np.nan), axis = 1)
+	inner = valid & (x >= lo[:, None] + edge) & (x <= hi[:, None] - edge)
+	m = np.argmax(np.where(inner, y, -np.inf), axis = 1)
+	k = np.clip(m, 1, max(x.shape[1] - 2, 1))
+	take = lambda a, j: np.take_along_axis(a, j[:, None], axis = 1)[:, 0]
+	# the maximum must have a point on either side of it that is not ignored
+	found = (k == m) & take(inner, k - 1) & take(inner, k) & take(inner, k + 1)
+	x0, x1, x2 = take(x, k - 1), take(x, k), take(x, k + 1)
+	y0, y1, y2 = take(y, k - 1), take(y, k), take(y, k + 1)
+	# parabola through the three points, from their divided differences
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		d1 = (y1 - y0) / (x1 - x0)
+		d2 = (y2 - y1) / (x2 - x1)
+		a = (d2 - d1) / (x2 - x0)
+		b = d1 - a * (x0 + x1)
+		xp = np.where(a < 0., -b / (2. * a), x1)
+		xp = np.clip(xp, x0, x2)
+		yp = np.where(a < 0., y0 + d1 * (xp - x0) + a * (xp - x0) * (xp - x1), y1)
+	bad = ~found | ~np.isfinite(xp)
+	return np.where(bad, np.nan, xp), np.where(bad, np.nan, yp)
+
+# locates the peak of each response function of each simulation from the
+# response curve of each simulation, as a function of the logarithm of the
+# temperature (the annealing schedule is geometric). the curves of every
+# simulation are packed into one array, so that the peaks are located at once
+#
+# df :: data frame containing the response functions of every anneal iteration
+#		of every simulation (see calc_response)
+# bandwidth :: if not None, the curves are smoothed (see inflect.py) with this
+#			   bandwidth before the peaks are located
+# returns a data frame that contains the temperature (temp) and relative height (height_rel) of the
+# peak of each response function of each simulation
+def find_response_peaks (df, props = None, bandwidth = None, n_points = 200):
+
+	if props is None:
+		props = [p for p in response_props if p in df.columns]
+	parm_cols = [c for c in ['jobid', 'simid', 'path', 'XA', 'H', 'ETA', 'RP'] if c in df.columns]
+
+	# split the campaign into the response curves of each simulation
+	sims = []
+	curves = []
+	for key, c in df.groupby(['XA', 'H', 'ETA', 'RP'], sort = True):
+		c = c[np.isfinite(c['temp']) & (c['temp'] > 0.)]
+		if len(c.index) < response_min_points:
+			continue
+		sims.append((c.iloc[0][parm_cols].to_dict(), len(c.index), int(c['id'].max())))
+		curves.append(c)
+	if len(curves) == 0:
+		return pd.DataFrame(columns = parm_cols + response_cols)
+	p = max(len(c.index) for c in curves)
+	x = np.full((len(curves), p), np.nan)
+	for i in range(len(curves)):
+		x[i, :len(curves[i].index)] = np.log(curves[i]['temp'].to_numpy(dtype = float))
+
+	# locate the peak of each response function
+	rows = []
+	for prop in props:
+		y = np.full(x.shape, np.nan)
+		for i in range(len(curves)):
+			y[i, :len(curves[i].index)] = curves[i][prop].to_numpy(dtype = float)
+		if bandwidth is None:
+			loc, height = locate_maxima(x, y)
+		else:
+			lo = np.nanmin(x, axis = 1)
+			hi = np.nanmax(x, axis = 1)
+			grid = lo[:, None] + (hi - lo)[:, None] * np.linspace(0., 1., n_points)[None, :]
+			ys = smooth_curves(np.where(np.isnan(y), np.nan, x), y, grid, bandwidth)
+			loc, height = locate_maxima(grid, ys, edge = bandwidth)
+		for i in range(len(sims)):
+			rows.append(sims[i][0] | {'prop': prop, 'temp': np.exp(loc[i]), 'height_rel': height[i],
+				'n': sims[i][1], 'max_id': sims[i][2]})
+	df_peak = pd.DataFrame(rows, columns = parm_cols + response_cols)
+	return df_peak.sort_values(['XA', 'H', 'ETA', 'RP', 'prop'], ignore_index = True)
+
+# averages the temperature of the peak of each response function over the
+# replicates of each set of simulation parameters. the uncertainty is the
+# standard error of the replicates whose peak was located. the heights of the
+# peaks are relative (see calc_response), so they are not averaged
+def average_response_peaks (df_peak):
+	rows = []
+	for key, g in df_peak.groupby(['XA', 'H', 'ETA', 'prop'], sort = True):
+		g = g[g['temp'].notna()]
+		n = len(g.index)
+		if n == 0:
+			continue
+		rows.append({'XA': key[0], 'H': key[1], 'ETA': key[2], 'prop': key[3],
+			'temp': g['temp'].mean(),
+			'temp_err': g['temp'].std(ddof = 1) / np.sqrt(n) if n > 1 else np.nan,
+			'n': n})
+	return pd.DataFrame(rows, columns = ['XA', 'H', 'ETA', 'prop', 'temp', 'temp_err', 'n'])
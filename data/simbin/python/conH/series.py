@@ -0,0 +1,210 @@
+# filename :: series.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: streams the time series files reported by each anneal iteration
+#			 of a conH simulation (<jobid><simid>.csv, <jobid><simid>_op.csv),
+#			 and reduces each file to summary statistics and a downsampled
+#			 trace in bounded memory
+
+
+import sys, os
+import itertools
+import pandas as pd
+import numpy as np
+from simbin.python.conH.pack import open_anneal_file
+from simbin.python.conH.crawl import scan_anneal_dir
+
+## PARAMETERS
+# number of lines read from a time series file at once
+chunk_lines = 10000
+# maximum number of points kept in the downsampled trace of each file
+max_trace_points = 1000
+# suffix of each time series file reported by the fortran module
+series_files = {'report': ".csv", 'op': "_op.csv"}
+
+
+## CLASS
+# reduces the rows of a time series, which are added in blocks, to the running
+# mean, variance, minimum and maximum of each column and a downsampled trace
+class series_reducer(object):
+	""" initialization for series_reducer object. """
+	def __init__(self, head = None, max_points = max_trace_points):
+		self.head = head # list of columns in the time series
+		ncol = len(head)
+		self.n_rows = 0 # number of rows added
+		self.n = np.zeros(ncol) # number of finite values in each column
+		self.mean = np.zeros(ncol)
+		self.m2 = np.zeros(ncol) # sum of squared differences from the mean
+		self.min = np.full(ncol, np.nan)
+		self.max = np.full(ncol, np.nan)
+		# the trace keeps every stride-th row. once the trace is full, every
+		# other row is dropped and the stride is doubled
+		self.max_points = max_points
+		self.stride = 1
+		self.trace = []
+
+	""" method that adds a block of rows (2D array) to the reduction. """
+	def add(self, block):
+		if len(block) == 0:
+			return
+		finite = np.isfinite(block)
+		n_b = finite.sum(axis = 0)
+		has = n_b > 0
+		x = np.where(finite, block, 0.)
+		mean_b = np.divide(x.sum(axis = 0), n_b, out = np.zeros(len(n_b)), where = has)
+		m2_b = (np.where(finite, block - mean_b, 0.) ** 2).sum(axis = 0)
+		# merge the block with the running statistics (Chan et al.)
+		n = self.n + n_b
+		delta = mean_b - self.mean
+		w = np.divide(n_b, n, out = np.zeros(len(n)), where = n > 0)
+		self.m2 = self.m2 + m2_b + delta ** 2 * self.n * w
+		self.mean = self.mean + delta * w
+		self.n = n
+		self.min = np.fmin(self.min, np.where(finite, block, np.inf).min(axis = 0))
+		self.max = np.fmax(self.max, np.where(finite, block, -np.inf).max(axis = 0))
+		self.min[self.n == 0] = np.nan
+		self.max[self.n == 0] = np.nan
+		# add the rows of the block that fall on the stride to the trace
+		first = (-self.n_rows) % self.stride
+		self.trace.append(block[first::self.stride])
+		self.n_rows += len(block)
+		while sum(len(t) for t in self.trace) > self.max_points:
+			trace = np.concatenate(self.trace)
+			self.trace = [trace[::2]]
+			self.stride *= 2
+
+	""" method that returns the statistics of each column as a dictionary. """
+	def stats(self):
+		var = np.divide(self.m2, self.n - 1, out = np.full(len(self.n), np.nan), where = self.n > 1)
+		mean = np.where(self.n > 0, self.mean, np.nan)
+		stats = {'n': self.n_rows}
+		for j in range(len(self.head)):
+			stats[self.head[j] + '_mean'] = mean[j]
+			stats[self.head[j] + '_std'] = np.sqrt(var[j])
+			stats[self.head[j] + '_min'] = self.min[j]
+			stats[self.head[j] + '_max'] = self.max[j]
+		return stats
+
+	""" method that returns the downsampled trace as a data frame. """
+	def to_dataframe(self):
+		if len(self.trace) == 0:
+			return pd.DataFrame(columns = self.head)
+		return pd.DataFrame(np.concatenate(self.trace), columns = self.head)
+
+
+## FUNCTIONS
+# converts a block of time series lines to an array. lines that cannot be
+# converted (e.g. values that overflowed the fortran format) are skipped
+def parse_series_block (lines, ncol):
+	try:
+		return np.array(','.join(lines).replace("\n", '').split(','), dtype = float).reshape(len(lines), ncol)
+	except ValueError:
+		rows = []
+		for l in lines:
+			try:
+				rows.append(np.array(l.replace("\n", '').split(','), dtype = float))
+			except ValueError:
+				continue
+		return np.array(rows, dtype = float).reshape(len(rows), ncol)
+
+# streams a time series file reported by the fortran module in chunks, and
+# reduces it to the statistics and downsampled trace of each column. lines
+# after the time series (such as the summary written when the simulation
+# closes its files) are ignored. returns the reducer, or None if the file
+# does not exist
+def reduce_series_file (file, chunk = chunk_lines, max_points = max_trace_points):
+	try:
+		f = open_anneal_file(file)
+	except FileNotFoundError:
+		return None
+	with f:
+		head = f.readline().replace(" ", '').replace("\n", '').split(',')
+		red = series_reducer(head, max_points)
+		ncol = len(head)
+		done = False
+		while not done:
+			lines = []
+			for line in itertools.islice(f, chunk):
+				if line.count(',') != ncol - 1:
+					# the end of the time series
+					done = True
+					break
+				lines.append(line)
+			if len(lines) < chunk:
+				done = True
+			red.add(parse_series_block(lines, ncol))
+	return red
+
+# reduces the time series file of every anneal iteration of a simulation.
+# the statistics of each anneal iteration are written to the analysis
+# directory (<jobid><simid>_<kind>_stats.csv), along with the downsampled
+# trace of each anneal iteration (<jobid><simid>_<kind>_trace.csv)
+#
+# kind :: time series file to reduce, either 'report' or 'op'
+# incremental :: if true, only the files that are new or have been modified
+#				 since the last reduction are streamed
+# anneal_index :: anneal iterations of the simulation (see crawl.py)
+def summarize_simulation_series (sim_parm, kind = 'report', incremental = True, anneal_index = None, verbose = False):
+
+	# create the analysis directory, if it does not exist already
+	anal_dir = sim_parm.path + "/anal/"
+	if not os.path.exists(anal_dir):
+		os.mkdir(anal_dir)
+	stats_file = anal_dir + sim_parm.jobid + sim_parm.simid + "_" + kind + "_stats.csv"
+	trace_file = anal_dir + sim_parm.jobid + sim_parm.simid + "_" + kind + "_trace.csv"
+
+	# signature of the time series file of each anneal iteration
+	if anneal_index is None:
+		anneal_index = scan_anneal_dir(sim_parm.path)
+	series_name = sim_parm.jobid + sim_parm.simid + series_files[kind]
+	series_stat = {}
+	for i in sorted(anneal_index):
+		if series_name in anneal_index[i]:
+			series_stat[int(i)] = anneal_index[i][series_name]
+	if len(series_stat) == 0:
+		return None
+
+	# load the results of the previous reduction
+	df_prev = None
+	df_trace_prev = None
+	if incremental and os.path.exists(stats_file) and os.path.exists(trace_file):
+		df_prev = pd.read_csv(stats_file, float_precision = 'round_trip')
+		df_trace_prev = pd.read_csv(trace_file, float_precision = 'round_trip')
+		prev = {int(r.id): (int(r.size), int(r.mtime)) for r in df_prev[['id', 'size', 'mtime']].itertuples(index = False)}
+	else:
+		prev = {}
+	reduce_list = [i for i in series_stat if prev.get(i) != series_stat[i]]
+	if df_prev is not None and len(reduce_list) == 0 and set(prev) == set(series_stat):
+		return df_prev
+
+	# stream each new or modified file
+	rows = []
+	traces = []
+	for i in reduce_list:
+		file = sim_parm.path + "/anneal/{:03d}/".format(i) + series_name
+		red = reduce_series_file(file)
+		if red is None:
+			continue
+		rows.append({'id': i, 'size': series_stat[i][0], 'mtime': series_stat[i][1]} | red.stats())
+		traces.append(red.to_dataframe().assign(id = i))
+		if verbose:
+			print("Reduced {:d} rows ({:s}).".format(red.n_rows, file))
+
+	# merge the results with the results of the previous reduction
+	df = pd.DataFrame(rows)
+	df_trace = pd.concat(traces, ignore_index = True) if len(traces) > 0 else None
+	if df_prev is not None:
+		keep = df_prev['id'].isin([i for i in series_stat if i not in reduce_list])
+		df = pd.concat([df_prev[keep], df], ignore_index = True)
+		keep = df_trace_prev['id'].isin([i for i in series_stat if i not in reduce_list])
+		df_trace = pd.concat([df_trace_prev[keep]] + ([df_trace] if df_trace is not None else []), ignore_index = True)
+	if len(df.index) == 0:
+		return None
+	df = df.sort_values('id', ignore_index = True)
+	df_trace = df_trace[['id'] + [c for c in df_trace.columns if c != 'id']]
+	df_trace = df_trace.sort_values('id', kind = 'stable', ignore_index = True)
+
+	# write the results
+	df.to_csv(stats_file, index = False)
+	df_trace.to_csv(trace_file, index = False)
+	return df
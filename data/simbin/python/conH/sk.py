@@ -0,0 +1,163 @@
+# filename :: sk.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: accumulates the two dimensional structure factor S(kx, ky) of the
+#			 frames of a conH trajectory, by assigning the particles to a density
+#			 grid and using fast fourier transforms
+
+
+import sys, os
+from functools import partial
+import pandas as pd
+import numpy as np
+from simbin.python.conH.traj import open_trajectory
+from simbin.python.conH.cluster import get_ground_state_batches, run_cluster_batches, cluster_batch, ground_state_frames
+
+## PARAMETERS
+# maximum spacing of the density grid. the grid has a power of two number of
+# points along each side, so that the largest wavenumber is at least pi / spacing
+sk_spacing = 0.5
+# half angle (in radians) of the sectors around the field (y-axis) and
+# perpendicular to the field (x-axis) that are averaged for each 1D cut
+sk_sector = np.pi / 12.
+
+
+## CLASS
+# accumulates the structure factor S(k) = |rho(k)|^2 / N over frames, on the
+# wavevectors of the periodic box. the memory used does not depend on the
+# number of frames
+class structure_accumulator(object):
+	""" initialization for structure_accumulator object. """
+	def __init__(self, region, spacing = sk_spacing, grid = None):
+		self.region = region # length of the simulation box
+		if grid is None:
+			grid = int(2 ** np.ceil(np.log2(region / spacing)))
+		self.grid = grid # number of grid points along each side of the box
+		self.dx = region / grid
+		self.frames = 0 # number of frames accumulated
+		self.sum = np.zeros((grid, grid)) # sum of S(k) over frames, in fft order
+		# wavevectors of the grid, in fft order
+		k = 2. * np.pi * np.fft.fftfreq(grid, d = self.dx)
+		self.kx, self.ky = np.meshgrid(k, k, indexing = 'ij')
+		# the cloud-in-cell assignment smooths the density, which is corrected
+		# by dividing by the square of its window function
+		w = np.sinc(k * self.dx / (2. * np.pi)) ** 2
+		self.window = (w[:, None] * w[None, :]) ** 2
+
+	""" method that adds one frame to the accumulator. """
+	def add(self, pos):
+		n = len(pos)
+		self.frames += 1
+		if n == 0:
+			return
+		# assign each particle to the four nearest grid points (cloud-in-cell)
+		g = np.mod(pos, self.region) / self.dx
+		i = np.floor(g).astype(int)
+		f = g - i
+		rho = np.zeros(self.grid * self.grid)
+		for a in (0, 1):
+			for b in (0, 1):
+				w = (f[:, 0] if a else 1. - f[:, 0]) * (f[:, 1] if b else 1. - f[:, 1])
+				idx = ((i[:, 0] + a) % self.grid) * self.grid + (i[:, 1] + b) % self.grid
+				rho += np.bincount(idx, weights = w, minlength = self.grid * self.grid)
+		rho_k = np.fft.fft2(rho.reshape(self.grid, self.grid))
+		self.sum += (np.abs(rho_k) ** 2) / n
+
+	""" method that adds the contents of another accumulator. """
+	def merge(self, other):
+		if other is None:
+			return self
+		self.frames += other.frames
+		self.sum += other.sum
+		return self
+
+	""" method that returns the average structure factor as a 2D map, with the
+		wavevector k = 0 at the center. returns kx, ky (1D) and S (2D, indexed [kx, ky]). """
+	def to_map(self):
+		s = self.sum / max(self.frames, 1) / self.window
+		s[0, 0] = np.nan
+		k = np.fft.fftshift(self.kx[:, 0])
+		return k, k.copy(), np.fft.fftshift(s)
+
+	""" method that returns 1D cuts of the structure factor as a data frame:
+		the radial average (S), the average in the sector around the field
+		(S_par) and the average in the sector perpendicular to the field (S_perp). """
+	def to_dataframe(self, sector = sk_sector):
+		s = (self.sum / max(self.frames, 1) / self.window).ravel()
+		kx = self.kx.ravel()
+		ky = self.ky.ravel()
+		k = np.sqrt(kx ** 2 + ky ** 2)
+		# wavenumber bins, one reciprocal lattice spacing wide, up to the nyquist limit
+		dk = 2. * np.pi / self.region
+		edges = np.arange(dk / 2., np.pi / self.dx, dk)
+		b = np.searchsorted(edges, k, side = 'right') - 1
+		keep = (b >= 0) & (b < len(edges) - 1)
+		angle = np.arctan2(np.abs(kx), np.abs(ky)) # angle between k and the field
+		df = pd.DataFrame({'k': (edges[:-1] + edges[1:]) / 2.})
+		for col, mask in [('S', keep), ('S_par', keep & (angle <= sector)), ('S_perp', keep & (angle >= np.pi / 2. - sector))]:
+			total = np.bincount(b[mask], weights = s[mask], minlength = len(edges) - 1)
+			count = np.bincount(b[mask], minlength = len(edges) - 1)
+			df[col] = np.divide(total, count, out = np.full(len(total), np.nan), where = count > 0)
+		return df
+
+
+## FUNCTIONS
+# accumulates the structure factor of a batch of frames of a trajectory. the
+# positions of the squares (square movie) or the circles (circle movie) are used
+def structure_frames (file, region, frames, spacing = sk_spacing, grid = None):
+	traj = open_trajectory(file)
+	acc = structure_accumulator(region, spacing, grid)
+	for i in frames:
+		acc.add(traj[int(i)]['pos'])
+	return acc
+
+# returns the structure factor accumulated over the frames of a trajectory, in
+# batches of frames across a pool of processes
+#
+# frames :: slice, list or array of frames. if None, all frames are used
+# workers :: number of processes. if None (or less than two), frames are analyzed serially
+def analyze_structure (file, region, frames = None, spacing = sk_spacing, grid = None, workers = None, batch = cluster_batch):
+	ids = np.arange(len(open_trajectory(file)))
+	if frames is not None:
+		ids = ids[frames]
+	jobs = [(file, region, ids[k:k + batch]) for k in range(0, len(ids), batch)]
+	acc = structure_accumulator(region, spacing, grid)
+	for a in run_cluster_batches(jobs, workers, func = partial(structure_frames, spacing = spacing, grid = grid)):
+		acc.merge(a)
+	return acc
+
+# accumulates the structure factor of the ground state trajectory of each
+# simulation. the batches of every simulation are spread across one pool of
+# processes. the 2D map (<jobid><simid>_sk.npz, arrays kx, ky and S) and the 1D
+# cuts (<jobid><simid>_sk.csv) of each simulation are written to its analysis
+# directory. returns the 1D cuts of every simulation, with the parameters of each simulation
+#
+# n_frames :: number of frames at the end of each trajectory that are used. if None, the whole trajectory is used
+# workers :: number of processes that batches of frames are spread across
+def structure_ground_states (simparms, n_squares, n_frames = ground_state_frames, spacing = sk_spacing, workers = None, batch = cluster_batch, verbose = False):
+
+	# accumulate every batch of every simulation at once
+	jobs, owner, found = get_ground_state_batches(simparms, n_squares, n_frames, batch)
+	results = run_cluster_batches(jobs, workers, func = partial(structure_frames, spacing = spacing))
+
+	# write the results of each simulation
+	dfs = []
+	for k in found:
+		p = simparms[k]
+		acc = None
+		for j in range(len(jobs)):
+			if owner[j] == k:
+				acc = results[j] if acc is None else acc.merge(results[j])
+		anal_dir = p.path + "/anal/"
+		if not os.path.exists(anal_dir):
+			os.mkdir(anal_dir)
+		kx, ky, s = acc.to_map()
+		np.savez(anal_dir + p.jobid + p.simid + "_sk.npz", kx = kx, ky = ky, S = s)
+		df = acc.to_dataframe()
+		df.to_csv(anal_dir + p.jobid + p.simid + "_sk.csv", index = False)
+		dfs.append(df.assign(XA = p.XA, H = p.H, ETA = p.ETA, RP = p.RP, id = found[k]))
+		if verbose:
+			print("Calculated structure factor of {:d} frames ({:s}).".format(acc.frames, p.path))
+	if len(dfs) == 0:
+		return pd.DataFrame()
+	return pd.concat(dfs, ignore_index = True)
@@ -0,0 +1,166 @@
+# filename :: state.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: loads the save files written by the fortran module at the end of
+#			 each anneal iteration (see save_position, save_velocity,
+#			 save_chairality and save_state in polsqu2x2_mod.f90), and
+#			 recomputes the order parameters of the saved configuration
+
+
+import sys, os
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+from simbin.python.conH.pack import open_anneal_file, anneal_file_exists
+from simbin.python.conH.crawl import scan_anneal_dir
+from simbin.python.conH.geom import get_region, mer
+from simbin.python.conH.align import align_bins, get_align_edges, get_align_distribution
+
+## PARAMETERS
+# suffix of each save file written by the fortran module
+state_files = {'fpos': "__fposSAVE.dat", 'vel': "__velSAVE.dat", 'chai': "__chaiSAVE.dat", 'sim': "__simSAVE.dat"}
+# values written to the simulation save file, in order (see save_state)
+sim_state_cols = ['timenow', 'timeperiod', 'tempset', 'tl', 'n_events', 'n_col',
+	'n_ghost', 'n_thermostat', 'n_field', 'n_bond', 'n_hard', 'n_well']
+# number of dimensions
+ndim = 2
+
+
+## CLASS
+# configuration of a simulation loaded from its save files. the false
+# position and velocity of each circle are stored as (n, mer, ndim) arrays,
+# the real position of each circle is the false position advanced by the
+# time since the last update (tsl)
+class save_state(object):
+	""" initialization for save_state object. """
+	def __init__(self, sim_parm, anneal_id):
+		self.path = sim_parm.path + "/anneal/{:03d}/".format(int(anneal_id)) + sim_parm.jobid + sim_parm.simid
+		self.id = int(anneal_id)
+		self.chai = read_save_values(self.path + state_files['chai']).astype(int)
+		n = len(self.chai)
+		# the save files loop over dimensions, then squares, then circles
+		fpos = read_save_values(self.path + state_files['fpos'])
+		if len(fpos) != 1 + n * mer * ndim:
+			raise ValueError("save_state :: {:s} does not match the number of squares.".format(self.path + state_files['fpos']))
+		self.tsl = fpos[0]
+		self.fpos = fpos[1:].reshape(ndim, n, mer).transpose(1, 2, 0)
+		vel = read_save_values(self.path + state_files['vel'])
+		if len(vel) != n * mer * ndim:
+			raise ValueError("save_state :: {:s} does not match the number of squares.".format(self.path + state_files['vel']))
+		self.vel = vel.reshape(ndim, n, mer).transpose(1, 2, 0)
+		sim = read_save_values(self.path + state_files['sim'])
+		self.sim = dict(zip(sim_state_cols, sim))
+		self.region = get_region(n, sim_parm.ETA)
+
+	""" method that returns the number of squares. """
+	def __len__(self):
+		return len(self.chai)
+
+	""" method that returns the real position of each circle, as an (n, mer, ndim) array. """
+	def positions(self):
+		return np.mod(self.fpos + self.vel * self.tsl, self.region)
+
+	""" method that returns the dipole of each square (from its second circle to its
+		first circle for A chirality, the reverse for B chirality), as an (n, ndim) array. """
+	def dipoles(self):
+		r = self.positions()
+		dr = r[:, 0] - r[:, 1]
+		dr -= self.region * np.round(dr / self.region)
+		dr[self.chai == 2] *= -1.
+		return dr / np.sqrt((dr ** 2).sum(axis = 1))[:, None]
+
+
+## FUNCTIONS
+# returns the values of a save file as a 1D array. the save files are written
+# with list-directed output, one value per line. files in the unpacked anneal
+# layout are parsed in one pass without reading them line by line, packed files
+# are read from the archive of the simulation
+def read_save_values (file):
+	if os.path.exists(file):
+		return np.fromfile(file, sep = ' ')
+	with open_anneal_file(file) as f:
+		return np.fromstring(f.read(), sep = ' ')
+
+# returns the most recent anneal iteration of a simulation that has written
+# its save files, or None if there are none
+def find_latest_state (sim_parm, anneal_index = None):
+	if anneal_index is None:
+		anneal_index = scan_anneal_dir(sim_parm.path)
+	for i in sorted(anneal_index, reverse = True):
+		path = sim_parm.path + "/anneal/{:03d}/".format(int(i)) + sim_parm.jobid + sim_parm.simid
+		if all(anneal_file_exists(path + s) for s in state_files.values()):
+			return int(i)
+	return None
+
+# recomputes the order parameters of a saved configuration, as the fortran
+# module does at runtime:
+#	nematic :: average of cos(2 (theta_i - theta_j)) over all pairs of squares
+#	mag :: average alignment of the dipole of each square with the field (y-axis)
+# returns a dictionary of order parameters and the alignment distribution
+#
+# bins :: number of bins, or bin edges, of the alignment distribution (see align.py)
+def state_order_parameters (state, bins = align_bins):
+	u = state.dipoles()
+	n = len(u)
+	# the sum over pairs is calculated from the sum over squares
+	z = (u[:, 0] + 1j * u[:, 1]) ** 2
+	nematic = (np.abs(z.sum()) ** 2 - n) / (n * (n - 1)) if n > 1 else 0.
+	# alignment of the dipole with the field, relative to the y-axis
+	theta = np.arctan2(-u[:, 0], u[:, 1])
+	edges = get_align_edges(bins)
+	hist, _ = np.histogram(theta, bins = edges)
+	return {'id': state.id, 'temp': state.sim['tempset'], 'time': state.sim['timenow'],
+		'nematic': nematic, 'mag': u[:, 1].mean()}, get_align_distribution(hist, edges)
+
+# method that recomputes the order parameters of the most recent saved
+# configuration of one simulation, executed by each process in the pool
+def state_worker (index, parm_dict, bins = align_bins, anneal_index = None):
+	sim_parm = SimpleNamespace(**parm_dict)
+	try:
+		i = find_latest_state(sim_parm, anneal_index)
+		if i is None:
+			return index, None, None, "Unable to find SAVE FILES ({:s}).".format(sim_parm.path + "/anneal/")
+		op, df_dist = state_order_parameters(save_state(sim_parm, i), bins)
+	except (OSError, ValueError) as e:
+		return index, None, None, "{:s}: {:s}".format(type(e).__name__, str(e))
+	return index, op, df_dist, None
+
+# recomputes the order parameters of the most recent saved configuration of
+# each simulation across a pool of processes. the alignment distribution of
+# each simulation (<jobid><simid>_statedist.csv) is written to its analysis
+# directory. returns the order parameters of every simulation, with the
+# parameters of each simulation
+#
+# workers :: number of processes. if None (or less than two), simulations are analyzed serially
+# indices :: anneal iterations of each simulation (see crawl.py), in the same order as simparms
+def analyze_saved_states (simparms, bins = align_bins, workers = None, indices = None, verbose = False):
+	parm_list = [dict(p.info()) for p in simparms]
+	if indices is None:
+		indices = [None for _ in parm_list]
+	results = [None for _ in parm_list]
+	if workers is None or workers < 2:
+		for i in range(len(parm_list)):
+			results[i] = state_worker(i, parm_list[i], bins, indices[i])
+	else:
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = [pool.submit(state_worker, i, parm_list[i], bins, indices[i]) for i in range(len(parm_list))]
+			for f in as_completed(futures):
+				r = f.result()
+				results[r[0]] = r
+
+	# write the results of each simulation
+	rows = []
+	for index, op, df_dist, err in results:
+		p = simparms[index]
+		if err is not None:
+			print(err)
+			continue
+		anal_dir = p.path + "/anal/"
+		if not os.path.exists(anal_dir):
+			os.mkdir(anal_dir)
+		df_dist.to_csv(anal_dir + p.jobid + p.simid + "_statedist.csv", index = False)
+		rows.append(dict(p.info()) | op)
+		if verbose:
+			print("Recomputed order parameters of anneal iteration {:03d} ({:s}).".format(op['id'], p.path))
+	return pd.DataFrame(rows)
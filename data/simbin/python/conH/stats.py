@@ -0,0 +1,167 @@
+# filename :: stats.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: averages the replicates of each conH state point with bootstrap
+#			 confidence intervals, and the time series of each anneal
+#			 iteration with block bootstrap confidence intervals
+
+
+import sys, os
+import pandas as pd
+import numpy as np
+
+## PARAMETERS
+# number of bootstrap resamples
+stats_boot = 2000
+# confidence level of each interval
+stats_conf = 0.95
+# maximum number of values resampled at once. groups are resampled in
+# chunks, so that the resampled values of each chunk fit in memory
+stats_max_values = 2 ** 24
+# simulation parameters that identify each state point
+state_keys = ['XA', 'H', 'ETA']
+
+
+## FUNCTIONS
+# packs the values of each group into the start of its row. returns the packed
+# (g, r) array and the number of values in each row
+def pack_rows (values):
+	values = np.asarray(values, dtype = float)
+	order = np.argsort(np.isnan(values), axis = 1, kind = 'stable')
+	values = np.take_along_axis(values, order, axis = 1)
+	return values, (~np.isnan(values)).sum(axis = 1)
+
+# returns the mean of each row, and the percentile bootstrap confidence interval
+# of the mean. every row is resampled at once, in chunks of rows
+#
+# values :: (g, r) array containing the replicates of each group, NaN where padded
+# returns the mean, lower and upper bound of each row. the bounds are NaN for rows
+# with fewer than two values
+def bootstrap_means (values, n_boot = stats_boot, conf = stats_conf, seed = 0):
+	values, n = pack_rows(values)
+	g, r = values.shape
+	rng = np.random.default_rng(seed)
+	with np.errstate(invalid = 'ignore', divide = 'ignore'):
+		mean = np.nansum(values, axis = 1) / n
+	lo = np.full(g, np.nan)
+	hi = np.full(g, np.nan)
+	q = [0.5 * (1. - conf), 0.5 * (1. + conf)]
+	chunk = max(1, stats_max_values // max(n_boot * r, 1))
+	for s in range(0, g, chunk):
+		v = values[s:s + chunk]
+		m = np.maximum(n[s:s + chunk], 1)
+		pick = (rng.random((len(v), n_boot, r)) * m[:, None, None]).astype(int)
+		samp = np.take_along_axis(np.broadcast_to(v[:, None, :], pick.shape), pick, axis = 2)
+		valid = np.arange(r)[None, None, :] < m[:, None, None]
+		means = np.where(valid, samp, 0.).sum(axis = 2) / m[:, None]
+		lo[s:s + chunk], hi[s:s + chunk] = np.quantile(means, q, axis = 1)
+	few = n < 2
+	lo[few] = np.nan
+	hi[few] = np.nan
+	return mean, lo, hi
+
+# returns the mean of each time series, and the moving block bootstrap confidence
+# interval of the mean. each resample joins blocks of consecutive values, drawn
+# at random from the series, so that the correlation within each block is kept
+#
+# series :: (s, t) array containing each time series, NaN where padded
+# block :: length of each block. if None, the length of the blocks of each
+#		   series is the cube root of its length
+def block_bootstrap_means (series, block = None, n_boot = stats_boot, conf = stats_conf, seed = 0):
+	series, n = pack_rows(series)
+	s, t = series.shape
+	rng = np.random.default_rng(seed)
+	if block is None:
+		L = np.maximum(np.round(np.cbrt(n)), 1).astype(int)
+	else:
+		L = np.clip(np.full(s, int(block)), 1, np.maximum(n, 1))
+	with np.errstate(invalid = 'ignore', divide = 'ignore'):
+		mean = np.nansum(series, axis = 1) / n
+	lo = np.full(s, np.nan)
+	hi = np.full(s, np.nan)
+	q = [0.5 * (1. - conf), 0.5 * (1. + conf)]
+	# the sum of each block is the difference of the cumulative sums at its
+	# ends, so that only the start of each block is resampled. the last block
+	# of each resample is cut short so that the resample has the length of the series
+	csum = np.concatenate([np.zeros((s, 1)), np.cumsum(np.nan_to_num(series), axis = 1)], axis = 1)
+	n_full = n // L
+	n_blocks = int(np.ceil(t / L.min())) if s > 0 else 0
+	j = np.arange(n_blocks)
+	chunk = max(1, stats_max_values // max(n_boot * n_blocks, 1))
+	for a in range(0, s, chunk):
+		c = csum[a:a + chunk]
+		m = np.maximum(n[a:a + chunk], 1)
+		l = L[a:a + chunk]
+		length = np.where(j[None, :] < n_full[a:a + chunk, None], l[:, None], np.where(j[None, :] == n_full[a:a + chunk, None], n[a:a + chunk, None] % l[:, None], 0))
+		starts = (rng.random((len(c), n_boot, n_blocks)) * (m - l + 1)[:, None, None]).astype(int)
+		ends = starts + length[:, None, :]
+		c = np.broadcast_to(c[:, None, :], (len(c), n_boot, c.shape[1]))
+		means = (np.take_along_axis(c, ends, axis = 2) - np.take_along_axis(c, starts, axis = 2)).sum(axis = 2) / m[:, None]
+		lo[a:a + chunk], hi[a:a + chunk] = np.quantile(means, q, axis = 1)
+	few = n < 2
+	lo[few] = np.nan
+	hi[few] = np.nan
+	return mean, lo, hi
+
+# arranges the rows of each group of a data frame into the rows of a (g, r)
+# array, padded with NaN, in the order they appear in the data frame
+#
+# returns the first row of each group and the array of each column
+def group_rows (df, cols, keys):
+	g = df.groupby(keys, sort = True)
+	code = g.ngroup().to_numpy()
+	rank = g.cumcount().to_numpy()
+	first = g[keys].first().reset_index(drop = True) if len(df.index) > 0 else pd.DataFrame(columns = keys)
+	arrays = {}
+	for c in cols:
+		a = np.full((g.ngroups, rank.max() + 1 if len(rank) > 0 else 0), np.nan)
+		a[code, rank] = df[c].to_numpy(dtype = float)
+		arrays[c] = a
+	return first, g.size().to_numpy(), arrays
+
+# averages the replicates of each state point, with a bootstrap confidence
+# interval of each average. each row of the data frame is one replicate
+#
+# df :: data frame containing the replicates of every state point (e.g. the
+#		most recent anneal iteration of every simulation in the campaign store)
+# cols :: columns to average, every numeric column (other than the keys) if None
+# keys :: columns that identify each state point (e.g. XA, H, ETA and id, in
+#		  order to average the replicates of each anneal iteration)
+# returns a data frame that contains the number of replicates (n), and the
+# average (<col>) and the bounds of the confidence interval (<col>_lo, <col>_hi)
+# of each column, for each state point
+def replicate_confidence (df, cols = None, keys = state_keys, n_boot = stats_boot, conf = stats_conf, seed = 0):
+	if cols is None:
+		cols = [c for c in df.select_dtypes(include = 'number').columns if c not in keys + ['RP']]
+	first, n, arrays = group_rows(df, cols, keys)
+	out = {}
+	if len(cols) > 0 and len(first.index) > 0:
+		# every column of every state point is resampled at once
+		mean, lo, hi = bootstrap_means(np.concatenate([arrays[c] for c in cols]), n_boot, conf, seed)
+		g = len(first.index)
+		for j, c in enumerate(cols):
+			out[c] = mean[j * g:(j + 1) * g]
+			out[c + '_lo'] = lo[j * g:(j + 1) * g]
+			out[c + '_hi'] = hi[j * g:(j + 1) * g]
+	return first.assign(n = n, **out)
+
+# averages the time series of each anneal iteration (e.g. the downsampled
+# trace written by summarize_simulation_series, see series.py), with a
+# block bootstrap confidence interval of each average
+#
+# key :: column that identifies each time series
+# returns a data frame that contains the number of values in each series (n),
+# and the average (<col>) and confidence interval (<col>_lo, <col>_hi) of each column
+def series_confidence (df, cols = None, key = 'id', block = None, n_boot = stats_boot, conf = stats_conf, seed = 0):
+	if cols is None:
+		cols = [c for c in df.select_dtypes(include = 'number').columns if c not in [key, 'time', 'events']]
+	first, n, arrays = group_rows(df, cols, [key])
+	out = {}
+	if len(cols) > 0 and len(first.index) > 0:
+		mean, lo, hi = block_bootstrap_means(np.concatenate([arrays[c] for c in cols]), block, n_boot, conf, seed)
+		g = len(first.index)
+		for j, c in enumerate(cols):
+			out[c] = mean[j * g:(j + 1) * g]
+			out[c + '_lo'] = lo[j * g:(j + 1) * g]
+			out[c + '_hi'] = hi[j * g:(j + 1) * g]
+	return first.assign(n = n, **out)
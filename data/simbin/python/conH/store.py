@@ -0,0 +1,169 @@
+# filename :: store.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: consolidated, columnar store that contains every anneal
+#			 iteration of every conH simulation in a campaign
+
+
+import sys, os
+import glob
+import pandas as pd
+import numpy as np
+from simbin.python.conH.crawl import get_index_key
+
+## PARAMETERS
+# columns that index each row of the campaign store
+store_index = ['XA', 'H', 'ETA', 'RP', 'id']
+# simulation parameter columns stored with each row
+store_parm_cols = ['jobid', 'simid', 'path', 'XA', 'H', 'ETA', 'RP']
+# format string used to name each partition of the store. the store is
+# partitioned by a-chirality fraction and external field strength, the
+# same way that the simulation directories are named (see conH_simparam.sh)
+partition_format = "a{:03d}h{:02d}.parquet"
+# tolerance used to match simulation parameter values
+store_tol = 1e-6
+
+
+## FUNCTIONS
+# returns the name of the partition file that contains a chirality
+# fraction and external field strength
+def get_partition_file (store_dir, xa, h):
+	return os.path.join(store_dir, partition_format.format(int(round(xa * 100)), int(round(h * 100))))
+
+# returns the chirality fraction and field strength of a partition file
+def parse_partition_file (file):
+	name = os.path.basename(file)
+	return float(name[1:4]) / 100, float(name[5:7]) / 100
+
+# returns the key (see crawl.py) of the simulation of each row of a data frame
+def get_row_keys (df):
+	return [get_index_key(*k) for k in df[store_index[:-1]].itertuples(index = False, name = None)]
+
+# write the rows of a campaign to the store. the rows of each simulation in
+# the data frame replace the rows of the simulation in its partition, the
+# rows of the other simulations in the partition (e.g. simulations that failed
+# to compile, or that were not part of the update) are kept. each partition is
+# only rewritten if its contents have changed since it was last written
+#
+# df :: data frame containing the simulation parameters and every anneal
+#		iteration of each simulation (see update_simulation_results)
+# returns the number of partition files that were written
+def write_campaign_store (df, store_dir, verbose = False):
+
+	# create the store directory, if it does not exist already
+	if not os.path.exists(store_dir):
+		os.makedirs(store_dir)
+
+	# sort the rows according to the store index
+	df = df.sort_values(store_index, ignore_index = True)
+
+	# write each partition
+	n_written = 0
+	for (xa, h), df_part in df.groupby(['XA', 'H'], sort = False):
+		df_part = df_part.reset_index(drop = True)
+		part_file = get_partition_file(store_dir, xa, h)
+		if os.path.exists(part_file):
+			# keep the rows of the simulations that were not recompiled
+			df_prev = pd.read_parquet(part_file)
+			keep = ~pd.Series(get_row_keys(df_prev), dtype = object).isin(set(get_row_keys(df_part))).to_numpy()
+			if keep.any():
+				df_part = pd.concat([df_prev[keep], df_part], ignore_index = True).sort_values(store_index, ignore_index = True)
+			# skip the partition if it has not changed
+			if df_prev.columns.tolist() == df_part.columns.tolist() and df_prev.equals(df_part.astype(df_prev.dtypes.to_dict())):
+				continue
+		df_part.to_parquet(part_file, index = False)
+		n_written += 1
+
+	# inform user
+	if verbose:
+		print("Wrote {:d} partitions of the campaign store ({:s}).".format(n_written, store_dir))
+	return n_written
+
+# load rows from the campaign store
+#
+# columns :: list of columns to load, all columns are loaded if None
+# XA, H, ETA, RP :: value or list of values that rows must match
+# max_temp :: only load rows whose temperature is below the value
+# as_index :: if true, the rows are indexed by (XA, H, ETA, RP, id)
+def load_campaign_store (store_dir, columns = None, XA = None, H = None, ETA = None, RP = None, max_temp = None, as_index = False):
+
+	# get the partitions that match the chirality fraction and field strength,
+	# the other partitions are never opened
+	part_list = []
+	for file in sorted(glob.glob(os.path.join(store_dir, "a[0-9][0-9][0-9]h[0-9][0-9].parquet"))):
+		xa, h = parse_partition_file(file)
+		if (XA is None or np.any(np.isclose(xa, XA, rtol = 0., atol = 0.005))) and (H is None or np.any(np.isclose(h, H, rtol = 0., atol = 0.005))):
+			part_list.append(file)
+	if len(part_list) == 0:
+		print("load_campaign_store :: no partitions in store ({:s}) match the request.".format(store_dir))
+		return pd.DataFrame(columns = columns)
+
+	# range filters pushed down to the parquet reader, so that row groups
+	# outside of the requested parameter values are skipped
+	filters = []
+	match = {}
+	for col, val in [('XA', XA), ('H', H), ('ETA', ETA), ('RP', RP)]:
+		if val is not None:
+			val = np.atleast_1d(val).astype(float)
+			filters.append((col, '>=', val.min() - store_tol))
+			filters.append((col, '<=', val.max() + store_tol))
+			match[col] = val
+	if max_temp is not None:
+		filters.append(('temp', '<', max_temp))
+	if len(filters) == 0:
+		filters = None
+
+	# load the columns that were requested, along with any column needed
+	# for indexing or for matching the parameter values
+	read_cols = None
+	if columns is not None:
+		read_cols = list(columns)
+		extra = list(match.keys())
+		if as_index:
+			extra = extra + store_index
+		read_cols = read_cols + [c for c in dict.fromkeys(extra) if c not in read_cols]
+
+	# read the partitions
+	df = pd.concat([pd.read_parquet(file, columns = read_cols, filters = filters) for file in part_list], ignore_index = True)
+
+	# only keep the rows that match the requested parameter values
+	if len(match) > 0:
+		mask = np.ones(len(df.index), dtype = bool)
+		for col in match:
+			mask &= np.isclose(df[col].to_numpy(dtype = float)[:, None], match[col][None, :], rtol = 0., atol = store_tol).any(axis = 1)
+		df = df[mask].reset_index(drop = True)
+
+	if as_index:
+		df = df.set_index(store_index)
+	if columns is not None:
+		keep = list(columns)
+		if as_index:
+			keep = [c for c in keep if c not in store_index]
+		df = df[keep]
+	return df
+
+# load the most recent anneal iteration of each simulation in the campaign
+# store, which are the rows reported in the status file
+def load_campaign_status (store_dir, columns = None, **kwargs):
+	# the index columns are required to find the most recent anneal iteration
+	read_cols = None
+	if columns is not None:
+		read_cols = list(columns) + [c for c in store_index if c not in columns]
+	df = load_campaign_store(store_dir, columns = read_cols, **kwargs)
+	df = df.sort_values(store_index).groupby(store_index[:-1], sort = False).tail(1)
+	if columns is not None:
+		df = df[list(columns)]
+	return df.reset_index(drop = True)
+
+# export the campaign store to a csv file, for compatibility with the
+# status and summary files
+#
+# status :: if true, only the most recent anneal iteration of each simulation
+#			is exported (same rows as status.csv)
+def export_campaign_csv (store_dir, savefile, columns = None, status = False, **kwargs):
+	if status:
+		df = load_campaign_status(store_dir, columns = columns, **kwargs)
+	else:
+		df = load_campaign_store(store_dir, columns = columns, **kwargs)
+	df.to_csv(savefile, index = False)
+	return df
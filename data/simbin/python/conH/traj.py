@@ -0,0 +1,415 @@
+# filename :: traj.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: random access reader for the xyz movies written by the fortran
+#			 module (record_position_squares, record_position_circles), and
+#			 a compact binary trajectory format converted from the xyz movies
+
+
+import sys, os
+import struct
+import zlib
+import numpy as np
+from simbin.python.conH.pack import split_anneal_path, get_member_offset
+
+## PARAMETERS
+# suffix of the file that contains the cached frame index of a movie
+index_suffix = ".idx.npz"
+# number of bytes searched for line breaks at once while indexing a movie
+index_chunk = 1 << 26
+# columns of each line of the square movie (<jobid><simid>_squmov.xyz):
+# square number, position (xy), orientation quaternion (xyzw), chirality,
+# chirality color (RGB) and alignment with the external field
+squ_fields = {'id': 0, 'pos': slice(1, 3), 'quat': slice(3, 7), 'chai': 7, 'color': slice(8, 11), 'mag': 11}
+# columns of each line of the circle movie (<jobid><simid>_sphmov.xyz):
+# position (xy), polarity color (RGB) and chirality color (RGB)
+sph_fields = {'pos': slice(0, 2), 'pol_color': slice(2, 5), 'chiral_color': slice(5, 8)}
+# fields and number of columns of each type of movie
+movie_types = {'squ': (squ_fields, 12), 'sph': (sph_fields, 8)}
+# colors written by the fortran module (see polsqu2x2_mod.f90)
+color_red = [1., 0.15, 0.15]
+color_blue = [0.1, 1., 0.3]
+color_green = [0., 0., 1.]
+color_orange = [1., 0., 0.64]
+color_white = [0.75, 0.75, 0.75]
+# color of each chirality (0 :: none, 1 :: A, 2 :: B)
+chai_colors = np.array([color_white, color_green, color_orange])
+# color of each polarity (-1 :: negative, 0 :: neutral, 1 :: positive)
+pol_colors = np.array([color_red, color_white, color_blue])
+# suffix of binary trajectory files
+bin_suffix = ".trj"
+# binary trajectory header :: magic, version, type of movie, compression
+# flag, number of particles, number of frames and offset of the frame index
+bin_magic = b'CONHTRJ1'
+bin_version = 1
+bin_header = '<8sBBBxqqq'
+bin_kinds = ['squ', 'sph']
+# number of values stored for each particle in each frame of a binary
+# trajectory :: position (xy), and the orientation of each square
+bin_width = {'squ': 3, 'sph': 2}
+# zlib compression level used for compressed binary trajectories
+bin_level = 6
+
+
+## CLASS
+# movie written by the fortran module. the byte offset of each frame is
+# indexed once and cached next to the movie, frames are then read from the
+# memory mapped movie without parsing the frames that come before them
+class xyz_trajectory(object):
+	""" initialization for xyz_trajectory object. """
+	def __init__(self, file, kind = None, cache = True):
+		self.file = file # path to the movie
+		# determine the type of movie from the file name
+		if kind is None:
+			kind = 'squ' if file.endswith("_squmov.xyz") else 'sph'
+		self.kind = kind
+		self.fields, self.ncol = movie_types[kind]
+		# memory map the movie, either from the file or from the simulation archive
+		self.base, self.offset, self.size, self.index_file = locate_movie(file)
+		self.mm = np.memmap(self.base, dtype = np.uint8, mode = 'r', offset = self.offset, shape = (self.size,)) if self.size > 0 else np.empty(0, dtype = np.uint8)
+		# load or build the frame index
+		self.start, self.data, self.end, self.n = load_frame_index(self.mm, self.index_file if cache else None)
+
+	""" method that returns the number of frames in the movie. """
+	def __len__(self):
+		return len(self.start)
+
+	""" method that returns the raw values of one frame, as an (n, ncol) array. """
+	def read_frame(self, i):
+		return parse_frame(self.mm[self.data[i]:self.end[i]], self.n[i], self.ncol)
+
+	""" method that returns the raw values of several frames, as an (frames, n, ncol) array.
+		frames is a slice, a list of frame numbers or an array of frame numbers. """
+	def read_frames(self, frames):
+		ids = np.arange(len(self))[frames] if isinstance(frames, slice) else np.atleast_1d(frames)
+		if len(ids) == 0:
+			return np.empty((0, 0, self.ncol))
+		n = self.n[ids]
+		if np.any(n != n[0]):
+			raise ValueError("xyz_trajectory :: frames contain a different number of particles.")
+		data = np.empty((len(ids), n[0], self.ncol))
+		for k in range(len(ids)):
+			data[k] = self.read_frame(ids[k])
+		return data
+
+	""" method that returns the fields (see squ_fields, sph_fields) of one frame or
+		several frames as a dictionary of arrays. """
+	def __getitem__(self, frames):
+		if isinstance(frames, (int, np.integer)):
+			data = self.read_frame(int(frames) % len(self))
+		else:
+			data = self.read_frames(frames)
+		return {k: data[..., v] for k, v in self.fields.items()}
+
+
+# compact binary trajectory (see convert_trajectory). each frame stores the
+# position and orientation of each particle as float32, the chirality and
+# polarity of each particle are stored once. frames are read from the memory
+# mapped file through the frame index at the end of the file, and are
+# returned in the same format as xyz_trajectory
+class bin_trajectory(object):
+	""" initialization for bin_trajectory object. """
+	def __init__(self, file):
+		self.file = file # path to the trajectory
+		self.base, offset, size, index_file = locate_movie(file)
+		self.mm = np.memmap(self.base, dtype = np.uint8, mode = 'r', offset = offset, shape = (size,))
+		magic, version, kind, compress, n, n_frames, index_offset = struct.unpack_from(bin_header, self.mm, 0)
+		if magic != bin_magic or version != bin_version:
+			raise ValueError("bin_trajectory :: {:s} is not a binary trajectory.".format(file))
+		self.kind = bin_kinds[kind]
+		self.fields, self.ncol = movie_types[self.kind]
+		self.width = bin_width[self.kind]
+		self.compress = bool(compress)
+		self.n_particles = n
+		# values stored once for each particle
+		pos = struct.calcsize(bin_header)
+		if self.kind == 'squ':
+			self.id = np.frombuffer(self.mm, dtype = '<i4', count = n, offset = pos)
+			pos += 4 * n
+		else:
+			self.pol = np.frombuffer(self.mm, dtype = 'i1', count = n, offset = pos)
+			pos += n
+		self.chai = np.frombuffer(self.mm, dtype = 'i1', count = n, offset = pos)
+		# byte offset and size of each frame
+		index = np.frombuffer(self.mm, dtype = '<u8', count = 2 * n_frames, offset = index_offset).reshape(n_frames, 2)
+		self.offset = index[:, 0].astype(np.int64)
+		self.nbytes = index[:, 1].astype(np.int64)
+		self.n = np.full(n_frames, n, dtype = np.int64)
+
+	""" method that returns the number of frames in the trajectory. """
+	def __len__(self):
+		return len(self.offset)
+
+	""" method that returns the stored values of one frame as an (n, width) float32
+		array, which is a view of the memory mapped file if it is not compressed. """
+	def read_coords(self, i):
+		if self.compress:
+			buf = zlib.decompress(self.mm[self.offset[i]:self.offset[i] + self.nbytes[i]])
+			return np.frombuffer(buf, dtype = '<f4').reshape(self.n_particles, self.width)
+		return np.frombuffer(self.mm, dtype = '<f4', count = self.n_particles * self.width, offset = int(self.offset[i])).reshape(self.n_particles, self.width)
+
+	""" method that returns the values of one frame, in the same format as
+		the xyz movie, as an (n, ncol) array. """
+	def read_frame(self, i):
+		c = self.read_coords(i)
+		data = np.empty((self.n_particles, self.ncol))
+		if self.kind == 'squ':
+			phi = c[:, 2].astype(float)
+			data[:, 0] = self.id
+			data[:, 1:3] = c[:, 0:2]
+			data[:, 3:5] = 0.
+			data[:, 5] = np.sin(phi / 2.)
+			data[:, 6] = np.cos(phi / 2.)
+			data[:, 7] = self.chai
+			data[:, 8:11] = chai_colors[self.chai]
+			# alignment of the chirality-aware orientation with the field (y-axis)
+			data[:, 11] = np.where(self.chai == 2, -1., 1.) * np.sin(phi)
+		else:
+			data[:, 0:2] = c
+			data[:, 2:5] = pol_colors[self.pol + 1]
+			data[:, 5:8] = chai_colors[self.chai]
+		return data
+
+	""" method that returns the values of several frames, as an (frames, n, ncol) array. """
+	def read_frames(self, frames):
+		ids = np.arange(len(self))[frames] if isinstance(frames, slice) else np.atleast_1d(frames)
+		data = np.empty((len(ids), self.n_particles, self.ncol))
+		for k in range(len(ids)):
+			data[k] = self.read_frame(ids[k])
+		return data
+
+	""" method that returns the fields of one frame or several frames as a dictionary
+		of arrays, in the same format as xyz_trajectory. """
+	def __getitem__(self, frames):
+		if isinstance(frames, (int, np.integer)):
+			data = self.read_frame(int(frames) % len(self))
+		else:
+			data = self.read_frames(frames)
+		return {k: data[..., v] for k, v in self.fields.items()}
+
+
+## FUNCTIONS
+# returns the orientation (angle relative to the x-axis) of each square
+# from the quaternion written to the square movie
+def get_orientation (quat):
+	return 2. * np.arctan2(quat[..., 2], quat[..., 3])
+
+# returns the position of each row of colors in a table of colors
+def match_colors (colors, table):
+	return np.argmin(((colors[:, None, :] - table[None, :, :]) ** 2).sum(axis = 2), axis = 1)
+
+# returns the file that contains a movie, the offset and size of the movie in
+# the file, and the path of the cached frame index. movies in the unpacked
+# anneal layout are read directly, packed movies are read from the archive
+def locate_movie (file):
+	if os.path.exists(file):
+		return file, 0, os.path.getsize(file), file + index_suffix
+	sim_path, member = split_anneal_path(file)
+	loc = None
+	if sim_path is not None:
+		loc = get_member_offset(sim_path, member)
+	if loc is None:
+		raise FileNotFoundError(file)
+	zip_path, offset, size = loc
+	return zip_path, offset, size, os.path.join(sim_path, member.replace('/', '_') + index_suffix)
+
+# converts the bytes of the particle lines of one frame to an (n, ncol) array.
+# values that overflowed the fortran format are converted to NaN
+def parse_frame (buf, n, ncol):
+	tokens = buf.tobytes().split()
+	try:
+		values = np.array(tokens, dtype = float)
+	except ValueError:
+		values = np.empty(len(tokens))
+		for j in range(len(tokens)):
+			try:
+				values[j] = float(tokens[j])
+			except ValueError:
+				values[j] = np.nan
+	if len(values) != n * ncol:
+		raise ValueError("xyz_trajectory :: frame contains {:d} values, expected {:d}.".format(len(values), n * ncol))
+	return values.reshape(n, ncol)
+
+# index the frames of a movie, starting from a byte position in the movie.
+# returns the byte position of the start of each frame, the start and end
+# of the particle lines of each frame, and the number of particles in each frame.
+# frames that have not been completely written are not indexed
+def index_frames (mm, pos = 0, chunk = index_chunk):
+	start, data, end, n = [], [], [], []
+	size = len(mm)
+	# line breaks after the start of the current frame
+	nl = np.empty(0, dtype = np.int64)
+	k = 0 # position of the next line break in nl
+	scan = pos # byte position up to which line breaks have been found
+	while True:
+		# the count line, the comment line and the particle lines of the frame
+		# must be in the line breaks that have been found
+		need = 2
+		if len(nl) - k >= 1:
+			try:
+				need = int(mm[pos:nl[k]].tobytes()) + 2
+			except ValueError:
+				# the count line is not an integer, stop indexing
+				break
+		if len(nl) - k < need:
+			if scan >= size:
+				break
+			nl = np.concatenate((nl[k:], scan + np.flatnonzero(mm[scan:scan + chunk] == 10)))
+			k = 0
+			scan = min(scan + chunk, size)
+			continue
+		start.append(pos)
+		data.append(nl[k + 1] + 1)
+		end.append(nl[k + need - 1] + 1)
+		n.append(need - 2)
+		pos = nl[k + need - 1] + 1
+		k += need
+	return np.array(start, dtype = np.int64), np.array(data, dtype = np.int64), np.array(end, dtype = np.int64), np.array(n, dtype = np.int64)
+
+# load the cached frame index of a movie. the movie is appended to while the
+# simulation is running, so frames written since the index was cached are
+# indexed and the cache is updated. the index is rebuilt if the movie has
+# been rewritten
+def load_frame_index (mm, index_file = None):
+	index = None
+	if index_file is not None and os.path.exists(index_file):
+		with np.load(index_file) as f:
+			index = [f['start'], f['data'], f['end'], f['n']]
+		# the cached index is valid if the movie is at least as long, and the
+		# last indexed frame still ends with a line break
+		last = index[2][-1] if len(index[2]) > 0 else 0
+		if last > len(mm) or (last > 0 and mm[last - 1] != 10):
+			index = None
+		elif last > 0:
+			# the count line of the last indexed frame must also be unchanged
+			try:
+				if int(mm[index[0][-1]:index[1][-1]].tobytes().split()[0]) != index[3][-1]:
+					index = None
+			except (ValueError, IndexError):
+				index = None
+	if index is None:
+		index = list(index_frames(mm))
+		changed = True
+	else:
+		pos = index[2][-1] if len(index[2]) > 0 else 0
+		new = index_frames(mm, pos)
+		changed = len(new[0]) > 0
+		index = [np.concatenate((a, b)) for a, b in zip(index, new)]
+	if index_file is not None and changed:
+		try:
+			np.savez(index_file, start = index[0], data = index[1], end = index[2], n = index[3])
+		except OSError:
+			pass
+	return index
+
+# convert an xyz movie to a binary trajectory. the frames are converted one
+# at a time, so the movie is never loaded into memory at once
+#
+# bin_file :: path to the binary trajectory. if None, the binary trajectory
+#			  is written next to the movie (e.g. _squmov.xyz -> _squmov.trj)
+# compress :: if true, each frame is compressed (zlib)
+# returns the path to the binary trajectory
+def convert_trajectory (xyz_file, bin_file = None, compress = False, verbose = False):
+
+	traj = xyz_trajectory(xyz_file, cache = False)
+	if bin_file is None:
+		bin_file = os.path.splitext(xyz_file)[0] + bin_suffix
+	if len(traj) > 0 and np.any(traj.n != traj.n[0]):
+		raise ValueError("convert_trajectory :: frames of {:s} contain a different number of particles.".format(xyz_file))
+	n = int(traj.n[0]) if len(traj) > 0 else 0
+
+	# the values stored once for each particle are taken from the first frame
+	if len(traj) > 0:
+		frame = traj.read_frame(0)
+	else:
+		frame = np.empty((0, traj.ncol))
+	if traj.kind == 'squ':
+		static = [frame[:, 0].astype('<i4'), frame[:, 7].astype('i1')]
+	else:
+		static = [(match_colors(frame[:, 2:5], pol_colors) - 1).astype('i1'), match_colors(frame[:, 5:8], chai_colors).astype('i1')]
+
+	# write the header, the values stored once, each frame, then the frame index
+	tmp_file = bin_file + ".tmp"
+	index = np.empty((len(traj), 2), dtype = '<u8')
+	try:
+		with open(tmp_file, 'wb') as f:
+			f.write(struct.pack(bin_header, bin_magic, bin_version, bin_kinds.index(traj.kind), int(compress), n, len(traj), 0))
+			for a in static:
+				f.write(a.tobytes())
+			# align the frames to 8 bytes
+			f.write(b'\x00' * (-f.tell() % 8))
+			for i in range(len(traj)):
+				if i > 0:
+					frame = traj.read_frame(i)
+				if traj.kind == 'squ':
+					if np.any(frame[:, 7] != static[1]):
+						raise ValueError("convert_trajectory :: chirality of squares in {:s} changed in frame {:d}.".format(xyz_file, i))
+					coords = np.column_stack((frame[:, 1:3], get_orientation(frame[:, 3:7])))
+				else:
+					coords = frame[:, 0:2]
+				buf = coords.astype('<f4').tobytes()
+				if compress:
+					buf = zlib.compress(buf, bin_level)
+				index[i] = (f.tell(), len(buf))
+				f.write(buf)
+			f.write(b'\x00' * (-f.tell() % 8))
+			index_offset = f.tell()
+			f.write(index.tobytes())
+			f.seek(0)
+			f.write(struct.pack(bin_header, bin_magic, bin_version, bin_kinds.index(traj.kind), int(compress), n, len(traj), index_offset))
+	except ValueError:
+		os.remove(tmp_file)
+		raise
+	os.replace(tmp_file, bin_file)
+
+	# inform user
+	if verbose:
+		print("Converted {:d} frames ({:s}, {:.1f} MB -> {:.1f} MB).".format(len(traj), bin_file, traj.size / 1e6, os.path.getsize(bin_file) / 1e6))
+	return bin_file
+
+# convert every xyz movie of every anneal iteration of a simulation
+#
+# remove :: if true, each movie is removed once it has been converted
+def convert_simulation_trajectories (sim_parm, compress = False, remove = False, verbose = False):
+	anneal_dir = os.path.join(sim_parm.path, "anneal")
+	n_converted = 0
+	for kind in movie_types:
+		name = sim_parm.jobid + sim_parm.simid + "_" + kind + "mov.xyz"
+		try:
+			with os.scandir(anneal_dir) as it:
+				ids = sorted(e.name for e in it if e.is_dir() and len(e.name) == 3 and e.name.isdigit())
+		except OSError:
+			return n_converted
+		for i in ids:
+			xyz_file = os.path.join(anneal_dir, i, name)
+			if not os.path.exists(xyz_file):
+				continue
+			try:
+				convert_trajectory(xyz_file, compress = compress, verbose = verbose)
+			except ValueError as e:
+				# the movie is malformed, do not remove it
+				print("Unable to convert MOVIE ({:s}). {:s}".format(xyz_file, str(e)))
+				continue
+			n_converted += 1
+			if remove:
+				os.remove(xyz_file)
+				if os.path.exists(xyz_file + index_suffix):
+					os.remove(xyz_file + index_suffix)
+	return n_converted
+
+# opens a trajectory, either an xyz movie or a binary trajectory
+def open_trajectory (file, kind = None):
+	if file.endswith(bin_suffix):
+		return bin_trajectory(file)
+	return xyz_trajectory(file, kind = kind)
+
+# returns the trajectory of an anneal iteration of a simulation. the binary
+# trajectory is returned if it exists, otherwise the xyz movie is returned
+#
+# kind :: type of movie, either 'squ' (squares) or 'sph' (circles)
+def load_trajectory (sim_parm, anneal_id, kind = 'squ'):
+	file = sim_parm.path + "/anneal/{:03d}/".format(int(anneal_id)) + sim_parm.jobid + sim_parm.simid + "_" + kind + "mov"
+	try:
+		return bin_trajectory(file + bin_suffix)
+	except FileNotFoundError:
+		return xyz_trajectory(file + ".xyz", kind = kind)
@@ -11,11 +11,66 @@ import pandas as pd
 import numpy as np
 import glob
 import matplotlib.pyplot as plt
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simbin.python.conH.store import write_campaign_store, store_parm_cols
+from simbin.python.conH.reader import read_result_files
+from simbin.python.conH.crawl import crawl_campaign, scan_anneal_dir, scan_subdirs, get_campaign_dir, get_anneal_index
 # from simparam import conH_simparm as parm
 
 ## PARAMETERS
 # integer the specifies the number of points contained in a data series plot
 max_ds_points = 10000
+# header written to each anneal file by the fortran module (see open_files)
+anneal_header = ['id', 'time', 'set', 'temp', 'te', 'te_fluc', 'pot', 'pot_fluc',
+	'ke', 'ke_fluc', 'poly', 'poly_fluc', 'ht', 'ht_fluc', 'anti', 'anti_fluc',
+	'ds', 'ds_fluc', 'percy', 'percy_fluc', 'nclust', 'nclust_fluc',
+	'nematic', 'nem_fluc', 'mag', 'mag_fluc']
+# data types of anneal file columns, columns that are not listed are floats
+anneal_dtypes = {'id': int}
+# properties plotted in the time series panel of each simulation summary
+time_series_props = ['temp', 'te', 'pot', 'nclust', 'nematic', 'mag']
+# properties plotted on a log scale
+log_time_series = ['temp']
+# axis labels used for time series properties
+time_series_labels = {'temp': '$T^{*}$', 'set': '$T^{*}_{set}$', 'te': '$E^{*}_{total}$',
+	'pot': '$U^{*}$', 'ke': '$K^{*}$', 'poly': 'Polymerization', 'ht': 'Head-to-Tail',
+	'anti': 'Anti-Parallel', 'ds': 'Double-Stranded', 'nclust': 'Clusters',
+	'nematic': 'Nematic', 'mag': 'Magnetization ($M$)'}
+
+
+## CLASS
+# columnar accumulator for the results of anneal files. each column of the
+# anneal file header is stored in a preallocated array, so that the summary
+# of a simulation is built with one data frame construction rather than by
+# concatenating one data frame per anneal iteration
+class anneal_accumulator(object):
+	""" initialization for anneal_accumulator object. """
+	def __init__(self, head = None, size = 0):
+		if head is None:
+			head = anneal_header
+		self.head = list(head) # list containing the columns of the anneal file
+		self.n = 0 # number of rows stored in the accumulator
+		# preallocated array containing the results of each row
+		self.data = np.empty((size, len(self.head)), dtype = float)
+
+	""" method that adds the results of one anneal iteration to the accumulator. """
+	def add(self, i, results):
+		# grow the preallocated array, if it is full
+		if self.n == len(self.data):
+			self.data = np.resize(self.data, (max(2 * self.n, 1), len(self.head)))
+		self.data[self.n] = results
+		# the id column is assigned from the anneal directory
+		if 'id' in self.head:
+			self.data[self.n, self.head.index('id')] = i
+		self.n += 1
+
+	""" method that returns the accumulated results as a data frame. """
+	def to_dataframe(self):
+		columns = {}
+		for j in range(len(self.head)):
+			columns[self.head[j]] = self.data[:self.n, j].astype(anneal_dtypes.get(self.head[j], float))
+		return pd.DataFrame(columns)
 
 
 ## FUNCTIONS
@@ -23,49 +78,96 @@ max_ds_points = 10000
 # subroutine returns a np array that contains that sorted values that
 # match the sub-directory naming convention
 def get_dir_params(dir_path, subdir_regex):
-	# name of directory regex used with globbing
-	dir_regex = dir_path + subdir_regex
-	# get list of directories that match the subdirectory regular expression
-	dir_list = glob.glob(dir_regex + "*")
+	# get list of directories that match the subdirectory prefix
+	dir_list = [name for name, _ in scan_subdirs(dir_path) if name.startswith(subdir_regex)]
 	# parse the parameters from the directory list
 	param_list = np.empty(len(dir_list), dtype = float)
 	for i in range(len(dir_list)):
-		s = dir_list[i].replace(dir_regex, '')
+		s = dir_list[i].replace(subdir_regex, '', 1)
 		s = float(s)
 		param_list[i] = s / 100
 
 	# return the sorted list to the user
 	return np.sort(param_list)
 
+# method that resamples a step series onto evenly spaced points in time.
+# each value holds from the end of the previous step until the end of its step
+#
+# time :: length of each step (e.g. the simulation time of each anneal
+#		  iteration), or the time at the end of each step if cumulative
+# values :: array containing the value of one (1D) or several (2D, steps
+#			by properties) properties during each step
+# returns the resampled time points and the values at each time point
+def resample_time_series (time, values, n_points = max_ds_points, cumulative = False):
+	time = np.asarray(time, dtype = float)
+	values = np.asarray(values)
+	# time at the end of each step
+	if cumulative:
+		step_end = time
+	else:
+		step_end = np.cumsum(time)
+	# evenly spaced points between zero and the end of the last step
+	ds_time = np.linspace(0, step_end[-1], num = n_points)
+	# index of the step that each point falls in
+	j = np.searchsorted(step_end, ds_time, side = 'left')
+	j = np.minimum(j, len(step_end) - 1)
+	return ds_time, values[j]
+
+# method that parses a time series file reported by the fortran module
+# (<jobid><simid>.csv or <jobid><simid>_op.csv) into a data frame. lines
+# after the time series (such as the summary written when the simulation
+# closes its files) are ignored
+def load_time_series_file (file):
+	f = open(file, 'r')
+	head = f.readline().replace(" ", '').replace("\n", '').split(',')
+	lines = []
+	for line in f:
+		if line.count(',') != len(head) - 1:
+			break
+		lines.append(line)
+	f.close()
+	if len(lines) == 0:
+		return pd.DataFrame(columns = head)
+	data = np.array(','.join(lines).replace("\n", '').replace("NaN", "0.").split(','), dtype = float)
+	return pd.DataFrame(data.reshape(len(lines), len(head)), columns = head)
+
+# method that generates one figure containing a panel for the time series
+# of each property of a simulation
+#
+# time :: length of each step, or the time at the end of each step if cumulative
+# df :: data frame (e.g. simulation summary or report file) containing each property
+# props :: list of columns in data frame to plot, one panel per column
+def plot_time_series (save_path, time, df, props, cumulative = False, title = None):
+
+	# resample all properties at once
+	props = [p for p in props if p in df.columns]
+	if len(props) == 0:
+		return
+	ds_time, ds_vals = resample_time_series(time, df[props].to_numpy(dtype = float), cumulative = cumulative)
+
+	# plot the results, one panel per property
+	fig, axs = plt.subplots(len(props), 1, sharex = True, squeeze = False, figsize = (6.4, 1.6 * len(props) + 1.))
+	for k in range(len(props)):
+		ax = axs[k, 0]
+		ax.plot(ds_time, ds_vals[:, k])
+		if props[k] in log_time_series:
+			ax.set_yscale('log')
+		ax.set_ylabel(time_series_labels.get(props[k], props[k]), fontsize = 10)
+	axs[-1, 0].set_xlabel('Simulation Time ($s^{{*}}$)', fontsize=14)
+	if title is None:
+		title = 'Annealing Simulation Properties'
+	plt.suptitle(title, fontsize=14)
+	plt.savefig(save_path, bbox_inches='tight', dpi = 200)
+	plt.close(fig)
+
 # method that generates a plot of time series data from simulations
 def plot_temp_time_series (save_path, time, temp):
 
 	# TODO :: add simid and job id to method call, add to plot sub titles
-	# TODO :: generalize method for all properties
 	# TODO :: save data series with plot
 
-	# determine the maximum number of events that have occured
-	tot_time = 0
-	for i in range(len(time)):
-		tot_time += time[i]
-
-	# create empty list that contains the total number ds points
-	ds_time = np.linspace(0, tot_time, num=max_ds_points)
-	ds_temp = np.empty(max_ds_points, dtype = float)
-
-	# loop through temperature points, assign temperature corresponding to time
-	j = 0 
-	# print(time)
-	curr_time = time[j]
-	for i in range(len(ds_time)):
-
-		# determine if the time should be incremented
-		if ds_time[i] > curr_time:
-			j += 1 
-			curr_time += time[j]
-
-		# determine temperature that corresponds to the current time
-		ds_temp[i] = temp[j]
+	# resample the temperature at each point in time
+	ds_time, ds_temp = resample_time_series(time, temp)
 
 	# plot the results
 	fig = plt.figure()
@@ -80,139 +182,251 @@ def plot_temp_time_series (save_path, time, temp):
 	plt.savefig(save_path, bbox_inches='tight', dpi = 200)
 	plt.close(fig)
 
-# method used to compile results from the annealing simulation, 
-# then report the current state of the simulation to the user
-def compile_simulation_results (sim_parm):
-
-	# # parse the simid from the splice file
-	# simid = glob.glob(sim_dir + "*.spl")
-	# simid = simid[0].replace(sim_dir, '').replace(".spl", '')
-
-	# # parse the job id from the initial simulations
-	# jobid = glob.glob(sim_parm.path + "/anneal/init/*" + simid + "__simSAVE.dat")
-	# if len(jobid) == 0:
-	# 	print("Unable to parse JOBID from DIR ({sim_dir}). Initial simulation directory does not exist.")
-	# 	return None
-	# jobid = jobid[0].replace(sim_dir + "anneal/init/", '').replace(simid + "__simSAVE.dat", '')
+# method that loads the manifest of anneal iterations that have already been
+# ingested into a simulation's summary file. returns a dictionary that maps each
+# anneal iteration to the stat signature (size, mtime) of its anneal file
+def load_anneal_manifest (manifest_file):
+	manifest = {}
+	if not os.path.exists(manifest_file):
+		return manifest
+	df = pd.read_csv(manifest_file)
+	for i, size, mtime in zip(df['id'], df['size'], df['mtime']):
+		manifest[int(i)] = (int(size), int(mtime))
+	return manifest
+
+# method that writes the manifest of ingested anneal iterations to file
+def save_anneal_manifest (manifest_file, manifest):
+	ids = sorted(manifest.keys())
+	df = pd.DataFrame({'id': ids,
+		'size': [manifest[i][0] for i in ids],
+		'mtime': [manifest[i][1] for i in ids]})
+	df.to_csv(manifest_file, index = False)
+
+# method used to compile results from the annealing simulation into
+# a summary of every anneal iteration. returns the summary as a data frame
+#
+# incremental :: if true, only the anneal files that are new or have been
+#				 modified since the last update (according to the manifest
+#				 stored in the analysis directory) are parsed and merged into
+#				 the existing summary file. otherwise, the summary is rebuilt
+# anneal_index :: anneal iterations of the simulation from the campaign index
+#				  (see crawl.py). if None, the anneal directory is scanned
+def compile_simulation_summary (sim_parm, incremental = True, anneal_index = None):
 
 	# create the analysis directory, if it does not exist already
-	if not os.path.exists(sim_parm.path + "/anal/"):
-		os.mkdir(sim_parm.path + "/anal/")
-
-	# get the list of directories in the annealing directory that
-	# match the naming convention
-	anneal_dir_list = glob.glob(sim_parm.path + "/anneal/[0-9][0-9][0-9]/")
-	anneal_int_list = np.empty(len(anneal_dir_list), dtype=int)
-	for i in range(len(anneal_dir_list)):
-		anneal_int_list[i] = int(anneal_dir_list[i].\
-			replace(sim_parm.path + "/anneal/", '').replace('/', ''))
-	anneal_int_list = np.sort(anneal_int_list)
-
-	# parse the header for the anneal file from the first simulation
-	anneal_dir = "/anneal/{:03d}/".format(anneal_int_list[0])
-	anneal_file = sim_parm.path + anneal_dir + sim_parm.jobid + sim_parm.simid + "_anneal.csv"
-	if not os.path.exists(anneal_file):
-		print("Unable to open ANNEAL FILE ({anneal_file}). Cannot parse header.")
-		return None
-	f = open(anneal_file, 'r')
-	while True:
-		line = f.readline()
-		head = line.replace(" ", '').replace("\n", '').split(',')
-		break
-	f.close()
-
-	# create empty data frame that will contain all of the simulation results
-	df = pd.DataFrame(columns = head)
-
-	# loop through each anneal directory, get the simulation results from the anneal file
-	for i in anneal_int_list:
-
-		# establish the annealing file
-		anneal_dir = "/anneal/{:03d}/".format(anneal_int_list[i])
-		anneal_file = sim_parm.path + anneal_dir + sim_parm.jobid + sim_parm.simid + "_anneal.csv"
-		# print(anneal_dir)
-
-		# establish that the file exists
-		if not os.path.exists(anneal_file):
-			# if the path does not exist, break from the loop
+	anal_dir = sim_parm.path + "/anal/"
+	if not os.path.exists(anal_dir):
+		os.mkdir(anal_dir)
+	sim_sum_file = anal_dir + sim_parm.jobid + sim_parm.simid + "_sum.csv"
+	manifest_file = anal_dir + sim_parm.jobid + sim_parm.simid + "_manifest.csv"
+	timeseries_file = anal_dir + sim_parm.jobid + sim_parm.simid + "_timeseries.png"
+
+	# get the anneal iterations of the simulation, and the stat signature
+	# of each anneal file that exists
+	if anneal_index is None:
+		anneal_index = scan_anneal_dir(sim_parm.path)
+	anneal_name = sim_parm.jobid + sim_parm.simid + "_anneal.csv"
+	anneal_stat = {}
+	for i in sorted(anneal_index):
+		if anneal_name not in anneal_index[i]:
+			# the simulation has not written the anneal file yet
 			continue
+		anneal_file = sim_parm.path + "/anneal/{:03d}/".format(i) + anneal_name
+		anneal_stat[int(i)] = (anneal_file, anneal_index[i][anneal_name])
+	if len(anneal_stat) == 0:
+		print("Unable to open ANNEAL FILE ({:s}). Cannot parse header.".format(sim_parm.path + "/anneal/"))
+		return None
 
-		# parse the results from the simulation
-		f = open(anneal_file, 'r')
-		results = f.readlines()
-		f.close()
-		if (len(results) > 1):
-			# if the file contains a second line
-			# parse the second line, which contains the results
-			results = results[1].split(',')
+	# load the summary and the manifest from the previous update
+	manifest = {}
+	df_prev = None
+	if incremental and os.path.exists(sim_sum_file):
+		manifest = load_anneal_manifest(manifest_file)
+		if len(manifest) > 0:
+			df_prev = pd.read_csv(sim_sum_file, float_precision = 'round_trip')
 		else:
-			# otherwise, break from the loop
-			continue
-
-		# check that the number of items in the result line is the same
-		# as the number of items in the results header
-		if len(head) != len(results):
-			# if they are not equal, break skip this annealing iteration,
-			# and move to the next one
-			continue 
-
-		# create a dictionary that contains the results formatted according to the header
-		prop_dict = {}
-		for j in range(len(head)):
-			if "NaN" in results[j]:
-				results[j] = "0."
-			if head[j] == 'id':
-				prop_dict[head[j]] = i
-			else:
-				prop_dict[head[j]] = float(results[j])
-
-		# add the dictionary to the next row in the dataframe
-		df = pd.concat([df, pd.DataFrame(prop_dict, index = [i])])
-		# replace id column of current row with current index
+			manifest = {}
+
+	# determine the anneal iterations that must be parsed, and the
+	# iterations that were ingested previously but no longer exist
+	parse_list = [i for i in anneal_stat if manifest.get(i) != anneal_stat[i][1]]
+	removed_list = [i for i in manifest if i not in anneal_stat]
+
+	# read each new or modified anneal file in one bulk call, and collect
+	# the results into a columnar accumulator keyed on the anneal file header
+	acc = None
+	head = None
+	if df_prev is not None:
+		head = df_prev.columns.tolist()
+	head, results, rows, failed = read_result_files([anneal_stat[i][0] for i in parse_list], head = head, fill_nan = True)
+	if head is not None:
+		acc = anneal_accumulator(head, len(rows))
+	for k in range(len(rows)):
+		i = parse_list[rows[k]]
+		acc.add(i, results[k])
+		manifest[i] = anneal_stat[i][1]
+	# the files that are incomplete or malformed are not recorded in the
+	# manifest, so that they are parsed during the next update
+	for i in set(parse_list) - set(parse_list[j] for j in rows):
+		manifest.pop(i, None)
+	for i in removed_list:
+		manifest.pop(i, None)
+	if acc is None:
+		return None
+	# the results have only changed if an anneal file was ingested, or if a
+	# previous result was removed (or replaced by a file that is now incomplete).
+	# anneal files that are still incomplete (e.g. the header only anneal file
+	# of the iteration that is running) do not change the results
+	changed = (len(rows) > 0) or (len(removed_list) > 0) or (df_prev is None)
+	if df_prev is not None and not changed:
+		changed = bool(df_prev['id'].isin(parse_list).any())
+
+	# merge the new results with the results from the previous update
+	df = acc.to_dataframe()
+	if df_prev is not None:
+		drop = df_prev['id'].isin(parse_list + removed_list)
+		df = pd.concat([df_prev[~drop], df], ignore_index = True)
+	df = df.sort_values('id', ignore_index = True)
+	if len(df.index) == 0:
+		return None
 
 	# write the annealing results from each simulation to the simulation
-	# summary file
-	sim_sum_file = sim_parm.path + "/anal/" + sim_parm.jobid + sim_parm.simid + "_sum.csv"
-	df.to_csv(sim_sum_file, index = False)
+	# summary file, if the results have changed since the last update
+	if changed or not os.path.exists(timeseries_file):
+		df.to_csv(sim_sum_file, index = False)
+		save_anneal_manifest(manifest_file, manifest)
 
-	# plot the temperature profile of the simulation as a function of the 
-	# simulation time and simulation events
-	plot_temp_time_series(sim_parm.path + "/anal/" + sim_parm.jobid + sim_parm.simid + "_temptime.png",\
-		df["time"].tolist(), df["temp"].tolist())
+		# plot the temperature and order parameter profiles of the simulation
+		# as a function of the simulation time
+		plot_time_series(timeseries_file, df["time"], df, time_series_props,
+			title = 'Annealing Simulation ({:s})'.format(sim_parm.simid))
 
-	# parse the results for each order parameter / fluctuation, 
-	# and the corresponding temperature that they were calculated at
+	return df
 
-	# plot the current temperature of the simulation and the assign temperature
-	# according to the number of steps that the simulation has taken / current
-	# simuation iteration
-
-	## TODO :: plot properties and fluctuations for all properties (make dict?)
-	## TODO :: return most recent point in data series for sim update file
+# method used to compile results from the annealing simulation, 
+# then report the current state of the simulation to the user
+def compile_simulation_results (sim_parm, incremental = True, anneal_index = None):
+	# return the most recent point in the data series for the sim update file
+	_, prop_dict, err, _ = compile_simulation_worker(0, dict(sim_parm.info()), incremental, anneal_index = anneal_index)
+	if err is not None:
+		print("Unable to summarize directory ({:s}). {:s}".format(sim_parm.path, err))
 	return prop_dict
 
-# method that gets updates from simulations, described by
-# list of simulation parameters passed to method
-def update_simulation_results (simparms, savedir = None, saveas = None, verbose = False):
-
-	df_results = pd.DataFrame() # establish empty data frame that contains the results
-	i = 0 # used to count the number of rows in the data frame
+# method used to compile the results of one simulation, either serially or
+# from a worker process. the simulation parameters are passed as a dictionary
+# so that they can be sent to the worker. any error raised while compiling the
+# simulation is caught and returned, so that one bad simulation directory does
+# not abort the update of all other simulations.
+#
+# summary :: if true, the summary of every anneal iteration is returned
+#			 along with the most recent anneal iteration
+def compile_simulation_worker (index, parm_dict, incremental = True, summary = False, anneal_index = None):
+	# rebuild the simulation parameters from the dictionary
+	sim_parm = SimpleNamespace(**parm_dict)
+	try:
+		df = compile_simulation_summary (sim_parm, incremental = incremental, anneal_index = anneal_index)
+	except Exception as e:
+		return index, None, "{:s}: {:s}".format(type(e).__name__, str(e)), None
+	if df is None:
+		return index, None, None, None
+	prop_dict = df.iloc[-1].to_dict()
+	prop_dict['id'] = int(prop_dict['id'])
+	if not summary:
+		df = None
+	return index, prop_dict, None, df
+
+# method that counts the number of rows in a new status data frame that
+# differ from the rows (matched by simulation path) in the previous status
+def count_changed_rows (df_old, df_new, key = 'path'):
+	# if the columns are different, all rows have changed
+	if df_old.columns.tolist() != df_new.columns.tolist():
+		return len(df_new.index)
+	old_rows = {}
+	for row in df_old.itertuples(index = False):
+		old_rows[getattr(row, key)] = row
+	n_changed = len(set(old_rows) - set(df_new[key]))
+	for row in df_new.itertuples(index = False):
+		old = old_rows.get(getattr(row, key))
+		if old is None or not all((a == b) or (pd.isna(a) and pd.isna(b)) for a, b in zip(old, row)):
+			n_changed += 1
+	return n_changed
+
+# method that compiles the results of a list of simulations, either serially
+# or over a pool of processes. returns the results of each simulation (see
+# compile_simulation_worker), in the same order as the simulation parameters
+#
+# parm_list :: list containing the parameters of each simulation as a dictionary
+# ann_list :: list containing the anneal iterations of each simulation (see crawl.py)
+# indices :: list of simulations (positions in parm_list) to compile. all
+#			 simulations are compiled if None, and the others are returned as None
+def compile_simulation_list (parm_list, ann_list, incremental = True, summary = False, workers = None, verbose = False, indices = None):
+
+	if indices is None:
+		indices = range(len(parm_list))
+	# list containing the results returned for each simulation, in the
+	# same order as the simulation parameters
+	results = [None for _ in range(len(parm_list))]
 
 	# loop through parameters, load results
-	for p in simparms:
-		# inform user
-		if verbose:
-			print("Summarizing directory no. {:d} ({:s})".format(i, p.path))
-
-		# compile the current results of the simulation, return sim infor
-		prop_dict = compile_simulation_results (p)
-
-		# create dictionary containing simulation parameters, add to dataframe
-		sim_dict = p.info() | prop_dict
-		df_results = pd.concat([df_results, pd.DataFrame(sim_dict, index = [i])])
+	if workers is None or workers < 2:
+		for i in indices:
+			# inform user
+			if verbose:
+				print("Summarizing directory no. {:d} ({:s})".format(i, parm_list[i]['path']))
+
+			# compile the current results of the simulation, return sim infor
+			results[i] = compile_simulation_worker(i, parm_list[i], incremental, summary, ann_list[i])
+	else:
+		# fan the simulations out over a pool of processes
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = {}
+			for i in indices:
+				futures[pool.submit(compile_simulation_worker, i, parm_list[i], incremental, summary, ann_list[i])] = i
+			for f in as_completed(futures):
+				i = futures[f]
+				try:
+					results[i] = f.result()
+				except Exception as e:
+					# the worker process itself failed
+					results[i] = (i, None, "{:s}: {:s}".format(type(e).__name__, str(e)), None)
+				# inform user
+				if verbose:
+					print("Summarized directory no. {:d} ({:s})".format(i, parm_list[i]['path']))
+
+	return results
+
+# method that merges the results of each simulation into the status file,
+# and writes the summary of each simulation to the campaign store
+#
+# results :: list containing the results of each simulation (see compile_simulation_list)
+# store_indices :: simulations (positions in parm_list) whose summaries are written to
+#				   the campaign store. the summaries of all simulations are written if None
+def write_simulation_results (results, parm_list, savedir = None, saveas = None, verbose = False, incremental = True, store = None, store_indices = None):
+
+	# merge the results into rows, in the order of the simulation parameters
+	rows = []
+	summaries = []
+	n_fail = 0
+	for i, prop_dict, err, df_sum in results:
+		# create dictionary containing simulation parameters
+		sim_dict = dict(parm_list[i])
+		if err is not None:
+			n_fail += 1
+			print("Unable to summarize directory no. {:d} ({:s}). {:s}".format(i, parm_list[i]['path'], err))
+		elif prop_dict is None:
+			# the simulation has not reported any results yet
+			n_fail += 1
+		else:
+			sim_dict = sim_dict | prop_dict
+		rows.append(sim_dict)
+		# add the simulation parameters to each anneal iteration of the summary
+		if df_sum is not None and (store_indices is None or i in store_indices):
+			summaries.append(df_sum.assign(**{c: parm_list[i][c] for c in store_parm_cols}))
+	df_results = pd.DataFrame(rows)
 
-		# increment the number of rows in the data frame
-		i += 1
+	# inform user
+	if verbose:
+		print("From {:d} simulations, {:d} were summarized and {:d} failed.".format(len(rows), len(rows) - n_fail, n_fail))
 
 	# if save dir was specified
 	if savedir is not None:
@@ -227,5 +441,46 @@ def update_simulation_results (simparms, savedir = None, saveas = None, verbose
 		else:
 			savefile = savedir + 'status.csv'
 
+		# determine which rows of the status file have changed since the last update
+		n_changed = len(df_results.index)
+		if incremental and os.path.exists(savefile):
+			n_changed = count_changed_rows(pd.read_csv(savefile, float_precision = 'round_trip'), df_results)
+		if verbose:
+			print("{:d} rows of the status file ({:s}) changed.".format(n_changed, savefile))
+
 		# write the sim status file to the summary directory
-		df_results.to_csv(savefile, index = False)
\ No newline at end of file
+		if n_changed > 0:
+			df_results.to_csv(savefile, index = False)
+
+	# write every anneal iteration of every simulation to the campaign store
+	if store is not None and len(summaries) > 0:
+		df_store = pd.concat(summaries, ignore_index = True)
+		df_store = df_store[store_parm_cols + [c for c in df_store.columns if c not in store_parm_cols]]
+		write_campaign_store(df_store, store, verbose = verbose)
+
+	return df_results
+
+# method that gets updates from simulations, described by
+# list of simulation parameters passed to method
+#
+# workers :: number of processes used to compile the simulation results.
+#			 if None (or less than two), simulations are compiled serially
+# incremental :: if true, only new or modified anneal files are parsed, and
+#				 the status file is only rewritten if any of its rows changed
+# store :: directory of the campaign store that every anneal iteration of
+#		   every simulation is written to (see store.py)
+# index :: index of the campaign tree (see crawl.py). if None, the campaign
+#		   tree that contains the simulations is crawled once
+def update_simulation_results (simparms, savedir = None, saveas = None, verbose = False, workers = None, incremental = True, store = None, index = None):
+
+	# list containing the parameters of each simulation as a dictionary
+	parm_list = [p.info() for p in simparms]
+	# index the campaign tree, rather than scanning each simulation separately
+	if index is None and len(parm_list) > 0:
+		index = crawl_campaign(get_campaign_dir([p['path'] for p in parm_list]), verbose = verbose)
+	ann_list = [get_anneal_index(index, p['path'], p['XA'], p['H'], p['ETA'], p['RP']) for p in parm_list]
+	# compile the current results of each simulation
+	results = compile_simulation_list(parm_list, ann_list, incremental, store is not None, workers, verbose)
+
+	# write the status file and the campaign store
+	return write_simulation_results(results, parm_list, savedir, saveas, verbose, incremental, store)
@@ -0,0 +1,249 @@
+# filename :: watch.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: long running process that watches a conH campaign, and ingests
+#			 each anneal iteration into the simulation summaries, status
+#			 file and campaign store as soon as the anneal file is complete
+
+
+import sys, os
+import time
+import threading
+from simbin.python.conH.crawl import crawl_campaign, scan_anneal_dir, get_campaign_dir, get_anneal_index
+from simbin.python.conH.update import compile_simulation_list, write_simulation_results
+from simbin.python.conH.pack import get_pack_file, pack_file
+
+# filesystem events are used to wake the watcher, if the watchdog module
+# is installed. otherwise, the campaign tree is polled
+try:
+	from watchdog.observers import Observer
+	from watchdog.events import FileSystemEventHandler
+except ImportError:
+	Observer = None
+	FileSystemEventHandler = object
+
+## PARAMETERS
+# number of seconds between each poll of the campaign tree
+watch_interval = 5.
+# number of seconds that an anneal file must remain unchanged before it
+# is ingested, so that files that are partially written (e.g. by rsync)
+# are not parsed
+watch_debounce = 10.
+# number of seconds between each full crawl of the campaign tree. between
+# crawls, only the simulations that changed are scanned
+watch_rescan = 600.
+
+
+## CLASS
+# collects the simulations that have changed according to filesystem events
+class anneal_event_handler(FileSystemEventHandler):
+	""" initialization for anneal_event_handler object. """
+	def __init__(self, wake):
+		self.wake = wake # event that wakes the watcher
+		self.lock = threading.Lock()
+		self.dirty = set() # simulation paths that have changed since the last poll
+
+	""" method called for each filesystem event in the campaign tree. """
+	def on_any_event(self, event):
+		path = os.fsdecode(getattr(event, 'dest_path', '') or event.src_path)
+		if not path.endswith("_anneal.csv"):
+			return
+		# path to the simulation that contains the anneal file
+		sim_path = path.split(os.sep + "anneal" + os.sep)[0]
+		with self.lock:
+			self.dirty.add(os.path.normpath(sim_path))
+		self.wake.set()
+
+	""" method that returns and clears the simulations that have changed. """
+	def pop(self):
+		with self.lock:
+			dirty = self.dirty
+			self.dirty = set()
+		return dirty
+
+
+## FUNCTIONS
+# returns the signature of the anneal file of each anneal iteration of a simulation
+def get_anneal_signatures (parm, anneal):
+	anneal_name = parm['jobid'] + parm['simid'] + "_anneal.csv"
+	return {i: anneal[i][anneal_name] for i in anneal if anneal_name in anneal[i]}
+
+# returns the modification time of the anneal directory of a simulation, of
+# each anneal iteration directory, of the anneal file in each iteration directory
+# and of the archive. the modification time of a directory changes when files
+# are created, renamed or removed in it. the anneal file is created (with its
+# header) when the anneal iteration starts, and its result line is written in
+# place when the iteration finishes, so its size and modification time are
+# included. the anneal directory is only scanned when its signature has changed
+def get_anneal_dir_signature (parm):
+	sig = []
+	anneal_dir = os.path.join(parm['path'], "anneal")
+	anneal_name = parm['jobid'] + parm['simid'] + "_anneal.csv"
+	try:
+		sig.append(('', os.stat(anneal_dir).st_mtime_ns))
+		with os.scandir(anneal_dir) as it:
+			for entry in it:
+				if entry.is_dir():
+					sig.append((entry.name, entry.stat().st_mtime_ns))
+					try:
+						st = os.stat(os.path.join(entry.path, anneal_name))
+						sig.append((entry.name + '/' + anneal_name, st.st_size, st.st_mtime_ns))
+					except OSError:
+						pass
+	except OSError:
+		pass
+	try:
+		st = os.stat(get_pack_file(parm['path']))
+		sig.append((pack_file, st.st_size, st.st_mtime_ns))
+	except OSError:
+		pass
+	return tuple(sorted(sig))
+
+# returns the anneal iterations of a simulation that can be ingested. the
+# iterations whose anneal file has settled (or is unchanged) are passed as
+# they are, the iterations whose anneal file is still changing are passed with
+# the signature that was ingested previously (so that the previous results are
+# kept), or left out if they have not been ingested yet
+#
+# ingested :: signature of each anneal file that has been ingested
+# settled :: anneal iterations whose anneal file has remained unchanged for the debounce time
+def get_settled_index (parm, anneal, ingested, settled):
+	anneal_name = parm['jobid'] + parm['simid'] + "_anneal.csv"
+	index = {}
+	for j in set(anneal) | set(ingested):
+		files = anneal.get(j, {})
+		if j in settled or files.get(anneal_name) == ingested.get(j):
+			if j in anneal:
+				index[j] = files
+		elif j in ingested:
+			index[j] = files | {anneal_name: ingested[j]}
+	return index
+
+# watch a campaign, ingesting each anneal file once it has been written.
+# the status file and campaign store are written once for each batch of
+# simulations that changed during a poll
+#
+# interval :: number of seconds between each poll of the campaign tree
+# debounce :: number of seconds an anneal file must remain unchanged before it is ingested
+# max_polls :: number of polls before returning. if None, the campaign is
+#			   watched until the process is interrupted
+def watch_campaign (simparms, campaign_dir = None, savedir = None, saveas = None, store = None, workers = None, interval = watch_interval, debounce = watch_debounce, max_polls = None, verbose = False):
+
+	# list containing the parameters of each simulation as a dictionary
+	parm_list = [p.info() for p in simparms]
+	if len(parm_list) == 0:
+		print("watch_campaign :: no simulations to watch.")
+		return None
+	if campaign_dir is None:
+		campaign_dir = get_campaign_dir([p['path'] for p in parm_list])
+	# position of each simulation in the parameter list, by path
+	sim_pos = {os.path.normpath(parm_list[i]['path']): i for i in range(len(parm_list))}
+
+	# compile every simulation once, so that the status file and the campaign
+	# store start from the current state of the campaign. the signature of the
+	# anneal directory of each simulation is taken before the crawl, so that
+	# changes made during the crawl are scanned during the first poll
+	dir_sigs = [get_anneal_dir_signature(p) for p in parm_list]
+	index = crawl_campaign(campaign_dir, verbose = verbose)
+	ann_list = [get_anneal_index(index, p['path'], p['XA'], p['H'], p['ETA'], p['RP']) for p in parm_list]
+	results = compile_simulation_list(parm_list, ann_list, True, store is not None, workers)
+	df_results = write_simulation_results(results, parm_list, savedir, saveas, verbose, True, store)
+	# signature of each anneal file that has been ingested
+	ingested = [get_anneal_signatures(parm_list[i], ann_list[i]) for i in range(len(parm_list))]
+	# anneal files that have changed, but have not been ingested yet, as
+	# (simulation, anneal iteration) -> (signature, time first seen)
+	pending = {}
+
+	# start the filesystem observer, if available
+	wake = threading.Event()
+	handler = None
+	observer = None
+	if Observer is not None:
+		handler = anneal_event_handler(wake)
+		observer = Observer()
+		observer.schedule(handler, campaign_dir, recursive = True)
+		observer.start()
+	last_crawl = time.monotonic()
+
+	# inform user
+	if verbose:
+		print("Watching {:d} simulations ({:s}) using {:s}.".format(len(parm_list), campaign_dir, "filesystem events" if observer is not None else "polling"))
+
+	n_polls = 0
+	try:
+		while max_polls is None or n_polls < max_polls:
+			wake.wait(interval)
+			wake.clear()
+			n_polls += 1
+			now = time.monotonic()
+
+			# determine the simulations that must be scanned. only the simulations
+			# that changed (or that have files waiting to be ingested) are scanned,
+			# according to the filesystem events if available, otherwise according
+			# to the signature of each anneal directory. the campaign tree is
+			# crawled periodically in case any changes were missed
+			if now - last_crawl < watch_rescan:
+				scan = set(i for i, _ in pending)
+				if observer is not None:
+					for path in handler.pop():
+						if path in sim_pos:
+							scan.add(sim_pos[path])
+				else:
+					for i in range(len(parm_list)):
+						sig = get_anneal_dir_signature(parm_list[i])
+						if sig != dir_sigs[i]:
+							dir_sigs[i] = sig
+							scan.add(i)
+				for i in scan:
+					ann_list[i] = scan_anneal_dir(parm_list[i]['path'])
+			else:
+				if handler is not None:
+					handler.pop()
+				dir_sigs = [get_anneal_dir_signature(p) for p in parm_list]
+				index = crawl_campaign(campaign_dir)
+				ann_list = [get_anneal_index(index, p['path'], p['XA'], p['H'], p['ETA'], p['RP']) for p in parm_list]
+				scan = range(len(parm_list))
+				last_crawl = now
+
+			# determine the anneal files of each simulation which have
+			# remained unchanged for longer than the debounce time
+			ready = {}
+			for i in scan:
+				sig = get_anneal_signatures(parm_list[i], ann_list[i])
+				for j in set(sig) | set(ingested[i]):
+					if sig.get(j) == ingested[i].get(j):
+						pending.pop((i, j), None)
+						continue
+					prev = pending.get((i, j))
+					if prev is None or prev[0] != sig.get(j):
+						# the file is new, or changed since the last poll
+						pending[(i, j)] = (sig.get(j), now)
+					elif now - prev[1] >= debounce:
+						ready.setdefault(i, set()).add(j)
+			if len(ready) == 0:
+				continue
+
+			# ingest the settled anneal files of each simulation, then write the
+			# status file and store once. the anneal files that are still changing
+			# remain pending until they have settled
+			ann_ready = list(ann_list)
+			for i in ready:
+				ann_ready[i] = get_settled_index(parm_list[i], ann_list[i], ingested[i], ready[i])
+			batch = compile_simulation_list(parm_list, ann_ready, True, store is not None, workers, indices = sorted(ready))
+			for i in ready:
+				results[i] = batch[i]
+				ingested[i] = get_anneal_signatures(parm_list[i], ann_ready[i])
+				for j in ready[i]:
+					pending.pop((i, j), None)
+			if verbose:
+				print("Ingested {:d} simulations ({:s}).".format(len(ready), time.strftime("%Y-%m-%d %H:%M:%S")))
+			# only the summaries of the simulations that were ingested are written to the store
+			df_results = write_simulation_results(results, parm_list, savedir, saveas, verbose, True, store, store_indices = set(ready))
+	except KeyboardInterrupt:
+		pass
+	finally:
+		if observer is not None:
+			observer.stop()
+			observer.join()
+
+	return df_results
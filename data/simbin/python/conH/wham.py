@@ -0,0 +1,245 @@
+# filename :: wham.py
+# author :: Matthew Dorsey (@sunprancekid)
+# date :: 2026-10-17
+# purpuse :: combines the energy and order parameter samples reported by
+#			 adjacent anneal iterations of a conH simulation by multiple
+#			 histogram reweighting (WHAM). the samples are the block averages
+#			 reported by the fortran module, rather than configurations, so
+#			 the properties are only estimated at the set points of the
+#			 annealing schedule, where they are validated against the samples
+#			 of each anneal iteration
+
+
+import sys, os
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+from scipy.special import logsumexp
+from simbin.python.conH.series import reduce_series_file, series_files
+from simbin.python.conH.geom import mer
+from simbin.python.conH.response import response_props
+from simbin.python.conH.crawl import get_index_key
+
+## PARAMETERS
+# number of anneal iterations, nearest in temperature, whose samples are
+# combined to estimate the properties at each temperature
+wham_window = 5
+# number of standard errors within which the estimate of each property at the
+# temperature of an anneal iteration must match the average of its samples
+wham_valid_err = 2.
+# convergence tolerance and maximum number of iterations of the free energies
+wham_tol = 1e-8
+wham_max_iter = 10000
+# maximum number of samples loaded from each time series file (see series.py)
+wham_samples = 1000
+# number of events at the end of each anneal iteration during which the
+# system is at equilibrium (see set_equilibriation in conH.f90)
+wham_equil_events = 20e6
+# columns of the time series files, renamed to the columns of the anneal file
+wham_rename = {'allign': 'mag', 'percolation': 'percy', 'full': 'ds'}
+# properties that are estimated at each temperature
+wham_props = ['te', 'pot', 'poly', 'ht', 'anti', 'ds', 'percy', 'nclust', 'nematic', 'mag']
+
+
+## FUNCTIONS
+# loads the samples reported by an anneal iteration, from its report and
+# order parameter time series files. each sample is one row of the time
+# series, which the fortran module writes as the average of the block of
+# events since the previous row (see report_properties in polsqu2x2_mod.f90).
+# only the rows written during the last equil_events events of the anneal
+# iteration are kept, once the system has equilibrated at its temperature.
+# returns None if either file does not exist
+def load_iteration_samples (sim_parm, anneal_id, max_points = wham_samples, equil_events = wham_equil_events):
+	path = sim_parm.path + "/anneal/{:03d}/".format(int(anneal_id)) + sim_parm.jobid + sim_parm.simid
+	samples = []
+	for kind in ['report', 'op']:
+		red = reduce_series_file(path + series_files[kind], max_points = max_points)
+		if red is None or red.n_rows == 0:
+			return None
+		samples.append(red.to_dataframe().rename(columns = wham_rename))
+	df = samples[0].merge(samples[1].drop(columns = [c for c in samples[1].columns if c in samples[0].columns and c not in ['time', 'events']]), on = ['time', 'events'])
+	df = df[np.isfinite(df['pot'])]
+	return df[df['events'] > df['events'].max() - equil_events]
+
+# solves the free energy of each anneal iteration self-consistently
+#
+#	f_k = -ln sum_n exp(-beta_k U_n) / sum_j N_j exp(f_j - beta_j U_n)
+#
+# where the sum over n runs over the samples of every anneal iteration. the
+# free energies are initialized by integrating the average energy of each
+# iteration over the inverse temperature
+#
+# u :: (m,) array containing the energy of every sample
+# n_k :: (k,) array containing the number of samples of each anneal iteration
+# beta :: (k,) array containing the inverse temperature of each anneal iteration
+# u_k :: (k,) array containing the average energy of each anneal iteration
+# returns the free energy of each anneal iteration, and the logarithm of the
+# denominator of each sample
+def wham_free_energies (u, n_k, beta, u_k, tol = wham_tol, max_iter = wham_max_iter):
+	order = np.argsort(beta)
+	f = np.zeros(len(beta))
+	f[order] = np.concatenate([[0.], np.cumsum(np.diff(beta[order]) * 0.5 * (u_k[order][1:] + u_k[order][:-1]))])
+	log_n = np.log(n_k)[:, None]
+	bu = beta[:, None] * u[None, :]
+	for it in range(max_iter):
+		logden = logsumexp(log_n + f[:, None] - bu, axis = 0)
+		f_new = -logsumexp(-bu - logden[None, :], axis = 1)
+		f_new -= f_new[0]
+		done = np.max(np.abs(f_new - f)) < tol
+		f = f_new
+		if done:
+			break
+	return f, logsumexp(log_n + f[:, None] - bu, axis = 0)
+
+# returns the average and variance of each property at a temperature, along
+# with the effective number of samples, from the reweighted samples
+#
+# a :: (m, q) array containing the properties of every sample
+# logden :: (m,) array containing the denominator of each sample (see wham_free_energies)
+def wham_estimate (u, a, logden, temp):
+	logw = -u / temp - logden
+	w = np.exp(logw - logw.max())
+	w /= w.sum()
+	mean = w @ a
+	var = w @ (a - mean) ** 2
+	return mean, var, 1. / np.sum(w ** 2)
+
+# estimates the properties of a simulation at the temperature of each of its
+# anneal iterations, from the samples of the anneal iterations nearest in
+# temperature, whose free energies are solved once for every anneal iteration
+# they are nearest to. each sample is a block average, so the energy of each
+# sample is the average energy of a block rather than the energy of a
+# configuration, and the spread of the samples is much narrower than the
+# fluctuations of the system. the reweighting is therefore only anchored at the
+# set points of the annealing schedule, and the properties are not estimated
+# between them (which requires the energy of each configuration). the estimate
+# of each property (<prop>) is compared to the average (<prop>_iter) and
+# standard error (<prop>_err) of the samples of the anneal iteration, and is
+# valid if every property is within wham_valid_err standard errors. the heat
+# capacity and magnetic susceptibility are estimated from the variance of the
+# reweighted samples, which are block averages, so they are relative, as are
+# those calculated from the fluctuations of each anneal iteration (see calc_response)
+#
+# df :: data frame containing the anneal iterations (id, temp) of the simulation
+# n_squares :: number of squares in the simulation. the energies are reported per
+#			   circle, the energy of each sample is the total potential energy
+# returns a data frame that contains the estimated properties at the temperature
+# of each anneal iteration (id, temp), along with the effective number of samples
+# (n_eff), the anneal iterations (min_id, max_id) that the estimates are
+# reweighted from, and whether the estimates are valid (valid)
+def reweight_simulation (sim_parm, df, n_squares, window = wham_window, props = None):
+
+	# load the samples of each anneal iteration
+	df = df[np.isfinite(df['temp']) & (df['temp'] > 0.)].sort_values('id')
+	ids = []
+	t_k = []
+	samples = []
+	for i, t in zip(df['id'], df['temp']):
+		s = load_iteration_samples(sim_parm, i)
+		if s is None or len(s.index) == 0:
+			continue
+		ids.append(int(i))
+		t_k.append(float(t))
+		samples.append(s)
+	if len(samples) < 2:
+		return None
+	if props is None:
+		props = [p for p in wham_props if all(p in s.columns for s in samples)]
+	t_k = np.array(t_k)
+	n_c = n_squares * mer
+
+	# response functions estimated from the variance of the reweighted properties
+	resp = {}
+	for r, (col, power, per_circle) in response_props.items():
+		p = col[:-len('_fluc')]
+		if p in props:
+			resp[r] = (props.index(p), power, n_squares * (mer if per_circle else 1))
+
+	# group the anneal iterations by the anneal iterations that they are nearest to
+	window = min(window, len(ids))
+	windows = {}
+	for k in range(len(ids)):
+		near = tuple(sorted(np.argsort(np.abs(np.log(t_k) - np.log(t_k[k])), kind = 'stable')[:window]))
+		windows.setdefault(near, []).append(k)
+
+	# solve the free energies of each window, estimate the properties
+	rows = []
+	for near, ts in windows.items():
+		s = [samples[k] for k in near]
+		u = n_c * np.concatenate([x['pot'].to_numpy(dtype = float) for x in s])
+		a = np.concatenate([x[props].to_numpy(dtype = float) for x in s])
+		n_k = np.array([len(x.index) for x in s], dtype = float)
+		u_k = np.array([n_c * x['pot'].mean() for x in s])
+		f, logden = wham_free_energies(u, n_k, 1. / t_k[list(near)], u_k)
+		for k in ts:
+			t = t_k[k]
+			mean, var, n_eff = wham_estimate(u, a, logden, t)
+			# average and standard error of the samples of the anneal iteration
+			a_k = samples[k][props].to_numpy(dtype = float)
+			mean_k = a_k.mean(axis = 0)
+			err_k = a_k.std(axis = 0, ddof = 1) / np.sqrt(len(a_k)) if len(a_k) > 1 else np.full(len(props), np.nan)
+			row = {'id': ids[k], 'temp': t}
+			for j in range(len(props)):
+				row[props[j]] = mean[j]
+				row[props[j] + '_iter'] = mean_k[j]
+				row[props[j] + '_err'] = err_k[j]
+			for r, (j, power, n) in resp.items():
+				row[r] = n * var[j] / t ** power
+			valid = np.abs(mean - mean_k) <= wham_valid_err * err_k + 1e-9 * np.abs(mean_k)
+			row |= {'n_eff': n_eff, 'min_id': ids[min(near)], 'max_id': ids[max(near)], 'valid': bool(np.all(valid))}
+			rows.append(row)
+	return pd.DataFrame(rows).sort_values('temp', ascending = False, ignore_index = True)
+
+# process that reweights the samples of one simulation, and writes the
+# estimated properties to its analysis directory (<jobid><simid>_wham.csv)
+def wham_worker (index, parm_dict, df, n_squares):
+	sim_parm = SimpleNamespace(**parm_dict)
+	try:
+		df_wham = reweight_simulation(sim_parm, df, n_squares)
+	except (OSError, ValueError) as e:
+		return index, None, "{:s}: {:s}".format(type(e).__name__, str(e))
+	if df_wham is None:
+		return index, None, "Unable to find TIME SERIES of two anneal iterations ({:s}).".format(sim_parm.path + "/anneal/")
+	anal_dir = sim_parm.path + "/anal/"
+	if not os.path.exists(anal_dir):
+		os.mkdir(anal_dir)
+	df_wham.to_csv(anal_dir + sim_parm.jobid + sim_parm.simid + "_wham.csv", index = False)
+	return index, df_wham, None
+
+# reweights the samples of each simulation across a pool of processes
+#
+# df :: data frame containing the anneal iterations of every simulation (e.g.
+#		loaded from the campaign store)
+# workers :: number of processes. if None (or less than two), simulations are reweighted serially
+# returns the estimated properties of every simulation, with the parameters of each simulation
+def reweight_simulations (simparms, df, n_squares, workers = None, verbose = False):
+	parm_list = [dict(p.info()) for p in simparms]
+	groups = {get_index_key(*key): g[['id', 'temp']] for key, g in df.groupby(['XA', 'H', 'ETA', 'RP'])}
+	jobs = []
+	for i in range(len(parm_list)):
+		p = simparms[i]
+		key = get_index_key(p.XA, p.H, p.ETA, p.RP)
+		if key in groups:
+			jobs.append((i, parm_list[i], groups[key], n_squares))
+	results = []
+	if workers is None or workers < 2:
+		results = [wham_worker(*j) for j in jobs]
+	else:
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = [pool.submit(wham_worker, *j) for j in jobs]
+			results = [f.result() for f in as_completed(futures)]
+
+	# collect the results of each simulation
+	frames = []
+	for index, df_wham, err in sorted(results, key = lambda r: r[0]):
+		p = simparms[index]
+		if err is not None:
+			print(err)
+			continue
+		frames.append(df_wham.assign(**dict(p.info())))
+		if verbose:
+			print("Reweighted {:d} anneal iterations, {:d} valid ({:s}).".format(len(df_wham.index), int(df_wham['valid'].sum()), p.path))
+	if len(frames) == 0:
+		return pd.DataFrame()
+	return pd.concat(frames, ignore_index = True)
@@ -2,3 +2,108 @@
 # Chemical Engineering - NCSU
 # 2024.02.20
 # methods that abstract the generation of contour plots
+
+## PACKAGES
+import sys, os, math
+import pandas as pd 
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+
+## METHODS
+# generate contour plot of a 2D map (e.g. the structure factor S(kx, ky),
+# see sk.py) and save to specified location
+#
+# x, y :: 1D arrays containing the coordinates of the rows and columns of z
+# z :: 2D array containing the values of the map, indexed [x, y]
+def gen_contour_plot(x = None, y = None, z = None, file = None,
+	# figure properties
+	save = None, # location to save figure to
+	dpi = None,
+	title = None, # graph title
+	subtitle = None, # graph subtitle
+	X_label = None, # x-axis label
+	Y_label = None, # y_axis label
+	Z_label = None, # colorbar label
+	fontsize = None, # plot fontsize
+	max_x = None, # maximum x-axis value
+	min_x = None, # minimum x-axis value
+	max_y = None, # maximum y-axis value
+	min_y = None, # minimum y-axis value
+	max_z = None, # maximum colorbar value
+	min_z = None, # minimum colorbar value
+	colormap = None,
+	levels = None, # number of contour levels
+	log_scale = False): # plot the values of the map on a log scale
+
+	# function defaults, used if value isn't specified in method call
+	default_fig_save = 'contour.png'
+	default_fig_colormap = 'viridis'
+	default_fig_fontsize = 14
+	default_levels = 50
+	default_dpi = 200
+	if save is None:
+		save = default_fig_save
+	if colormap is None:
+		colormap = default_fig_colormap
+	if fontsize is None:
+		fontsize = default_fig_fontsize
+	if levels is None:
+		levels = default_levels
+	if dpi is None:
+		dpi = default_dpi
+
+	# load the map from a file, if the arrays were not passed (see np.savez)
+	if z is None:
+		if file is None:
+			print("gen_contour_plot: pass 'z' or 'file' to method in order to load data.")
+			return
+		data = np.load(file)
+		x, y, z = data['kx'], data['ky'], data['S']
+
+	# get figure max and min values
+	z = np.ma.masked_invalid(z)
+	if min_x is None:
+		min_x = min(x)
+	if max_x is None:
+		max_x = max(x)
+	if min_y is None:
+		min_y = min(y)
+	if max_y is None:
+		max_y = max(y)
+	if min_z is None:
+		min_z = z[z > 0].min() if log_scale else z.min()
+	if max_z is None:
+		max_z = z.max()
+	if log_scale:
+		norm = mcolors.LogNorm(vmin = min_z, vmax = max_z)
+		z = np.ma.masked_less_equal(z, 0.)
+		levels = np.geomspace(min_z, max_z, levels)
+	else:
+		norm = mcolors.Normalize(vmin = min_z, vmax = max_z)
+		levels = np.linspace(min_z, max_z, levels)
+
+	# plot the map, the rows of z correspond to the x-axis
+	fig, ax = plt.subplots()
+	cs = ax.contourf(x, y, np.ma.transpose(z), levels = levels, norm = norm, cmap = colormap, extend = 'both')
+	cbar = fig.colorbar(cs, ax = ax)
+	ax.set_xlim(min_x, max_x)
+	ax.set_ylim(min_y, max_y)
+	ax.set_aspect('equal')
+	ax.tick_params(axis='both', which='major', labelsize=fontsize - 2)
+	cbar.ax.tick_params(labelsize=fontsize - 2)
+
+	# add figure labels and titles
+	if X_label is not None:
+		plt.xlabel(X_label, fontsize=fontsize)
+	if Y_label is not None:
+		plt.ylabel(Y_label, fontsize=fontsize)
+	if Z_label is not None:
+		cbar.set_label(Z_label, fontsize=fontsize)
+	if subtitle is not None:
+		plt.title(subtitle, fontsize = fontsize)
+	if title is not None:
+		plt.suptitle(title, fontsize = fontsize)
+	plt.savefig(save, dpi = dpi, bbox_inches="tight")
+	plt.close(fig)
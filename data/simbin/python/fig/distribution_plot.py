@@ -52,7 +52,7 @@ def get_magnetic_expectation(X):
 	# of the von Mises distribution for each point in the array X
 
 # generate distribution plot and save to specified location
-def gen_dist_plot(file = None, x_col = None, y_col = None,
+def gen_dist_plot(df = None, file = None, x_col = None, y_col = None,
 	plot_expectation = False, X = None, expectation_label = None,
 	# generate distribution in circular format
 	circular_bool = False,
@@ -86,8 +86,11 @@ def gen_dist_plot(file = None, x_col = None, y_col = None,
 		bar_color = default_bar_color
 	## TODO :: load several files, average distributions
 
-	# load the file as a data frame
-	dist = pd.read_csv(file)
+	# load the file as a data frame, if a data frame was not passed
+	if df is None:
+		dist = pd.read_csv(file)
+	else:
+		dist = df
 
 	# parse data from file
 	x_dist = dist['theta'].tolist()
@@ -70,7 +70,7 @@ def get_magnetic_expectation(X):
 	# of the von Mises distribution for each point in the array X
 	
 # parse data from file, return as dataframe
-def load_dataframe(file, x_col = None, y_col = None, v_col = None):
+def load_dataframe(file, x_col = None, y_col = None, v_col = None, band_cols = None):
 	if file is None:
 		print("File is none.")
 		exit()
@@ -82,7 +82,13 @@ def load_dataframe(file, x_col = None, y_col = None, v_col = None):
 	y = mag_df[y_col].tolist()
 	v = mag_df[v_col].tolist()
 	# return datafram containing columns
-	return pd.DataFrame({x_col: x, y_col: y, v_col: v})
+	df = pd.DataFrame({x_col: x, y_col: y, v_col: v})
+	# add the bounds of the confidence interval, if requested
+	if band_cols is not None:
+		for c in band_cols:
+			if c is not None:
+				df[c] = mag_df[c].tolist()
+	return df
 
 # function that gets data for highlighted lines
 def get_highlights (hvals, max_hvals, scale_constant, colormap, label_order, action_constant = None):
@@ -181,6 +187,7 @@ def get_highlights (hvals, max_hvals, scale_constant, colormap, label_order, act
 def gen_highlight_plot(
 		df = None, file = None, y_col = None, x_col = None, iso_col = None, # data for seabornplot
 		expect_file = None, x_exp_col = None, y_exp_col = None,# conditions underwhich the inflection take place, corresponds to Y potion of 2D mesh
+		y_lo_col = None, y_hi_col = None, # lower and upper bound of the confidence interval of y_col, plotted as shaded bands (see stats.py)
 		# figure properties (title, etc.)
 		save =  None,
 		dpi = None,
@@ -254,7 +261,7 @@ def gen_highlight_plot(
 			print("gen_highlight_plot: pass 'filename' to method in order to load data.")
 			exit()
 		else:
-			df = load_dataframe(file, x_col, iso_col, y_col)
+			df = load_dataframe(file, x_col, iso_col, y_col, band_cols = [y_lo_col, y_hi_col])
 
 	# determine the information that will be plotted on the seaborn plot
 	## TODO check that highlights are in isolated values
@@ -266,6 +273,9 @@ def gen_highlight_plot(
 	y = []
 	iso = []
 	h = []
+	y_lo = []
+	y_hi = []
+	band = y_lo_col is not None and y_hi_col is not None
 	for i in iso_vals:
 		# get the y_values that correspond to the index
 		iso_df = df.loc[df[iso_col] == i]
@@ -274,6 +284,9 @@ def gen_highlight_plot(
 			x.append(iso_df[x_col][j])
 			y.append(iso_df[y_col][j])
 			iso.append(iso_df[iso_col][j])
+			if band:
+				y_lo.append(iso_df[y_lo_col][j])
+				y_hi.append(iso_df[y_hi_col][j])
 			if highlight is not None:
 				if i in highlight:
 					h.append("h")
@@ -288,9 +301,9 @@ def gen_highlight_plot(
 	if max_x is None:
 		max_x = max(x) * (1. + pad)
 	if min_y is None:
-		min_y = min(y)
+		min_y = min(y) if not band else np.nanmin(np.fmin(y, y_lo))
 	if max_y is None:
-		max_y = max(y)
+		max_y = max(y) if not band else np.nanmax(np.fmax(y, y_hi))
 
 	dy = max_y - min_y
 	min_y = min_y - dy * pad
@@ -304,11 +317,16 @@ def gen_highlight_plot(
 	ax.set_ylim(min_y, max_y)
 	ax.spines[['right', 'top']].set_visible(False)
 	df = pd.DataFrame({x_col: x, y_col: y, iso_col: iso, 'highlight': h})
+	if band:
+		df['y_lo'] = y_lo
+		df['y_hi'] = y_hi
 	df_other = df[df['highlight'] == 'o']
 	df_highlight = df[df['highlight'] == 'h']
 	for j in df_other[iso_col].unique():
 	    data = df[df[iso_col] == j]
 	    ax.plot(x_col, y_col, c=GREY40, lw=2., alpha=0.5, data=data)
+	    if band:
+	        ax.fill_between(data[x_col], data['y_lo'], data['y_hi'], color=GREY40, alpha=0.15, lw=0.)
 
 	if highlight is not None:
 		y_pos = [] # list containing the final hight of each highligted line
@@ -317,6 +335,8 @@ def gen_highlight_plot(
 		    data = df[df[iso_col] == j]
 		    color = colors[i]
 		    ax.plot(x_col, y_col, color=color, lw=2.5, data=data)
+		    if band:
+		        ax.fill_between(data[x_col], data['y_lo'], data['y_hi'], color=color, alpha=0.2, lw=0.)
 		    # get the final height of the line
 		    y_pos.append(data[y_col].iloc[-1])
 
@@ -17,6 +17,8 @@ from statistics import mean
 from matplotlib import cm
 from matplotlib.colors import ListedColormap, LinearSegmentedColormap
 from scipy.interpolate import RegularGridInterpolator
+from simbin.python.conH.reader import read_result_files
+from simbin.python.conH.stats import replicate_confidence
 
 
 ## PARAMETERS
@@ -53,54 +55,31 @@ def parse_simulation_data(path='./', header = None, T_col = None, X_col = None,
 	T_set = simparam_df[T_col].tolist()
 	X_set = simparam_df[X_col].tolist()
 
-	# get the header for the results files
-	anneal_file = path + "anneal/" + simid[0] + "_anneal.csv"
-	f = open(anneal_file, 'r')
-	anneal_header = f.readlines()
-	header = f"{id_col},{T_col},{X_col}," + anneal_header[0]
-	f.close()
-
-	# loop through all simulation parameters
-	# parse sim data for file writing
+	# read the results file of every simulation in one bulk call, keeping
+	# the header and result line of each file as they were written
 	n_sims = len(simparam_df.index)
-	success = [ "" for _ in range(n_sims)]
-	failure = [ "" for _ in range(n_sims)]
-	a = 0 # successful simdata counter
-	b = 0 # failed simdata counter
+	anneal_files = [path + "anneal/" + simid[i] + "_anneal.csv" for i in range(n_sims)]
+	anneal_header, anneal_results, rows, failed = read_result_files(anneal_files, text = True)
+	header = f"{id_col},{T_col},{X_col}"
+	if anneal_header is not None:
+		header = f"{header}," + anneal_header
+
+	# split the simulations into those that completed successfully
+	# and those that failed or were unable to be accessed
+	success = []
+	failure = []
+	k = 0
 	for i in range(0, (n_sims)):
-		# determine the annealing file
-		anneal_file = path + "anneal/" + simid[i] + "_anneal.csv"
-		
-		# check if the file exists, parse results
 		simresults = f"{simid[i]},{T_set[i]},{X_set[i]}"
-		isValid = True # used for debugging
-		if os.path.exists(anneal_file):
-			# open the file
-			f = open(anneal_file, "r")
-			info = f.readlines()
-			# if the file has two lines
-			if (len(info) > 1):
-				simresults = f"{simresults}, {info[1]}" # get the second line
-				if (len(simresults) < 10):
-					isValid = False
-			else:
-				# if the second line in the file is not present, skip the entry
-				isValid = False
-		else:
-			# if the file does not exist 
-			isValid = False
-
-		if isValid:
-			success[a] = simresults
+		if k < len(rows) and rows[k] == i:
+			success.append(f"{simresults}, {anneal_results[k]}")
 			if debug:
-				print(f"{a} :: {i}, {anneal_file}")
-			a += 1
+				print(f"{len(success) - 1} :: {i}, {anneal_files[i]}")
+			k += 1
 		else:
-			# the simulation failed or was unable to be accessed
-			# write the entry to the failed save file
-			failure[b] = simresults
-			# iterate, skip the entry
-			b += 1
+			failure.append(simresults)
+	a = len(success) # successful simdata counter
+	b = len(failure) # failed simdata counter
 
 	# report the successful and un-successful simulation data to the user
 	if verbose:
@@ -132,26 +111,13 @@ def parse_simulation_data(path='./', header = None, T_col = None, X_col = None,
 	## average results for unique combinations of the desired properties
 	# create a data frame that contains the successful data
 	df = pd.read_csv(anal_path + "testH_success.csv")
-	result_header = f"{T_col},{X_col}"
-	for p in properties:
-		result_header = result_header + f",{p}"
-	results = []
-	for t in df[T_col].unique().tolist():
-		for x in df[X_col].unique().tolist():
-			result_string = f"{t},{x}"
-			result_df = df.loc[(df[T_col] == t) & (df[X_col] == x)]
-			for p in properties:
-				result_string = result_string + ",{:.3f}".format(result_df[p].mean())
-			results.append(result_string)
+	# average the replicates of each combination, with the bootstrap
+	# confidence interval of each property (<p>_lo, <p>_hi)
+	df_res = replicate_confidence(df, properties, keys = [T_col, X_col])
 
 	# write the results to file
 	results_file = anal_path + "testH_anal.csv"
-	with open(results_file, 'w') as f:
-		# write header
-		f.write(f"{result_header}\n")
-		for i in range(len(results)):
-			f.write(f"{results[i]}\n".replace(" ", ""))
-	f.close()
+	df_res[[T_col, X_col] + [c for p in properties for c in [p, p + '_lo', p + '_hi']]].round(3).to_csv(results_file, index = False)
 
 	# return a dataframe containing the averaged results to the user
 	return pd.read_csv(results_file)